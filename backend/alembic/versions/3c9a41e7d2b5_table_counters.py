@@ -0,0 +1,56 @@
+"""table counters
+
+Revision ID: 3c9a41e7d2b5
+Revises: bd1f8285d486
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9a41e7d2b5'
+down_revision: Union[str, None] = 'bd1f8285d486'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTED_TABLES = ['users', 'submissions', 'invites']
+
+
+def upgrade() -> None:
+    op.create_table('table_counters',
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+
+    for table in COUNTED_TABLES:
+        op.execute(
+            f"INSERT INTO table_counters (table_name, row_count) "
+            f"SELECT '{table}', count(*) FROM {table}"
+        )
+        op.execute(f"""
+            CREATE TRIGGER {table}_count_insert AFTER INSERT ON {table}
+            BEGIN
+                UPDATE table_counters SET row_count = row_count + 1
+                WHERE table_name = '{table}';
+            END
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_count_delete AFTER DELETE ON {table}
+            BEGIN
+                UPDATE table_counters SET row_count = row_count - 1
+                WHERE table_name = '{table}';
+            END
+        """)
+
+
+def downgrade() -> None:
+    for table in COUNTED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_count_delete")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_count_insert")
+
+    op.drop_table('table_counters')
@@ -0,0 +1,68 @@
+"""change log
+
+Revision ID: 4b7d1e9a2c60
+Revises: f2c86b0e4d17
+Create Date: 2026-10-18 19:02:44.310586
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7d1e9a2c60'
+down_revision: Union[str, None] = 'f2c86b0e4d17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FEED_TABLES = ['submissions']
+
+
+def upgrade() -> None:
+    op.create_table('changes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=True),
+    sa.Column('action', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    op.create_index('ix_changes_table_name_id', 'changes', ['table_name', 'id'], unique=False)
+
+    for table in FEED_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO changes (table_name, row_id, action)
+                VALUES ('{table}', NEW.id, 'create');
+            END
+        """)
+        # The version trigger's own UPDATE fires this too, skip that one
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_update AFTER UPDATE ON {table}
+            WHEN NEW.version IS OLD.version
+            BEGIN
+                INSERT INTO changes (table_name, row_id, action)
+                VALUES ('{table}', NEW.id, 'update');
+            END
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO changes (table_name, row_id, action)
+                VALUES ('{table}', OLD.id, 'delete');
+            END
+        """)
+
+
+def downgrade() -> None:
+    for table in FEED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_change_delete")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_change_update")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_change_insert")
+
+    op.drop_index('ix_changes_table_name_id', table_name='changes')
+    op.drop_table('changes')
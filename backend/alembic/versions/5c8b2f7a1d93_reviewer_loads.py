@@ -0,0 +1,87 @@
+"""reviewer loads
+
+Revision ID: 5c8b2f7a1d93
+Revises: 9d3a6f1c8e27
+Create Date: 2026-10-18 22:04:51.630287
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c8b2f7a1d93'
+down_revision: Union[str, None] = '9d3a6f1c8e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# An assignment is open while its submission is unresolved
+OPEN_INCREMENT = """
+    INSERT INTO reviewer_loads (user_id, open_assignments)
+    SELECT NEW.assignee_id, 1
+    WHERE NEW.assignee_id IS NOT NULL AND NOT NEW.resolved
+    ON CONFLICT (user_id) DO UPDATE SET open_assignments = open_assignments + 1;
+"""
+OPEN_DECREMENT = """
+    UPDATE reviewer_loads SET open_assignments = open_assignments - 1
+    WHERE user_id = OLD.assignee_id AND NOT OLD.resolved;
+"""
+
+
+def upgrade() -> None:
+    op.create_table('reviewer_loads',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('open_assignments', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('weight', sa.Integer(), server_default='1', nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    op.execute("""
+        INSERT INTO reviewer_loads (user_id, open_assignments)
+        SELECT assignee_id, count(*) FROM submissions
+        WHERE assignee_id IS NOT NULL AND NOT resolved
+        GROUP BY assignee_id
+    """)
+
+    op.execute(f"""
+        CREATE TRIGGER submissions_load_insert AFTER INSERT ON submissions
+        BEGIN
+            {OPEN_INCREMENT}
+        END
+    """)
+    # Only the two columns, so the version and change_seq triggers' own
+    # updates don't fire it
+    op.execute(f"""
+        CREATE TRIGGER submissions_load_update
+        AFTER UPDATE OF assignee_id, resolved ON submissions
+        WHEN OLD.assignee_id IS NOT NEW.assignee_id
+            OR OLD.resolved IS NOT NEW.resolved
+        BEGIN
+            {OPEN_DECREMENT}
+            {OPEN_INCREMENT}
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER submissions_load_delete AFTER DELETE ON submissions
+        BEGIN
+            {OPEN_DECREMENT}
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER users_load_delete AFTER DELETE ON users
+        BEGIN
+            DELETE FROM reviewer_loads WHERE user_id = OLD.id;
+        END
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS users_load_delete")
+    op.execute("DROP TRIGGER IF EXISTS submissions_load_delete")
+    op.execute("DROP TRIGGER IF EXISTS submissions_load_update")
+    op.execute("DROP TRIGGER IF EXISTS submissions_load_insert")
+
+    op.drop_table('reviewer_loads')
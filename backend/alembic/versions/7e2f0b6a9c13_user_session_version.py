@@ -0,0 +1,28 @@
+"""user session version
+
+Revision ID: 7e2f0b6a9c13
+Revises: 3c9a41e7d2b5
+Create Date: 2026-10-18 10:03:51.640127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2f0b6a9c13'
+down_revision: Union[str, None] = '3c9a41e7d2b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('session_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('session_version')
@@ -0,0 +1,146 @@
+"""submission change seq
+
+Revision ID: 9d3a6f1c8e27
+Revises: 4b7d1e9a2c60
+Create Date: 2026-10-18 20:15:37.904112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3a6f1c8e27'
+down_revision: Union[str, None] = '4b7d1e9a2c60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SYNCED_TABLES = ['submissions']
+
+
+def drop_triggers(table: str) -> None:
+    op.execute(f"DROP TRIGGER IF EXISTS {table}_version_update")
+    op.execute(f"DROP TRIGGER IF EXISTS {table}_change_insert")
+    op.execute(f"DROP TRIGGER IF EXISTS {table}_change_update")
+    op.execute(f"DROP TRIGGER IF EXISTS {table}_change_delete")
+
+
+def upgrade() -> None:
+    op.create_table('tombstones',
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('change_seq', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name', 'row_id')
+    )
+    op.create_index('ix_tombstones_table_name_change_seq', 'tombstones', ['table_name', 'change_seq'], unique=False)
+
+    for table in SYNCED_TABLES:
+        op.add_column(table, sa.Column('change_seq', sa.Integer(), nullable=True))
+        op.create_index(op.f(f'ix_{table}_change_seq'), table, ['change_seq'], unique=False)
+
+        drop_triggers(table)
+
+        # Setting change_seq is bookkeeping, not a change, so it neither
+        # bumps the version nor logs an update
+        op.execute(f"""
+            CREATE TRIGGER {table}_version_update AFTER UPDATE ON {table}
+            WHEN NEW.change_seq IS OLD.change_seq
+            BEGIN
+                UPDATE {table}
+                SET version = OLD.version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE id = NEW.id;
+                UPDATE table_counters SET version = version + 1
+                WHERE table_name = '{table}';
+            END
+        """)
+        # Inside a trigger last_insert_rowid() is the change just logged
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO changes (table_name, row_id, action)
+                VALUES ('{table}', NEW.id, 'create');
+                UPDATE {table} SET change_seq = last_insert_rowid()
+                WHERE id = NEW.id;
+                DELETE FROM tombstones
+                WHERE table_name = '{table}' AND row_id = NEW.id;
+            END
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_update AFTER UPDATE ON {table}
+            WHEN NEW.version IS OLD.version AND NEW.change_seq IS OLD.change_seq
+            BEGIN
+                INSERT INTO changes (table_name, row_id, action)
+                VALUES ('{table}', NEW.id, 'update');
+                UPDATE {table} SET change_seq = last_insert_rowid()
+                WHERE id = NEW.id;
+            END
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO changes (table_name, row_id, action)
+                VALUES ('{table}', OLD.id, 'delete');
+                INSERT OR REPLACE INTO tombstones (table_name, row_id, change_seq)
+                VALUES ('{table}', OLD.id, last_insert_rowid());
+            END
+        """)
+
+        # Existing rows all change at one reset
+        op.execute(f"""
+            INSERT INTO changes (table_name, row_id, action)
+            SELECT '{table}', NULL, 'reset' WHERE EXISTS (SELECT 1 FROM {table})
+        """)
+        op.execute(f"""
+            UPDATE {table} SET change_seq = (
+                SELECT MAX(id) FROM changes
+                WHERE table_name = '{table}' AND action = 'reset'
+            )
+        """)
+
+
+def downgrade() -> None:
+    for table in SYNCED_TABLES:
+        drop_triggers(table)
+
+        op.execute(f"""
+            CREATE TRIGGER {table}_version_update AFTER UPDATE ON {table}
+            BEGIN
+                UPDATE {table}
+                SET version = OLD.version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE id = NEW.id;
+                UPDATE table_counters SET version = version + 1
+                WHERE table_name = '{table}';
+            END
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO changes (table_name, row_id, action)
+                VALUES ('{table}', NEW.id, 'create');
+            END
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_update AFTER UPDATE ON {table}
+            WHEN NEW.version IS OLD.version
+            BEGIN
+                INSERT INTO changes (table_name, row_id, action)
+                VALUES ('{table}', NEW.id, 'update');
+            END
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO changes (table_name, row_id, action)
+                VALUES ('{table}', OLD.id, 'delete');
+            END
+        """)
+
+        op.drop_index(op.f(f'ix_{table}_change_seq'), table_name=table)
+        # Native DROP COLUMN, batch mode would rebuild the table without
+        # its triggers
+        op.execute(f"ALTER TABLE {table} DROP COLUMN change_seq")
+
+    op.drop_index('ix_tombstones_table_name_change_seq', table_name='tombstones')
+    op.drop_table('tombstones')
@@ -0,0 +1,80 @@
+"""row versions
+
+Revision ID: a8d4c2e1f790
+Revises: 7e2f0b6a9c13
+Create Date: 2026-10-18 11:27:09.503318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d4c2e1f790'
+down_revision: Union[str, None] = '7e2f0b6a9c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ['users', 'submissions', 'invites']
+
+
+def create_count_triggers(table: str, bump_version: bool) -> None:
+    version = ', version = version + 1' if bump_version else ''
+
+    op.execute(f"""
+        CREATE TRIGGER {table}_count_insert AFTER INSERT ON {table}
+        BEGIN
+            UPDATE table_counters SET row_count = row_count + 1{version}
+            WHERE table_name = '{table}';
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER {table}_count_delete AFTER DELETE ON {table}
+        BEGIN
+            UPDATE table_counters SET row_count = row_count - 1{version}
+            WHERE table_name = '{table}';
+        END
+    """)
+
+
+def upgrade() -> None:
+    op.add_column('table_counters', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+    for table in VERSIONED_TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute(f"UPDATE {table} SET updated_at = CURRENT_TIMESTAMP")
+
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_count_insert")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_count_delete")
+        create_count_triggers(table, bump_version=True)
+
+        # recursive_triggers is off, so the inner UPDATE does not refire this
+        op.execute(f"""
+            CREATE TRIGGER {table}_version_update AFTER UPDATE ON {table}
+            BEGIN
+                UPDATE {table}
+                SET version = OLD.version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE id = NEW.id;
+                UPDATE table_counters SET version = version + 1
+                WHERE table_name = '{table}';
+            END
+        """)
+
+
+def downgrade() -> None:
+    for table in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_version_update")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_count_insert")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_count_delete")
+
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('updated_at')
+            batch_op.drop_column('version')
+
+        create_count_triggers(table, bump_version=False)
+
+    with op.batch_alter_table('table_counters') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,62 @@
+"""submission search
+
+Revision ID: c51e7f3a0d84
+Revises: a8d4c2e1f790
+Create Date: 2026-10-18 13:40:22.871529
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c51e7f3a0d84'
+down_revision: Union[str, None] = 'a8d4c2e1f790'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # External content table, the text itself stays in submissions
+    op.execute("""
+        CREATE VIRTUAL TABLE submissions_fts USING fts5(
+            title,
+            description,
+            content='submissions',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER submissions_fts_insert AFTER INSERT ON submissions
+        BEGIN
+            INSERT INTO submissions_fts (rowid, title, description)
+            VALUES (NEW.id, NEW.title, NEW.description);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER submissions_fts_delete AFTER DELETE ON submissions
+        BEGIN
+            INSERT INTO submissions_fts (submissions_fts, rowid, title, description)
+            VALUES ('delete', OLD.id, OLD.title, OLD.description);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER submissions_fts_update AFTER UPDATE OF title, description ON submissions
+        BEGIN
+            INSERT INTO submissions_fts (submissions_fts, rowid, title, description)
+            VALUES ('delete', OLD.id, OLD.title, OLD.description);
+            INSERT INTO submissions_fts (rowid, title, description)
+            VALUES (NEW.id, NEW.title, NEW.description);
+        END
+    """)
+    op.execute("INSERT INTO submissions_fts (submissions_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS submissions_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS submissions_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS submissions_fts_insert")
+    op.execute("DROP TABLE IF EXISTS submissions_fts")
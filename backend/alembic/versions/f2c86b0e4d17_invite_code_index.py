@@ -0,0 +1,31 @@
+"""invite code index
+
+Revision ID: f2c86b0e4d17
+Revises: e3b7a9d15c62
+Create Date: 2026-10-18 17:21:09.513280
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c86b0e4d17'
+down_revision: Union[str, None] = 'e3b7a9d15c62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Codes were never unique, keep the oldest row of any duplicate
+    op.execute("""
+        DELETE FROM invites
+        WHERE id NOT IN (SELECT MIN(id) FROM invites GROUP BY code)
+    """)
+    op.create_index(op.f('ix_invites_code'), 'invites', ['code'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_invites_code'), table_name='invites')
@@ -1,9 +1,16 @@
 from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from .api import api
+from .change_feed import change_feed
 from .commands import commands
 from .database import db
+from .hashing import hasher
+from .metrics import metrics
 from .model_json_provider import ModelJsonProvider
+from .rate_limit import rate_limiter
+from .response_cache import response_cache
+from .user_cache import user_cache
 
 
 def create_app(config="backend.config.Config") -> Flask:
@@ -12,8 +19,18 @@ def create_app(config="backend.config.Config") -> Flask:
 
     app.json = ModelJsonProvider(app)
 
+    if trusted_proxies := app.config.get("TRUSTED_PROXIES"):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies)
+
     with app.app_context():
+        # First, so its after_request runs last and times the commit too
+        metrics.init_app(app)
         db.init_app(app)
+        user_cache.init_app(app)
+        hasher.init_app(app)
+        rate_limiter.init_app(app)
+        response_cache.init_app(app)
+        change_feed.init_app(app)
         app.register_blueprint(api)
         app.register_blueprint(commands)
 
@@ -1,8 +1,15 @@
-from flask import Blueprint, request
+from datetime import date, timedelta
+from functools import wraps
+from math import ceil
 
-from .context import clear_user, get_user, set_user
-from .id_model_view import IdModelView, api_response
+from flask import Blueprint, current_app, request
+
+from .assignment import assign_new, assign_new_async
+from .context import clear_user, get_user, get_user_async, set_user, set_user_async
+from .hashing import HasherSaturated, hasher
+from .id_model_view import Filter, IdModelView, api_response, parse_bool
 from .models import Invite, Submission, User
+from .rate_limit import RateLimited, rate_limiter
 
 api = Blueprint("api", __name__, url_prefix="/api")
 
@@ -13,6 +20,22 @@ DEFAULT_PER_PAGE = 20
 from backend.context import get_user
 
 
+@api.errorhandler(HasherSaturated)
+def hasher_saturated(e):
+    response = api_response(errors=["Too many requests, try again shortly"])
+    response.headers["Retry-After"] = "1"
+
+    return response, 429
+
+
+@api.errorhandler(RateLimited)
+def rate_limited(e: RateLimited):
+    response = api_response(errors=["Too many attempts, try again later"])
+    response.headers["Retry-After"] = str(ceil(e.retry_after))
+
+    return response, 429
+
+
 def authenticated(func):
     def wrapper(*args, **kwargs):
         if get_user() is None:
@@ -23,6 +46,46 @@ def authenticated(func):
     return wrapper
 
 
+def authenticated_async(func):
+    """`authenticated` for a view's `_async` classmethods."""
+
+    @wraps(func)
+    async def wrapper(cls, session, *args, **kwargs):
+        if await get_user_async(session) is None:
+            return api_response(errors=["Unauthenticated"]), 401
+
+        return await func(cls, session, *args, **kwargs)
+
+    return wrapper
+
+
+def admin_required(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if (user := get_user()) is None:
+            return api_response(errors=["Unauthenticated"]), 401
+
+        if not user.admin:
+            return api_response(errors=["Unauthorized"]), 403
+
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def parse_assignee(value: str) -> int | None:
+    if value == "none":
+        return None
+
+    if value == "me":
+        if (user := get_user()) is None:
+            raise ValueError(value)
+
+        return user.id
+
+    return int(value)
+
+
 class SubmissionView(IdModelView):
     model = Submission
     name = "submissions"
@@ -30,7 +93,33 @@ class SubmissionView(IdModelView):
     required_create_params = ["title"]
     optional_create_params = ["description"]
 
-    updatable_params = ["title", "description"]
+    updatable_params = ["title", "description", "reviewed", "resolved"]
+
+    searchable = True
+    exportable = True
+    batchable = True
+    change_feed = True
+    delta_sync = True
+    async_crud = True
+
+    filters = {
+        "reviewed": Filter("reviewed", parse_bool),
+        "resolved": Filter("resolved", parse_bool),
+        "assignee": Filter("assignee_id", parse_assignee),
+    }
+    sortable = ["id", "reviewed", "resolved", "assignee"]
+
+    @classmethod
+    def _post_create_hook(cls, new: Submission):
+        assign_new(new)
+
+        return []
+
+    @classmethod
+    async def _post_create_hook_async(cls, session, new: Submission):
+        await assign_new_async(session, new)
+
+        return []
 
     @classmethod
     @authenticated
@@ -52,6 +141,51 @@ class SubmissionView(IdModelView):
     def delete(cls, key):
         return super().delete(key)
 
+    @classmethod
+    @authenticated_async
+    async def list_async(cls, session):
+        return await super().list_async(session)
+
+    @classmethod
+    @authenticated_async
+    async def read_async(cls, session, key):
+        return await super().read_async(session, key)
+
+    @classmethod
+    @authenticated_async
+    async def update_async(cls, session, key):
+        return await super().update_async(session, key)
+
+    @classmethod
+    @authenticated_async
+    async def delete_async(cls, session, key):
+        return await super().delete_async(session, key)
+
+    @classmethod
+    @authenticated
+    def export(cls):
+        return super().export()
+
+    @classmethod
+    @authenticated
+    def changes(cls):
+        return super().changes()
+
+    @classmethod
+    @authenticated
+    def events(cls):
+        return super().events()
+
+    @classmethod
+    @authenticated
+    def create_batch(cls):
+        return super().create_batch()
+
+    @classmethod
+    @authenticated
+    def update_batch(cls):
+        return super().update_batch()
+
 
 SubmissionView.register_view(api)
 
@@ -67,9 +201,26 @@ class UserView(IdModelView):
     item_key = "<key>"
 
     @classmethod
-    def get_by_key(cls, key):
+    @rate_limiter.limit("register", ["username"])
+    def create(cls):
+        return super().create()
+
+    @classmethod
+    def get_by_key(cls, key, fields: "list[str] | None" = None):
         return cls.model.get_by_username(key)
 
+    @classmethod
+    def get_version_by_key(cls, key):
+        return cls.model.get_version_by_username(key)
+
+    @classmethod
+    def invalid_param(cls, key, value):
+        # Not a column, it is hashed as given
+        if key == "password" and not isinstance(value, str):
+            return "`password` must be a string"
+
+        return super().invalid_param(key, value)
+
     @classmethod
     def validate_creation_params(cls, **kwargs):
         errors = []
@@ -84,23 +235,26 @@ class UserView(IdModelView):
 
     @classmethod
     def _pre_create_hook(cls):
-        invite_params, errors = cls.filtered_params(["invite"], True)
+        params, errors = cls.filtered_params(["invite"], True)
 
         if errors:
             return list(errors)
 
-        if (invite := Invite.get_active_invite(invite_params["invite"])) is None:
+        # Before the password is hashed, so bad codes cost one lookup
+        if not Invite.is_active(params["invite"]):
             return ["Invalid invite"]
 
     @classmethod
     def _post_create_hook(cls, new: User):
-        invite_params = cls.filtered_params(["invite"], True)
-
-        invite = Invite.get_active_invite(invite_params["invite"])
-
-        invite.used = True
+        # Commits or rolls back together with the new user, and catches a
+        # code claimed since the check in `_pre_create_hook`
+        if not Invite.claim(request.json["invite"]):
+            return ["Invalid invite"]
 
-        invite.save()
+    @classmethod
+    def _post_update_hook(cls, item: User):
+        # Keep the session that changed the password valid
+        set_user(item)
 
     @classmethod
     def current_key_is_user(cls, key):
@@ -126,7 +280,34 @@ class UserView(IdModelView):
 UserView.register_view(api)
 
 
+@api.route("/invites", methods=["POST"])
+@admin_required
+def create_invites():
+    data = request.json
+
+    if not isinstance(data, dict):
+        return api_response(errors=["root level should be object"])
+
+    count = data.get("count", 1)
+    days = data.get("days", current_app.config["INVITE_EXPIRATION_DAYS"])
+    max_count = current_app.config["INVITE_BATCH_MAX_SIZE"]
+
+    if type(count) is not int or not 1 <= count <= max_count:
+        return api_response(errors=[f"`count` must be between 1 and {max_count}"]), 400
+
+    if type(days) is not int or days < 1:
+        return api_response(errors=["`days` must be a positive integer"]), 400
+
+    # Cleaning up here keeps the table small without a separate job
+    Invite.purge()
+
+    codes = Invite.create_many(count, date.today() + timedelta(days=days))
+
+    return api_response(items=codes), 201
+
+
 @api.route("/session", methods=["POST"])
+@rate_limiter.limit("login", ["username"])
 def login():
     data = request.json
 
@@ -144,11 +325,44 @@ def login():
     ):
         return api_response(errors=["Username or password incorrect"])
 
+    user.upgrade_password_hash(password)
+
     set_user(user)
 
     return api_response(item=user)
 
 
+@rate_limiter.limit("login", ["username"])
+async def login_async(session):
+    """`login` for the ASGI app, hashing off the event loop."""
+    data = request.json
+
+    if not isinstance(data, dict):
+        return api_response(errors=["root level should be object"])
+
+    if (username := data.get("username")) is None:
+        return api_response(errors=["Username is required"])
+
+    if (password := data.get("password")) is None:
+        return api_response(errors=["Password is required"])
+
+    if (
+        user := await User.get_by_username_async(session, username)
+    ) is None or not await hasher.verify_async(password, user.password_hash):
+        return api_response(errors=["Username or password incorrect"])
+
+    if hasher.needs_rehash(user.password_hash):
+        user.password_hash = await hasher.hash_async(password)
+        await session.flush()
+
+    await set_user_async(session, user)
+
+    return api_response(item=user)
+
+
+login.async_methods = {"POST": login_async}
+
+
 @api.route("/session", methods=["GET"])
 def me():
     return api_response(item=get_user())
@@ -0,0 +1,207 @@
+"""ASGI app that serves the async views on an event loop and everything else
+on the Flask app.
+
+    gunicorn 'backend.asgi:create_app()' --worker-class asgi
+
+or GUNICORN_WORKER_CLASS=asgi with gunicorn.conf.py. A view function with
+`async_methods` (see `IdModelView.async_crud` and `login`) has those
+methods run as coroutines on an `AsyncSession`, one transaction per request
+committed unless the response is an error, the way request transactions
+work on the sync path. Password hashes are awaited on the hash pool.
+
+Other routes, and requests an async view hands back by returning None, run
+on the WSGI app in a2wsgi's thread pool. The async path skips the
+`before_request`/`after_request` hooks, so it has no metrics or query
+budget.
+
+Needs a2wsgi, aiosqlite and greenlet installed on top of the WSGI app's
+dependencies.
+"""
+
+import sys
+from io import BytesIO
+
+from a2wsgi import WSGIMiddleware
+from flask import Flask, Response
+from flask.globals import request_ctx
+from werkzeug.exceptions import HTTPException
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from . import create_app as create_wsgi_app
+from .database import db
+
+ASGI_WSGI_THREADS_KEY = "ASGI_WSGI_THREADS"
+
+
+async def read_body(receive) -> bytes:
+    chunks = []
+
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+
+        if message["type"] != "http.request" or not message.get("more_body"):
+            return b"".join(chunks)
+
+
+def replay(body: bytes, receive):
+    """`receive` for a request whose body was already read."""
+    sent = False
+
+    async def replayed():
+        nonlocal sent
+
+        if sent:
+            return await receive()
+
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return replayed
+
+
+class AsgiApp:
+    def __init__(self, app: Flask) -> None:
+        self.app = app
+        self.wsgi = WSGIMiddleware(
+            app, workers=app.config.get(ASGI_WSGI_THREADS_KEY, 4)
+        )
+        self.proxy_fix = None
+
+        # Rewrites the environs built here like it does in front of
+        # `wsgi_app`, its own app only hands them back
+        if trusted_proxies := app.config.get("TRUSTED_PROXIES"):
+            self.proxy_fix = ProxyFix(lambda environ, _: environ, x_for=trusted_proxies)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+
+        if scope["type"] != "http" or (match := self.async_view(scope)) is None:
+            return await self.wsgi(scope, receive, send)
+
+        view, args = match
+        body = await read_body(receive)
+        environ = self.environ(scope, body)
+
+        with self.app.request_context(environ):
+            if (response := await self.dispatch(view, args)) is not None:
+                headers = response.get_wsgi_headers(environ)
+                content = response.get_data()
+
+        if response is None:
+            return await self.wsgi(scope, replay(body, receive), send)
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in headers.items()
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": content})
+
+    def async_view(self, scope) -> tuple | None:
+        """The async view for the request and its URL values, if it has one."""
+        adapter = self.app.url_map.bind("localhost")
+
+        try:
+            endpoint, args = adapter.match(scope["path"], scope["method"])
+        except HTTPException:
+            return None
+
+        view = self.app.view_functions.get(endpoint)
+
+        if (method := getattr(view, "async_methods", {}).get(scope["method"])) is None:
+            return None
+
+        return method, args
+
+    async def dispatch(self, view, args: dict) -> Response | None:
+        """Runs `view` in the request's context, None when it declines."""
+        try:
+            async with db.async_session() as session:
+                if (rv := await view(session, **args)) is None:
+                    return None
+
+                response = self.app.make_response(rv)
+
+                # Closing the session rolls back otherwise
+                if response.status_code < 400:
+                    await session.commit()
+        except Exception as e:
+            try:
+                response = self.app.make_response(self.app.handle_user_exception(e))
+            except Exception as e:
+                response = self.app.make_response(self.app.handle_exception(e))
+
+        interface = self.app.session_interface
+
+        if not interface.is_null_session(request_ctx.session):
+            interface.save_session(self.app, request_ctx.session, response)
+
+        return response
+
+    def environ(self, scope, body: bytes) -> dict:
+        server_name, server_port = scope.get("server") or ("localhost", 80)
+        remote_addr = (scope.get("client") or ("", 0))[0]
+
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+            "PATH_INFO": scope["path"].encode().decode("latin-1"),
+            "QUERY_STRING": scope["query_string"].decode("latin-1"),
+            "SERVER_NAME": server_name,
+            "SERVER_PORT": str(server_port),
+            "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+            "REMOTE_ADDR": remote_addr,
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": True,
+            "wsgi.run_once": False,
+        }
+
+        for name, value in scope["headers"]:
+            key = name.decode("latin-1").upper().replace("-", "_")
+            value = value.decode("latin-1")
+
+            if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                key = f"HTTP_{key}"
+
+            # Repeated headers are joined, as a WSGI server would
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+
+        # The body is already read, chunked or not
+        environ["CONTENT_LENGTH"] = str(len(body))
+
+        if self.proxy_fix is not None:
+            self.proxy_fix(environ, None)
+
+        return environ
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                for engine in (db.async_engine, db.async_read_engine):
+                    if engine is not None:
+                        await engine.dispose()
+
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def create_app(config="backend.config.Config") -> AsgiApp:
+    app = create_wsgi_app(config)
+    db.init_async(app)
+
+    return AsgiApp(app)
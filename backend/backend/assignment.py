@@ -0,0 +1,152 @@
+"""Hands unassigned submissions to admins.
+
+Schedulers start from the open assignment counters in `ReviewerLoad`, which
+triggers keep current, and track what they hand out in memory, so a pass
+over any backlog reads the counters once instead of counting assignments
+per reviewer for every submission.
+"""
+
+from heapq import heapify, heapreplace
+from typing import TYPE_CHECKING, Iterator
+
+from flask import current_app
+from sqlalchemy import bindparam, select, update
+
+from .database import db
+from .models import ReviewerLoad, Submission
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+ASSIGNMENT_STRATEGY_KEY = "ASSIGNMENT_STRATEGY"
+ASSIGNMENT_BATCH_SIZE_KEY = "ASSIGNMENT_BATCH_SIZE"
+AUTO_ASSIGN_ON_CREATE_KEY = "AUTO_ASSIGN_ON_CREATE"
+
+# Skips rows assigned by someone else since the batch was read
+ASSIGN = (
+    update(Submission.__table__)
+    .where(
+        Submission.__table__.c.id == bindparam("b_id"),
+        Submission.__table__.c.assignee_id.is_(None),
+    )
+    .values(assignee_id=bindparam("b_assignee_id"))
+)
+
+
+class LeastLoaded:
+    """Least outstanding work: each submission goes to the reviewer with the
+    fewest open assignments per unit of weight once they have it.
+
+    A heap keyed on that load, so picking and updating is O(log reviewers).
+    Ties go to the lowest user id.
+    """
+
+    def __init__(self, reviewers: list[tuple[int, int, int]]):
+        self.heap = [
+            ((open_ + 1) / weight, user_id, open_, weight)
+            for user_id, open_, weight in reviewers
+        ]
+        heapify(self.heap)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> int:
+        _, user_id, open_, weight = self.heap[0]
+        open_ += 1
+        heapreplace(self.heap, ((open_ + 1) / weight, user_id, open_, weight))
+
+        return user_id
+
+
+class WeightedRoundRobin:
+    """Smooth weighted round-robin, as in nginx: of every `sum(weights)`
+    submissions each reviewer gets `weight`, interleaved, whatever work they
+    already have open.
+    """
+
+    def __init__(self, reviewers: list[tuple[int, int, int]]):
+        self.weights = {user_id: weight for user_id, _, weight in reviewers}
+        self.current = dict.fromkeys(self.weights, 0)
+        self.total = sum(self.weights.values())
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> int:
+        for user_id, weight in self.weights.items():
+            self.current[user_id] += weight
+
+        user_id = max(self.current, key=self.current.__getitem__)
+        self.current[user_id] -= self.total
+
+        return user_id
+
+
+STRATEGIES = {"least-loaded": LeastLoaded, "round-robin": WeightedRoundRobin}
+
+
+def assign_backlog(
+    strategy: str | None = None, batch_size: int | None = None
+) -> Iterator[int]:
+    """Assigns unresolved, unassigned submissions oldest first, one
+    executemany and commit per batch.
+
+    Yields the number assigned in each batch. Does nothing without admins
+    taking work.
+    """
+    strategy = strategy or current_app.config[ASSIGNMENT_STRATEGY_KEY]
+    batch_size = batch_size or current_app.config[ASSIGNMENT_BATCH_SIZE_KEY]
+
+    if not (reviewers := ReviewerLoad.reviewers()):
+        return
+
+    scheduler = STRATEGIES[strategy](reviewers)
+    after = 0
+
+    while True:
+        ids = db.session.scalars(
+            select(Submission.id)
+            .where(Submission.assignee_id.is_(None))
+            .where(Submission.resolved == False)
+            .where(Submission.id > after)
+            .order_by(Submission.id)
+            .limit(batch_size)
+        ).all()
+
+        if not ids:
+            return
+
+        result = db.session.execute(
+            ASSIGN,
+            [
+                {"b_id": oid, "b_assignee_id": user_id}
+                for oid, user_id in zip(ids, scheduler)
+            ],
+        )
+        db.commit()
+
+        after = ids[-1]
+
+        yield result.rowcount
+
+
+def assign_new(submission: Submission):
+    """Assigns a submission being created, if AUTO_ASSIGN_ON_CREATE is set.
+
+    Always least loaded, round-robin needs state that outlives the request.
+    """
+    if not current_app.config[AUTO_ASSIGN_ON_CREATE_KEY]:
+        return
+
+    if reviewers := ReviewerLoad.reviewers():
+        submission.assignee_id = next(LeastLoaded(reviewers))
+
+
+async def assign_new_async(session: "AsyncSession", submission: Submission):
+    """`assign_new` for the ASGI app, reading the loads through `session`."""
+    if not current_app.config[AUTO_ASSIGN_ON_CREATE_KEY]:
+        return
+
+    if reviewers := await ReviewerLoad.reviewers_async(session):
+        submission.assignee_id = next(LeastLoaded(reviewers))
@@ -0,0 +1,238 @@
+"""Streaming bulk import and export of submissions.
+
+Files are JSON lines or CSV with one submission per row, in the columns of
+`COLUMNS`. `assignee` is a username. Exports can be imported as they are.
+"""
+
+import json
+import os
+from contextlib import contextmanager
+from csv import DictReader, DictWriter
+from itertools import islice
+from typing import IO, Iterable, Iterator, Literal
+
+from sqlalchemy import func, insert, literal_column, select, text, update
+from sqlalchemy import table as table_
+
+from .database import db
+from .model_json_provider import orjson
+from .models import Change, ReviewerLoad, Submission, TableCounter, User
+
+FileFormat = Literal["jsonl", "csv"]
+
+COLUMNS = ["title", "description", "reviewed", "resolved", "assignee"]
+
+INSERT_COLUMNS = ["title", "description", "reviewed", "resolved", "assignee_id"]
+
+loads = orjson.loads if orjson is not None else json.loads
+
+
+class ImportRowError(ValueError):
+    def __init__(self, line: int, message: str):
+        super().__init__(f"row {line}: {message}")
+
+
+def file_format(path: str) -> FileFormat:
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+
+    if value is None or str(value).lower() in ("", "0", "false"):
+        return False
+
+    if str(value).lower() in ("1", "true"):
+        return True
+
+    raise ValueError(f"`{value}` is not a boolean")
+
+
+def read_rows(file: IO[str], format: FileFormat) -> Iterator[dict]:
+    if format == "csv":
+        return iter(DictReader(file))
+
+    return (loads(line) for line in file if line.strip())
+
+
+def write_rows(file: IO[str], format: FileFormat, rows: Iterable[dict]):
+    if format == "csv":
+        writer = DictWriter(file, COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        for row in rows:
+            file.write(json.dumps(row))
+            file.write("\n")
+
+
+class Checkpoint:
+    """Input rows already committed, kept next to the file being imported.
+
+    Also holds the schema SQL dropped by `deferred_schema`, so a resumed
+    import can put it back after a crash.
+    """
+
+    def __init__(self, path: str | None):
+        self.path = path
+        self.rows = 0
+        self.schema: list[str] = []
+
+        if path is not None and os.path.exists(path):
+            with open(path) as file:
+                state = json.load(file)
+
+            self.rows = state["rows"]
+            self.schema = state["schema"]
+
+    def save(self):
+        if self.path is None:
+            return
+
+        with open(f"{self.path}.tmp", "w") as file:
+            json.dump({"rows": self.rows, "schema": self.schema}, file)
+
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def remove(self):
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+@contextmanager
+def deferred_schema(table: str, checkpoint: Checkpoint):
+    """Drops the triggers and secondary indexes on `table` for the duration.
+
+    Afterwards they are recreated, the FTS index is rebuilt, the table's
+    counter and the reviewer loads recounted, the counter bumped and a
+    `reset` change logged. Writes from a running app in the meantime would
+    skip the triggers, so only use it while the app is stopped.
+
+    If the load fails they stay dropped until the import is resumed.
+    """
+    # Automatic indexes (unique constraints) have no SQL and stay
+    stmt = text(
+        "SELECT name, type, sql FROM sqlite_master WHERE tbl_name = :table "
+        "AND type IN ('index', 'trigger') AND sql IS NOT NULL"
+    )
+    schema = db.session.execute(stmt, {"table": table}).all()
+
+    # A resumed import already dropped some of it, keep the original list
+    if not checkpoint.schema:
+        checkpoint.schema = [sql for _, _, sql in schema]
+        checkpoint.save()
+
+    for name, kind, _ in schema:
+        db.session.execute(text(f'DROP {kind.upper()} IF EXISTS "{name}"'))
+
+    db.session.commit()
+
+    yield
+
+    for sql in checkpoint.schema:
+        db.session.execute(text(sql))
+
+    # The change triggers missed every row, tell event streams to reload
+    reset = Change(table_name=table, action="reset")
+    db.session.add(reset)
+    db.session.flush()
+
+    if table == Submission.__tablename__:
+        db.session.execute(
+            text("INSERT INTO submissions_fts (submissions_fts) VALUES ('rebuild')")
+        )
+        # Delta sync clients pick the new rows up at the reset
+        db.session.execute(
+            update(Submission)
+            .where(Submission.change_seq.is_(None))
+            .values(change_seq=reset.id)
+            .execution_options(synchronize_session=False)
+        )
+        ReviewerLoad.recount()
+
+    db.session.execute(
+        update(TableCounter)
+        .where(TableCounter.table_name == table)
+        .values(
+            row_count=select(func.count()).select_from(table_(table)).scalar_subquery(),
+            version=TableCounter.version + 1,
+        )
+    )
+    db.session.commit()
+
+    checkpoint.schema = []
+    checkpoint.save()
+
+
+def import_submissions(
+    rows: Iterator[dict], checkpoint: Checkpoint, chunk_size: int
+) -> Iterator[int]:
+    """Inserts `rows` in chunks of `chunk_size`, one executemany and commit
+    each, skipping the rows `checkpoint` says are already in.
+
+    Yields the number of rows imported so far after every chunk.
+    """
+    assignees = dict(db.session.execute(select(User.username, User.id)).all())
+
+    # Compiled once and run with plain tuples, SQLAlchemy's per row parameter
+    # processing costs more than the insert itself
+    stmt = insert(Submission.__table__).values(
+        version=literal_column("1"), updated_at=func.now()
+    )
+    compiled = stmt.compile(db.engine, column_keys=INSERT_COLUMNS)
+    order = [INSERT_COLUMNS.index(name) for name in compiled.positiontup]
+
+    line = checkpoint.rows
+    rows = islice(rows, checkpoint.rows, None)
+
+    while chunk := list(islice(rows, chunk_size)):
+        values = []
+
+        for row in chunk:
+            line += 1
+
+            if not row.get("title"):
+                raise ImportRowError(line, "`title` is required")
+
+            if (assignee := row.get("assignee")) and assignee not in assignees:
+                raise ImportRowError(line, f"unknown assignee `{assignee}`")
+
+            try:
+                value = (
+                    row["title"],
+                    row.get("description") or None,
+                    parse_bool(row.get("reviewed")),
+                    parse_bool(row.get("resolved")),
+                    assignees.get(assignee),
+                )
+            except ValueError as e:
+                raise ImportRowError(line, str(e))
+
+            values.append(tuple(value[i] for i in order))
+
+        db.session.connection().exec_driver_sql(compiled.string, values)
+        db.session.commit()
+
+        # A crash right here repeats this chunk on resume
+        checkpoint.rows = line
+        checkpoint.save()
+
+        yield line
+
+
+def export_submissions(batch_size: int) -> Iterator[dict]:
+    stmt = (
+        select(
+            Submission.title,
+            Submission.description,
+            Submission.reviewed,
+            Submission.resolved,
+            User.username.label("assignee"),
+        )
+        .outerjoin(User, Submission.assignee_id == User.id)
+        .order_by(Submission.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    return (row._asdict() for row in db.session.execute(stmt))
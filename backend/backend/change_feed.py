@@ -0,0 +1,139 @@
+from random import randint
+from threading import BoundedSemaphore
+from time import monotonic, sleep
+from typing import Iterator
+
+from flask import Flask, Response, current_app, stream_with_context
+
+from .database import db
+from .models import Change, IdModel
+
+CHANGE_FEED_STREAMS_KEY = "CHANGE_FEED_STREAMS"
+CHANGE_FEED_STREAM_SECONDS_KEY = "CHANGE_FEED_STREAM_SECONDS"
+CHANGE_FEED_POLL_INTERVAL_KEY = "CHANGE_FEED_POLL_INTERVAL"
+
+# Changes read per poll
+BATCH_SIZE = 100
+
+# Seconds between comments on an idle stream, so proxies don't drop it
+KEEPALIVE_INTERVAL = 15
+
+# Milliseconds browsers wait before reconnecting once a stream ends
+RETRY_MS = 1000
+
+# Range browsers turned away for lack of a stream slot wait, spread out so
+# they don't all come back at once
+BUSY_RETRY_MS = (5000, 15000)
+
+
+def event(change: Change, items: dict[int, IdModel], dumps) -> str:
+    data = {"id": change.row_id}
+
+    if change.action in ("create", "update"):
+        # None when the row was deleted since, its delete event follows
+        data["item"] = items.get(change.row_id)
+
+    return f"id: {change.id}\nevent: {change.action}\ndata: {dumps(data)}\n\n"
+
+
+class ChangeFeed:
+    """Server-Sent Events of a model's changes, read from the `changes` log.
+
+    The log is written by triggers in the same database every worker uses,
+    so each stream sees changes made by any worker. Streams poll it and end
+    after `stream_seconds`, browsers reconnect by themselves and resume
+    from `Last-Event-ID`. Each open stream holds a worker thread, so a
+    worker serves at most `streams` of them. Past that a client gets a
+    `busy` event and a longer `retry:` instead, EventSource gives up for good
+    on any error status.
+    """
+
+    def __init__(self, app: Flask | None = None) -> None:
+        self.streams = 0
+        self.stream_seconds = 55.0
+        self.poll_interval = 1.0
+
+        self._slots = BoundedSemaphore(1)
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        self.streams = app.config.get(CHANGE_FEED_STREAMS_KEY, 2)
+        self.stream_seconds = app.config.get(CHANGE_FEED_STREAM_SECONDS_KEY, 55.0)
+        self.poll_interval = app.config.get(CHANGE_FEED_POLL_INTERVAL_KEY, 1.0)
+
+        self._slots = BoundedSemaphore(max(1, self.streams))
+
+    def stream(self, model: type[IdModel], last_id: int | None) -> Response:
+        """Streams changes to `model` after `last_id`, or from now on.
+
+        Without a free stream slot the response only tells the browser to
+        come back later, keeping its `Last-Event-ID`.
+        """
+        if self.streams > 0 and self._slots.acquire(blocking=False):
+            response = current_app.response_class(
+                stream_with_context(self._events(model, last_id)),
+                mimetype="text/event-stream",
+            )
+            response.call_on_close(self._slots.release)
+        else:
+            response = current_app.response_class(
+                f"retry: {randint(*BUSY_RETRY_MS)}\nevent: busy\ndata: {{}}\n\n",
+                mimetype="text/event-stream",
+            )
+
+        response.cache_control.no_cache = True
+        response.headers["X-Accel-Buffering"] = "no"
+
+        return response
+
+    def _events(self, model: type[IdModel], last_id: int | None) -> Iterator[str]:
+        table = model.__tablename__
+        dumps = current_app.json.dumps
+
+        yield f"retry: {RETRY_MS}\n\n"
+
+        if last_id is None:
+            last_id = Change.last_id()
+        elif last_id + 1 < (Change.first_id() or Change.last_id() + 1):
+            # Changes the client missed were purged, it has to reload
+            last_id = Change.last_id()
+            yield f"id: {last_id}\nevent: reset\ndata: {{}}\n\n"
+
+        deadline = monotonic() + self.stream_seconds
+        written = monotonic()
+
+        while monotonic() < deadline:
+            changes = Change.since(table, last_id, BATCH_SIZE)
+            ids = [c.row_id for c in changes if c.action in ("create", "update")]
+            items = {}
+
+            if ids:
+                stmt = model.select().where(model.id.in_(ids))
+                items = {item.id: item for item in model.fetch_all(stmt)}
+
+            # Serialized before the rollback, which expires every loaded row
+            events = "".join(event(change, items, dumps) for change in changes)
+
+            if changes:
+                last_id = changes[-1].id
+
+            # Ends the read snapshot, or the next poll would not see new commits
+            db.session.rollback()
+
+            if events:
+                yield events
+
+                written = monotonic()
+
+                if len(changes) == BATCH_SIZE:
+                    continue
+            elif monotonic() - written >= KEEPALIVE_INTERVAL:
+                yield ": keepalive\n\n"
+                written = monotonic()
+
+            sleep(self.poll_interval)
+
+
+change_feed = ChangeFeed()
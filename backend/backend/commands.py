@@ -1,9 +1,36 @@
-from datetime import date
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta, timezone
+from random import Random
+from time import perf_counter
 
 import click
-from flask import Blueprint
+from flask import Blueprint, current_app
+from sqlalchemy import insert, update
 
-from .models import Invite, User
+from .assignment import STRATEGIES, assign_backlog
+from .bulk import (
+    Checkpoint,
+    ImportRowError,
+    deferred_schema,
+    export_submissions,
+    file_format,
+    import_submissions,
+    read_rows,
+    write_rows,
+)
+from .database import db
+from .hashing import hasher
+from .id_model_view import IdModelView
+from .models import (
+    Change,
+    IdModel,
+    Invite,
+    ReviewerLoad,
+    Submission,
+    TableCounter,
+    User,
+)
+from .response_cache import response_cache
 
 commands = Blueprint("commands", __name__, cli_group=None)
 
@@ -30,3 +57,226 @@ def make_invite():
     invite = Invite(date(3006, 1, 1)).save()
 
     click.echo(invite.code)
+
+
+@commands.cli.command("make-invites")
+@click.argument("count", type=click.IntRange(1))
+@click.option(
+    "--days",
+    type=click.IntRange(1),
+    help="Days until they expire, defaults to INVITE_EXPIRATION_DAYS",
+)
+def make_invites(count, days):
+    """Create COUNT invites in one transaction and print their codes."""
+    days = days or current_app.config["INVITE_EXPIRATION_DAYS"]
+
+    Invite.purge()
+
+    for code in Invite.create_many(count, date.today() + timedelta(days=days)):
+        click.echo(code)
+
+
+@commands.cli.command("purge-invites")
+def purge_invites():
+    """Delete used and expired invites, meant to run from cron."""
+    click.echo(f"Deleted {Invite.purge()} invites")
+
+
+@commands.cli.command("purge-changes")
+@click.option(
+    "--days",
+    type=click.IntRange(0),
+    help="Changes to keep, CHANGE_LOG_RETENTION_DAYS by default.",
+)
+def purge_changes(days):
+    """Delete old change log entries, meant to run from cron.
+
+    Event streams resuming from before the cutoff are told to reload.
+    """
+    if days is None:
+        days = current_app.config["CHANGE_LOG_RETENTION_DAYS"]
+
+    before = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+    click.echo(f"Deleted {Change.purge(before)} changes")
+
+
+@commands.cli.command("recount")
+def recount():
+    """Resynchronise table_counters with the real row counts."""
+    for model in IdModel.__subclasses__():
+        count = model.count()
+
+        db.session.execute(
+            update(TableCounter)
+            .where(TableCounter.table_name == model.__tablename__)
+            .values(row_count=count)
+        )
+
+        click.echo(f"{model.__tablename__}: {count}")
+
+    open_assignments = ReviewerLoad.recount()
+    click.echo(f"{ReviewerLoad.__tablename__}: {sum(open_assignments.values())}")
+
+    db.session.commit()
+
+
+@commands.cli.command("assign-submissions")
+@click.option(
+    "--strategy",
+    type=click.Choice(list(STRATEGIES)),
+    help="ASSIGNMENT_STRATEGY by default",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(1),
+    help="ASSIGNMENT_BATCH_SIZE by default",
+)
+def assign_submissions(strategy, batch_size):
+    """Assign unresolved, unassigned submissions to admins, meant to run
+    from cron."""
+    start = perf_counter()
+    assigned = sum(assign_backlog(strategy, batch_size))
+
+    click.echo(f"Assigned {assigned} submissions in {perf_counter() - start:.1f}s")
+
+
+@commands.cli.command("reviewer-weight")
+@click.argument("username")
+@click.argument("weight", type=click.IntRange(0))
+def reviewer_weight(username, weight):
+    """Set an admin's share of new assignments, 0 stops them."""
+    if (user := User.get_by_username(username)) is None:
+        raise click.ClickException(f"No user {username}")
+
+    ReviewerLoad.set_weight(user.id, weight)
+
+
+@commands.cli.command("import-submissions")
+@click.argument("file", type=click.File("r"))
+@click.option("--format", "format_", type=click.Choice(["jsonl", "csv"]))
+@click.option("--chunk-size", default=10000, show_default=True)
+@click.option(
+    "--checkpoint",
+    help="Progress file to resume from, defaults to FILE.checkpoint",
+)
+@click.option(
+    "--defer-indexes",
+    is_flag=True,
+    help="Drop the submission triggers and indexes during the load and "
+    "rebuild them after. Only while the app is stopped.",
+)
+def import_submissions_command(file, format_, chunk_size, checkpoint, defer_indexes):
+    """Import submissions from a JSON lines or CSV file, or - for stdin."""
+    if checkpoint is None and file.name != "<stdin>":
+        checkpoint = f"{file.name}.checkpoint"
+
+    progress = Checkpoint(checkpoint)
+
+    if progress.rows:
+        click.echo(f"Resuming after row {progress.rows}", err=True)
+
+    # A resumed deferred import still has to put the schema back
+    if defer_indexes or progress.schema:
+        schema = deferred_schema(Submission.__tablename__, progress)
+    else:
+        schema = nullcontext()
+
+    rows = read_rows(file, format_ or file_format(file.name))
+    start = perf_counter()
+    skipped = progress.rows
+
+    try:
+        with schema:
+            for imported in import_submissions(rows, progress, chunk_size):
+                rate = (imported - skipped) / (perf_counter() - start)
+                click.echo(f"{imported} rows, {rate:.0f} rows/s", err=True)
+    except ImportRowError as e:
+        db.session.rollback()
+        raise click.ClickException(f"{e}, resume once it is fixed")
+
+    click.echo(f"Done in {perf_counter() - start:.1f}s", err=True)
+
+    progress.remove()
+
+
+@commands.cli.command("export-submissions")
+@click.argument("file", type=click.File("w"))
+@click.option("--format", "format_", type=click.Choice(["jsonl", "csv"]))
+@click.option("--batch-size", default=10000, show_default=True)
+def export_submissions_command(file, format_, batch_size):
+    """Export every submission to a JSON lines or CSV file, or - for stdout."""
+    write_rows(file, format_ or file_format(file.name), export_submissions(batch_size))
+
+
+@commands.cli.command("seed")
+@click.option("--users", default=100, show_default=True, type=click.IntRange(1))
+@click.option("--submissions", default=100000, show_default=True)
+@click.option("--password", default="benchmark", show_default=True)
+@click.option("--seed", "seed_", default=0, show_default=True)
+def seed(users, submissions, password, seed_):
+    """Fill an empty database with generated users and submissions.
+
+    Users are user0, user1, ... sharing `password` (hashed once), user0 is an
+    admin. Meant for benchmarks and local testing.
+    """
+    rng = Random(seed_)
+    password_hash = hasher.hash(password)
+    start = perf_counter()
+
+    db.session.execute(
+        insert(User),
+        [
+            {
+                "username": f"user{i}",
+                "password_hash": password_hash,
+                "admin": i == 0,
+            }
+            for i in range(users)
+        ],
+    )
+    db.session.commit()
+
+    words = ["dice", "meeple", "card", "token", "board", "box", "rules", "timer"]
+    rows = (
+        {
+            "title": f"{rng.choice(words).title()} {rng.choice(words)} {i}",
+            "description": " ".join(rng.choices(words, k=20)),
+            "reviewed": rng.random() < 0.5,
+            "resolved": rng.random() < 0.2,
+            "assignee": f"user{rng.randrange(users)}" if rng.random() < 0.5 else None,
+        }
+        for i in range(submissions)
+    )
+    progress = Checkpoint(None)
+
+    with deferred_schema(Submission.__tablename__, progress):
+        for _ in import_submissions(rows, progress, 20000):
+            pass
+
+    click.echo(
+        f"Seeded {users} users and {submissions} submissions "
+        f"in {perf_counter() - start:.1f}s"
+    )
+
+
+@commands.cli.command("cache-stats")
+def cache_stats():
+    """Show response cache hits, misses and entries across all workers."""
+    for name, value in sorted(response_cache.stats().items()):
+        click.echo(f"{name}: {value}")
+
+
+@commands.cli.command("check-query-plans")
+def check_query_plans():
+    """Fail if a filtered list query scans its table or sorts in memory."""
+    failures = 0
+
+    for view in IdModelView.__subclasses__():
+        for shape, plan, bad in view.query_plans():
+            if bad:
+                failures += 1
+
+            click.echo(f"{'FAIL' if bad else 'ok'}  {shape}: {'; '.join(plan)}")
+
+    if failures:
+        raise click.ClickException(f"{failures} query shapes do not use an index")
@@ -27,5 +27,118 @@ if not os.environ.get("SECRET_KEY"):
 
 class Config(object):
     SECRET_KEY = os.environ.get("SECRET_KEY", key)
-    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URI", "sqlite:////config/database.db")
+    SQLALCHEMY_DATABASE_URI = os.environ.get(
+        "DATABASE_URI", "sqlite:////config/database.db"
+    )
+    # "sqlite-wal" for WAL, tuned pragmas and a read-only pool for GETs,
+    # "default" for plain create_engine. Non-SQLite URIs always use default
+    DATABASE_ENGINE_PROFILE = os.environ.get("DATABASE_ENGINE_PROFILE", "sqlite-wal")
+    # Connections per app worker, writer and read-only pools
+    DATABASE_POOL_SIZE = int(os.environ.get("DATABASE_POOL_SIZE", 2))
+    DATABASE_READ_POOL_SIZE = int(os.environ.get("DATABASE_READ_POOL_SIZE", 4))
+    DATABASE_POOL_OVERFLOW = int(os.environ.get("DATABASE_POOL_OVERFLOW", 4))
+    DATABASE_POOL_TIMEOUT = float(os.environ.get("DATABASE_POOL_TIMEOUT", 10))
+    # Commit once per request instead of on every save
+    DATABASE_REQUEST_TRANSACTIONS = (
+        os.environ.get("DATABASE_REQUEST_TRANSACTIONS", "1") == "1"
+    )
+    # Milliseconds a connection waits on a lock before "database is locked"
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000))
+    SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+    # Negative values are KiB, per connection
+    SQLITE_CACHE_SIZE = int(os.environ.get("SQLITE_CACHE_SIZE", -32 * 1024))
+    # Items accepted by one `/<name>/batch` request
+    BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", 500))
+    INVITE_EXPIRATION_DAYS = int(os.environ.get("INVITE_EXPIRATION_DAYS", 30))
+    # Invites one `make-invites` or `POST /api/invites` call may create
+    INVITE_BATCH_MAX_SIZE = int(os.environ.get("INVITE_BATCH_MAX_SIZE", 10000))
     IMAGE_STORAGE_DIRECTORY = os.environ.get("IMAGE_STORAGE_DIRECTORY", "/tmp")
+    # Maximum queries per request, unset outside of tests
+    QUERY_BUDGET = (
+        int(os.environ["QUERY_BUDGET"]) if os.environ.get("QUERY_BUDGET") else None
+    )
+    # Report each request's query count in an X-Query-Count header
+    QUERY_COUNT_HEADER = os.environ.get("QUERY_COUNT_HEADER", "0") == "1"
+    # Serving profile, read by gunicorn.conf.py
+    GUNICORN_WORKERS = int(os.environ.get("GUNICORN_WORKERS", 4))
+    # "gthread" or "sync", "gevent" also needs gevent installed. "asgi"
+    # serves backend.asgi instead, see there for what it needs installed
+    GUNICORN_WORKER_CLASS = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+    # Threads per worker for gthread
+    GUNICORN_THREADS = int(os.environ.get("GUNICORN_THREADS", 4))
+    # Concurrent connections, each a greenlet or a task, per gevent or
+    # asgi worker
+    GUNICORN_WORKER_CONNECTIONS = int(
+        os.environ.get("GUNICORN_WORKER_CONNECTIONS", 1000)
+    )
+    # Threads per asgi worker for the routes without an async view
+    ASGI_WSGI_THREADS = int(os.environ.get("ASGI_WSGI_THREADS", 4))
+    # Import the app once in the master and fork workers from it
+    GUNICORN_PRELOAD = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+    # Requests before a worker is gracefully replaced, 0 never recycles
+    GUNICORN_MAX_REQUESTS = int(os.environ.get("GUNICORN_MAX_REQUESTS", 10000))
+    # Random extra requests, so workers don't all restart at once
+    GUNICORN_MAX_REQUESTS_JITTER = int(
+        os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 1000)
+    )
+    # Seconds a recycled or stopped worker has to finish its requests
+    GUNICORN_GRACEFUL_TIMEOUT = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+    # Open `/<name>/events` streams per app worker, each holds a thread.
+    # Workers times this many browsers get live events, others are told to
+    # retry in 5 to 15 seconds
+    CHANGE_FEED_STREAMS = int(os.environ.get("CHANGE_FEED_STREAMS", 2))
+    # Streams end after this long and clients reconnect, under nginx's
+    # 60 second proxy_read_timeout
+    CHANGE_FEED_STREAM_SECONDS = float(os.environ.get("CHANGE_FEED_STREAM_SECONDS", 55))
+    CHANGE_FEED_POLL_INTERVAL = float(os.environ.get("CHANGE_FEED_POLL_INTERVAL", 1))
+    # Days of changes kept by `purge-changes`, for clients to resume from
+    CHANGE_LOG_RETENTION_DAYS = int(os.environ.get("CHANGE_LOG_RETENTION_DAYS", 7))
+    # "least-loaded" or "round-robin", for `assign-submissions`
+    ASSIGNMENT_STRATEGY = os.environ.get("ASSIGNMENT_STRATEGY", "least-loaded")
+    # Submissions assigned per commit by `assign-submissions`
+    ASSIGNMENT_BATCH_SIZE = int(os.environ.get("ASSIGNMENT_BATCH_SIZE", 1000))
+    # Assign each submission created through the API to the least loaded
+    # admin, batches and imports wait for `assign-submissions`
+    AUTO_ASSIGN_ON_CREATE = os.environ.get("AUTO_ASSIGN_ON_CREATE", "0") == "1"
+    # Per endpoint latency, SQL and serialization metrics at /metrics
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+    # Shared by every worker on the host
+    METRICS_DATABASE = os.environ.get(
+        "METRICS_DATABASE", "/tmp/cardboardbound-metrics.db"
+    )
+    # Break each response's time down in a Server-Timing header
+    SERVER_TIMING_ENABLED = os.environ.get("SERVER_TIMING_ENABLED", "0") == "1"
+    USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", 1024))
+    USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", 30))
+    # Seconds a signed user snapshot in the session is trusted without
+    # loading the user, while no user has changed. 0 disables snapshots
+    SESSION_USER_SNAPSHOT_MAX_AGE = float(
+        os.environ.get("SESSION_USER_SNAPSHOT_MAX_AGE", 0)
+    )
+    PASSWORD_HASH_ALGORITHM = os.environ.get("PASSWORD_HASH_ALGORITHM", "sha256")
+    PASSWORD_HASH_ITERATIONS = int(os.environ.get("PASSWORD_HASH_ITERATIONS", 100000))
+    # Hashing processes per app worker, 0 hashes inline
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 1))
+    # Pending hashes per app worker before logins get a 429
+    PASSWORD_HASH_QUEUE_DEPTH = int(os.environ.get("PASSWORD_HASH_QUEUE_DEPTH", 4))
+    # Number of proxies (nginx) whose X-Forwarded-For is trusted
+    TRUSTED_PROXIES = int(os.environ.get("TRUSTED_PROXIES", 1))
+    RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "1") == "1"
+    # Shared by every worker on the host
+    RATE_LIMIT_DATABASE = os.environ.get(
+        "RATE_LIMIT_DATABASE", "/tmp/cardboardbound-rate-limits.db"
+    )
+    LOGIN_RATE_LIMIT_PER_MINUTE = float(
+        os.environ.get("LOGIN_RATE_LIMIT_PER_MINUTE", 10)
+    )
+    LOGIN_RATE_LIMIT_BURST = int(os.environ.get("LOGIN_RATE_LIMIT_BURST", 5))
+    REGISTER_RATE_LIMIT_PER_MINUTE = float(
+        os.environ.get("REGISTER_RATE_LIMIT_PER_MINUTE", 2)
+    )
+    REGISTER_RATE_LIMIT_BURST = int(os.environ.get("REGISTER_RATE_LIMIT_BURST", 3))
+    RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "1") == "1"
+    # Shared by every worker on the host
+    RESPONSE_CACHE_DATABASE = os.environ.get(
+        "RESPONSE_CACHE_DATABASE", "/tmp/cardboardbound-responses.db"
+    )
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 1000))
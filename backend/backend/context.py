@@ -1,29 +1,134 @@
-from flask import g, session
+from time import time
+from typing import TYPE_CHECKING
 
-from .models import User
+from flask import current_app, g, session
 
+from .models import TableCounter, User
+from .user_cache import UserSnapshot, user_cache
 
-def get_user() -> User | None:
-    if "user" in g:
-        return g.user
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
-    if (user_id := session.get("user_id")) is None:
+SESSION_USER_SNAPSHOT_MAX_AGE_KEY = "SESSION_USER_SNAPSHOT_MAX_AGE"
+
+
+def _users_version() -> int | None:
+    # Bumped by triggers on every write to users, from any worker
+    return TableCounter.get_versions([User.__tablename__]).get(User.__tablename__)
+
+
+def _snapshot_from_session(version: int | None) -> UserSnapshot | None:
+    """Trusts the signed snapshot in the session cookie while it is fresh
+    and the users table is still at the version it was signed at.
+    """
+    if not (max_age := current_app.config.get(SESSION_USER_SNAPSHOT_MAX_AGE_KEY)):
+        return None
+
+    if (data := session.get("user")) is None or time() - data["at"] > max_age:
         return None
 
-    if (user := User.get_by_id(user_id)) is None:
+    if version is None or data.get("tv") != version:
+        return None
+
+    return UserSnapshot(data["id"], data["username"], data["admin"], data["v"])
+
+
+def _store_snapshot(snapshot: UserSnapshot, version: int | None):
+    session["user_id"] = snapshot.id
+    session["user_version"] = snapshot.session_version
+
+    if current_app.config.get(SESSION_USER_SNAPSHOT_MAX_AGE_KEY):
+        session["user"] = {
+            "id": snapshot.id,
+            "username": snapshot.username,
+            "admin": snapshot.admin,
+            "v": snapshot.session_version,
+            "tv": version,
+            "at": time(),
+        }
+
+
+def _accept_user(user: UserSnapshot, version: int | None) -> UserSnapshot | None:
+    # Password changes bump the version, which logs out older sessions
+    if user.session_version != session.get("user_version"):
         clear_user()
         return None
 
+    if current_app.config.get(SESSION_USER_SNAPSHOT_MAX_AGE_KEY):
+        _store_snapshot(user, version)
+
     g.user = user
     return user
 
 
-def set_user(user: User):
-    session["user_id"] = user.id
-    g.user = user
+def get_user() -> UserSnapshot | None:
+    if "user" in g:
+        return g.user
+
+    if (user_id := session.get("user_id")) is None:
+        return None
+
+    version = _users_version()
+
+    if (user := _snapshot_from_session(version)) is not None:
+        g.user = user
+        return user
+
+    if (user := user_cache.get(user_id, version)) is None:
+        if (model := User.get_by_id(user_id)) is None:
+            clear_user()
+            return None
+
+        user = user_cache.put(UserSnapshot.of(model), version)
+
+    return _accept_user(user, version)
+
+
+async def get_user_async(db_session: "AsyncSession") -> UserSnapshot | None:
+    """`get_user` for the ASGI app, loading through `db_session`."""
+    if "user" in g:
+        return g.user
+
+    if (user_id := session.get("user_id")) is None:
+        return None
+
+    versions = await TableCounter.get_versions_async(db_session, [User.__tablename__])
+    version = versions.get(User.__tablename__)
+
+    if (user := _snapshot_from_session(version)) is not None:
+        g.user = user
+        return user
+
+    if (user := user_cache.get(user_id, version)) is None:
+        if (model := await User.get_by_id_async(db_session, user_id)) is None:
+            clear_user()
+            return None
+
+        user = user_cache.put(UserSnapshot.of(model), version)
+
+    return _accept_user(user, version)
+
+
+def set_user(user: User, version: int | None = None):
+    """Logs `user` in. `version` is the users table's, read when None."""
+    if version is None:
+        version = _users_version()
+
+    snapshot = user_cache.put(UserSnapshot.of(user), version)
+
+    _store_snapshot(snapshot, version)
+    g.user = snapshot
+
+
+async def set_user_async(db_session: "AsyncSession", user: User):
+    versions = await TableCounter.get_versions_async(db_session, [User.__tablename__])
+
+    set_user(user, versions.get(User.__tablename__))
 
 
 def clear_user():
-    session.pop("user_id")
+    session.pop("user_id", None)
+    session.pop("user_version", None)
+    session.pop("user", None)
 
     g.user = None
@@ -1,21 +1,143 @@
-from flask import Flask
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
+import os
+from dataclasses import dataclass, field
+from typing import Callable
+
+from flask import Flask, g, has_request_context
+from sqlalchemy import URL, Engine, create_engine, event, make_url
+from sqlalchemy.orm import Session, declarative_base, scoped_session, sessionmaker
+
+try:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+except ImportError:
+    # Needs greenlet, only the ASGI app uses it
+    create_async_engine = None
 
 SQLALCHEMY_DATABASE_URI_KEY = "SQLALCHEMY_DATABASE_URI"
+QUERY_BUDGET_KEY = "QUERY_BUDGET"
+QUERY_COUNT_HEADER_KEY = "QUERY_COUNT_HEADER"
+
+REQUEST_TRANSACTIONS_KEY = "DATABASE_REQUEST_TRANSACTIONS"
+
+# asyncio drivers for `Database.init_async`, by backend
+ASYNC_DRIVERS = {"sqlite": "aiosqlite"}
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def _count_query(*args):
+    if has_request_context():
+        g.sql_queries = g.get("sql_queries", 0) + 1
+
+
+def count_queries():
+    """Counts the statements each request runs, on every engine, in
+    `g.sql_queries`. Shared by the query budget and metrics."""
+    if not event.contains(Engine, "before_cursor_execute", _count_query):
+        event.listen(Engine, "before_cursor_execute", _count_query)
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    # Set on every new writer connection, SQLite only
+    pragmas: dict[str, str | int] = field(default_factory=dict)
+    # Take the write lock when a transaction starts instead of on its first
+    # write, so a reader can't deadlock upgrading to a writer
+    immediate_transactions: bool = False
+    # Serve GET requests from a separate read-only pool
+    read_pool: bool = False
+    # Size the pools from DATABASE_POOL_* instead of the SQLAlchemy defaults
+    sized_pool: bool = False
+
+
+ENGINE_PROFILES = {
+    # create_engine defaults
+    "default": EngineProfile(),
+    "sqlite-wal": EngineProfile(
+        pragmas={"journal_mode": "WAL", "synchronous": "NORMAL"},
+        immediate_transactions=True,
+        read_pool=True,
+        sized_pool=True,
+    ),
+}
+
+
+class RoutingSession(Session):
+    """Session that reads from the read-only engine during requests.
+
+    Once a transaction writes, through a flush or a DML statement, the rest
+    of it stays on the writer so it reads its own changes. Reading from the
+    writer first would hold its lock (BEGIN IMMEDIATE) for the whole request.
+
+    Behind an `AsyncSession` (``info["async"]``) it routes between the async
+    engines the same way.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        database: Database = self.info["database"]
+        engine, read_engine = database.engine, database.read_engine
+
+        if self.info.get("async"):
+            engine, read_engine = database.async_engines
+
+        if self._flushing or (clause is not None and getattr(clause, "is_dml", False)):
+            self.info["writing"] = True
+
+        if (
+            read_engine is not None
+            and not self.info.get("writing")
+            and has_request_context()
+        ):
+            return read_engine
+
+        return engine
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def run_commit_callbacks(session: RoutingSession):
+    session.info.pop("writing", None)
+
+    for callback in session.info.pop("on_commit", []):
+        callback()
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def drop_commit_callbacks(session: RoutingSession):
+    session.info.pop("writing", None)
+    session.info.pop("on_commit", None)
 
 
 class Database:
     def __init__(self, app: Flask | None = None) -> None:
         self.Base = declarative_base()
+        self.read_engine: Engine | None = None
+        self.request_transactions = False
+        self.async_engine = None
+        self.async_read_engine = None
+        self.async_session = None
+
+        # gunicorn's preload_app builds the engines before forking workers
+        os.register_at_fork(after_in_child=self.dispose)
 
         if app is not None:
             self.init_app(app)
 
     def init_app(self, app: Flask):
-        self.engine = create_engine(app.config.get(SQLALCHEMY_DATABASE_URI_KEY))
+        url = make_url(app.config.get(SQLALCHEMY_DATABASE_URI_KEY))
+
+        self.engine, self.read_engine = self._create_engines(app, url, create_engine)
+        self.async_engine = None
+        self.async_read_engine = None
+
         self.session = scoped_session(
-            sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+            sessionmaker(
+                autocommit=False,
+                autoflush=False,
+                bind=self.engine,
+                class_=RoutingSession,
+                info={"database": self},
+            )
         )
 
         self.Base.query = self.session.query_property()
@@ -24,5 +146,221 @@ class Database:
         def shutdown_session(exception=None):
             self.session.remove()
 
+        self.request_transactions = app.config.get(REQUEST_TRANSACTIONS_KEY, False)
+
+        if self.request_transactions:
+            self._commit_per_request(app)
+
+        budget = app.config.get(QUERY_BUDGET_KEY)
+        count_header = app.config.get(QUERY_COUNT_HEADER_KEY, False)
+
+        # After the commit hook, so the budget is checked before it commits
+        if budget is not None or count_header:
+            self._count_queries(app, budget, count_header)
+
+    def init_async(self, app: Flask):
+        """Async engines on the same database, pools and pragmas, and
+        `async_session` to open `AsyncSession`s routed like `session`.
+
+        Only the ASGI app calls this, it needs greenlet and the backend's
+        driver in `ASYNC_DRIVERS` installed.
+        """
+        url = make_url(app.config.get(SQLALCHEMY_DATABASE_URI_KEY))
+
+        if create_async_engine is None:
+            raise RuntimeError("Async engines need greenlet installed")
+
+        if (driver := ASYNC_DRIVERS.get(url.get_backend_name())) is None:
+            raise RuntimeError(f"No async driver for {url.get_backend_name()}")
+
+        self.async_engine, self.async_read_engine = self._create_engines(
+            app,
+            url.set(drivername=f"{url.get_backend_name()}+{driver}"),
+            create_async_engine,
+        )
+
+        # Nothing is loaded lazily after the commit the ASGI app runs
+        self.async_session = async_sessionmaker(
+            autoflush=False,
+            expire_on_commit=False,
+            sync_session_class=RoutingSession,
+            info={"database": self, "async": True},
+        )
+
+    @property
+    def async_engines(self) -> tuple[Engine, Engine | None]:
+        """The async writer and read-only engines' sync facades, which
+        sessions bind to."""
+        return (
+            self.async_engine.sync_engine,
+            self.async_read_engine.sync_engine if self.async_read_engine else None,
+        )
+
+    def _create_engines(self, app: Flask, url: URL, create: Callable) -> tuple:
+        """The writer and the read-only engine, if the profile has one, for
+        `url`, made with `create`."""
+        profile = ENGINE_PROFILES["default"]
+
+        if url.get_backend_name() == "sqlite":
+            profile = ENGINE_PROFILES[
+                app.config.get("DATABASE_ENGINE_PROFILE", "default")
+            ]
+
+        tuning = {
+            "busy_timeout": app.config.get("SQLITE_BUSY_TIMEOUT", 5000),
+            "mmap_size": app.config.get("SQLITE_MMAP_SIZE", 0),
+            "cache_size": app.config.get("SQLITE_CACHE_SIZE", -2000),
+        }
+
+        # In-memory databases get SingletonThreadPool, which takes no sizes
+        in_memory = url.database in (None, "", ":memory:")
+        pool_options = {}
+
+        if not in_memory:
+            pool_options = self._pool_options(app, profile, "DATABASE_POOL_SIZE")
+
+        engine = create(url, **pool_options)
+        # Async engines take listeners on their sync facade
+        listened = getattr(engine, "sync_engine", engine)
+
+        if profile.pragmas:
+            self._set_pragmas(listened, {**profile.pragmas, **tuning})
+
+        if profile.immediate_transactions:
+            self._begin_immediate(listened)
+
+        read_engine = None
+
+        # An in-memory database only exists on the writer's connection
+        if profile.read_pool and not in_memory:
+            read_engine = create(
+                url.set(
+                    database=f"file:{url.database}",
+                    query={"mode": "ro", "uri": "true"},
+                ),
+                **self._pool_options(app, profile, "DATABASE_READ_POOL_SIZE"),
+            )
+            # journal_mode is persistent, the writer already switched the file
+            self._set_pragmas(
+                getattr(read_engine, "sync_engine", read_engine),
+                {**tuning, "query_only": 1},
+            )
+
+        return engine, read_engine
+
+    @property
+    def request_scoped(self) -> bool:
+        return self.request_transactions and has_request_context()
+
+    def commit(self):
+        """Commits the session, or only flushes it when the request commits."""
+        if self.request_scoped:
+            self.session.flush()
+        else:
+            self.session.commit()
+
+    def on_commit(self, callback: Callable[[], None]):
+        """Runs `callback` once the pending changes are committed.
+
+        Dropped if they are rolled back instead.
+        """
+        if self.request_scoped:
+            self.session.info.setdefault("on_commit", []).append(callback)
+        else:
+            callback()
+
+    @property
+    def engines(self) -> list[Engine]:
+        engines = [self.engine, self.read_engine]
+
+        if self.async_engine is not None:
+            engines += self.async_engines
+
+        return [engine for engine in engines if engine is not None]
+
+    def dispose(self):
+        """Drops the pooled connections inherited from a parent process.
+
+        They are left open, the parent still owns them, and the child opens
+        its own on first use.
+        """
+        if not hasattr(self, "engine"):
+            return
+
+        for engine in self.engines:
+            engine.dispose(close=False)
+
+    @staticmethod
+    def _pool_options(app: Flask, profile: EngineProfile, size_key: str) -> dict:
+        if not profile.sized_pool:
+            return {}
+
+        return {
+            "pool_size": app.config.get(size_key, 5),
+            "max_overflow": app.config.get("DATABASE_POOL_OVERFLOW", 5),
+            "pool_timeout": app.config.get("DATABASE_POOL_TIMEOUT", 10),
+        }
+
+    @staticmethod
+    def _set_pragmas(engine: Engine, pragmas: dict):
+        @event.listens_for(engine, "connect")
+        def set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+
+            cursor.close()
+
+    @staticmethod
+    def _begin_immediate(engine: Engine):
+        # pysqlite issues its own deferred BEGIN, so take over from it
+        @event.listens_for(engine, "connect")
+        def disable_pysqlite_begin(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(engine, "begin")
+        def begin_immediate(connection):
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    def _commit_per_request(self, app: Flask):
+        """One transaction per request, committed after the view returns.
+
+        Error responses roll back. Exceptions skip this and the teardown's
+        `session.remove()` rolls back instead.
+        """
+
+        @app.after_request
+        def commit_request(response):
+            if response.status_code < 400:
+                self.session.commit()
+            else:
+                self.session.rollback()
+
+            return response
+
+    def _count_queries(self, app: Flask, budget: int | None, header: bool):
+        """Counts the queries each request runs.
+
+        With a `budget`, any request over it fails and its writes are rolled
+        back, to catch N+1 loads early in tests and local runs. With `header`
+        the count is returned in X-Query-Count, for benchmarks.
+        """
+        count_queries()
+
+        @app.after_request
+        def check_query_budget(response):
+            count = g.get("sql_queries", 0)
+
+            if budget is not None and count > budget:
+                raise QueryBudgetExceeded(
+                    f"{count} queries exceeds the budget of {budget}"
+                )
+
+            if header:
+                response.headers["X-Query-Count"] = str(count)
+
+            return response
+
 
 db = Database()
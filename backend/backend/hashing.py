@@ -0,0 +1,179 @@
+from asyncio import get_running_loop, wrap_future
+from base64 import b64decode, b64encode
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import pbkdf2_hmac
+from hmac import compare_digest
+from multiprocessing import get_context
+from os import getpid, urandom
+from threading import BoundedSemaphore, Lock
+
+from flask import Flask
+
+from .metrics import metrics
+
+PASSWORD_HASH_ALGORITHM_KEY = "PASSWORD_HASH_ALGORITHM"
+PASSWORD_HASH_ITERATIONS_KEY = "PASSWORD_HASH_ITERATIONS"
+PASSWORD_HASH_WORKERS_KEY = "PASSWORD_HASH_WORKERS"
+PASSWORD_HASH_QUEUE_DEPTH_KEY = "PASSWORD_HASH_QUEUE_DEPTH"
+
+SALT_LENGTH = 32
+
+# Hashes written before parameters were stored alongside them
+LEGACY_ALGORITHM = "sha256"
+LEGACY_ITERATIONS = 100000
+
+
+class HasherSaturated(Exception):
+    pass
+
+
+class PasswordHasher:
+    """PBKDF2 hashing run on a small process pool.
+
+    Hashes are stored as ``pbkdf2_<algorithm>$<iterations>$<salt>$<key>`` so
+    the parameters can change without breaking existing passwords. At most
+    `queue_depth` hashes may be pending per worker, past that
+    `HasherSaturated` is raised instead of queueing more work.
+
+    The `_async` variants await the pool, or a thread when hashing inline,
+    so an event loop keeps serving other requests meanwhile.
+    """
+
+    def __init__(self, app: Flask | None = None) -> None:
+        self.algorithm = LEGACY_ALGORITHM
+        self.iterations = LEGACY_ITERATIONS
+        self.workers = 0
+        self.queue_depth = 1
+
+        self._executor: ProcessPoolExecutor | None = None
+        self._executor_pid: int | None = None
+        self._executor_lock = Lock()
+        self._slots = BoundedSemaphore(self.queue_depth)
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        self.algorithm = app.config.get(PASSWORD_HASH_ALGORITHM_KEY, LEGACY_ALGORITHM)
+        self.iterations = app.config.get(
+            PASSWORD_HASH_ITERATIONS_KEY, LEGACY_ITERATIONS
+        )
+        self.workers = app.config.get(PASSWORD_HASH_WORKERS_KEY, 0)
+        self.queue_depth = app.config.get(
+            PASSWORD_HASH_QUEUE_DEPTH_KEY, max(1, self.workers) * 4
+        )
+
+        self._slots = BoundedSemaphore(self.queue_depth)
+
+    def executor(self) -> ProcessPoolExecutor:
+        # Pools do not survive a fork, so every process builds its own. This
+        # runs in threaded app workers, where forking can deadlock the child,
+        # so the children come from a single threaded fork server instead.
+        # Only `pbkdf2_hmac` is sent to them, so neither needs more than
+        # hashlib, not this package and the app it imports.
+        with self._executor_lock:
+            if self._executor is None or self._executor_pid != getpid():
+                context = get_context("forkserver")
+                context.set_forkserver_preload(["hashlib"])
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=context)
+                self._executor_pid = getpid()
+
+            return self._executor
+
+    def _pbkdf2(self, algorithm: str, password: str, salt: bytes, iterations: int):
+        if not self._slots.acquire(blocking=False):
+            raise HasherSaturated("Password hashing queue is full")
+
+        args = (algorithm, password.encode("utf-8"), salt, iterations)
+
+        try:
+            with metrics.timed("hash"):
+                if self.workers <= 0:
+                    return pbkdf2_hmac(*args)
+
+                return self.executor().submit(pbkdf2_hmac, *args).result()
+        finally:
+            self._slots.release()
+
+    async def _pbkdf2_async(
+        self, algorithm: str, password: str, salt: bytes, iterations: int
+    ):
+        if not self._slots.acquire(blocking=False):
+            raise HasherSaturated("Password hashing queue is full")
+
+        args = (algorithm, password.encode("utf-8"), salt, iterations)
+
+        try:
+            with metrics.timed("hash"):
+                # pbkdf2_hmac releases the GIL, a thread is enough inline
+                if self.workers <= 0:
+                    return await get_running_loop().run_in_executor(
+                        None, pbkdf2_hmac, *args
+                    )
+
+                return await wrap_future(self.executor().submit(pbkdf2_hmac, *args))
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        salt = urandom(SALT_LENGTH)
+        key = self._pbkdf2(self.algorithm, password, salt, self.iterations)
+
+        return self.encode(salt, key)
+
+    async def hash_async(self, password: str) -> str:
+        salt = urandom(SALT_LENGTH)
+        key = await self._pbkdf2_async(self.algorithm, password, salt, self.iterations)
+
+        return self.encode(salt, key)
+
+    def encode(self, salt: bytes, key: bytes) -> str:
+        return "$".join(
+            [
+                f"pbkdf2_{self.algorithm}",
+                str(self.iterations),
+                b64encode(salt).decode("ascii"),
+                b64encode(key).decode("ascii"),
+            ]
+        )
+
+    @staticmethod
+    def parse(stored: str | bytes) -> tuple[str, int, bytes, bytes]:
+        if isinstance(stored, bytes):
+            return (
+                LEGACY_ALGORITHM,
+                LEGACY_ITERATIONS,
+                stored[:SALT_LENGTH],
+                stored[SALT_LENGTH:],
+            )
+
+        method, iterations, salt, key = stored.split("$")
+
+        return (
+            method.removeprefix("pbkdf2_"),
+            int(iterations),
+            b64decode(salt),
+            b64decode(key),
+        )
+
+    def verify(self, password: str, stored: str | bytes) -> bool:
+        algorithm, iterations, salt, key = self.parse(stored)
+
+        return compare_digest(self._pbkdf2(algorithm, password, salt, iterations), key)
+
+    async def verify_async(self, password: str, stored: str | bytes) -> bool:
+        algorithm, iterations, salt, key = self.parse(stored)
+        derived = await self._pbkdf2_async(algorithm, password, salt, iterations)
+
+        return compare_digest(derived, key)
+
+    def needs_rehash(self, stored: str | bytes) -> bool:
+        if isinstance(stored, bytes):
+            return True
+
+        algorithm, iterations, _, _ = self.parse(stored)
+
+        return algorithm != self.algorithm or iterations != self.iterations
+
+
+hasher = PasswordHasher()
@@ -1,14 +1,56 @@
-from typing import ClassVar, TypeVar
-
-from flask import jsonify, request
+from csv import DictWriter
+from dataclasses import dataclass
+from datetime import datetime
+from hashlib import sha1
+from io import StringIO
+from itertools import combinations, islice
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, Iterator, TypeVar
+
+from flask import Response, current_app, jsonify, request, stream_with_context
 from flask.sansio.scaffold import Scaffold
 from flask.views import MethodView
+from sqlalchemy import insert, inspect, select, text, update
+
+from backend.change_feed import change_feed
+from backend.database import db
+from backend.models import IdModel, InvalidCursor, TableCounter, encode_cursor
+from backend.response_cache import response_cache
 
-from backend.models import IdModel
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 DEFAULT_PER_PAGE = 12
 MAX_PER_PAGE = 60
 
+# Items and deletes one `/<name>/changes` response holds
+DEFAULT_CHANGES_LIMIT = 500
+MAX_CHANGES_LIMIT = 1000
+
+BATCH_MAX_SIZE_KEY = "BATCH_MAX_SIZE"
+
+# Rows fetched per cursor round trip, and serialized per chunk written out
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# For "`<param>` must be ..." errors
+PARAM_TYPE_NAMES = {bool: "a boolean", int: "an integer", str: "a string"}
+
+# Methods an `async_crud` view runs as their `<name>_async` variant
+ASYNC_VARIANTS = [
+    "list",
+    "read",
+    "create",
+    "update",
+    "delete",
+    "get_by_key",
+    "get_version_by_key",
+    "validate_creation_params",
+    "_pre_create_hook",
+    "_post_create_hook",
+    "_post_update_hook",
+]
+
 
 def api_response(errors: list[str] | None = None, **kwargs):
     response = {
@@ -23,6 +65,78 @@ def api_response(errors: list[str] | None = None, **kwargs):
     return jsonify(response)
 
 
+@dataclass(frozen=True)
+class Filter:
+    """Equality filter on `column` from a query parameter.
+
+    `parse` turns the raw value into the column value, raising ValueError
+    when it is invalid. Parsing to None matches NULL. `example` is a valid
+    raw value, used when checking query plans.
+    """
+
+    column: str
+    parse: Callable[[str], Any]
+    example: str = "1"
+
+
+def parse_bool(value: str) -> bool:
+    if value.lower() in ("1", "true"):
+        return True
+
+    if value.lower() in ("0", "false"):
+        return False
+
+    raise ValueError(value)
+
+
+def rows_by_columns(rows: list[dict]) -> "list[list[int]]":
+    """Indexes of `rows` grouped by the keys they set.
+
+    Each group can run as a single executemany.
+    """
+    groups = {}
+
+    for i, row in enumerate(rows):
+        groups.setdefault(tuple(sorted(row)), []).append(i)
+
+    return list(groups.values())
+
+
+def flatten(item: dict, prefix: str = "") -> dict:
+    """Nested dicts become dotted keys, `{"a": {"b": 1}}` is `{"a.b": 1}`."""
+    flat = {}
+
+    for key, value in item.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+
+    return flat
+
+
+def not_modified(etag: str) -> Response:
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+
+    return response
+
+
+def with_validators(
+    response: Response, etag: str | None, last_modified: datetime | None = None
+) -> Response:
+    if etag is not None:
+        response.set_etag(etag)
+        # Responses depend on the session, let browsers keep and revalidate them
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+
+    if last_modified is not None:
+        response.last_modified = last_modified
+
+    return response
+
+
 class ItemApi(MethodView):
     init_every_request = False
 
@@ -39,6 +153,49 @@ class ItemApi(MethodView):
         return self.modelView.delete(key=key)
 
 
+class BatchApi(MethodView):
+    init_every_request = False
+
+    def __init__(self, modelView: type["IdModelView"]):
+        self.modelView = modelView
+
+    def post(self):
+        return self.modelView.create_batch()
+
+    def patch(self):
+        return self.modelView.update_batch()
+
+
+class ExportApi(MethodView):
+    init_every_request = False
+
+    def __init__(self, modelView: type["IdModelView"]):
+        self.modelView = modelView
+
+    def get(self):
+        return self.modelView.export()
+
+
+class EventsApi(MethodView):
+    init_every_request = False
+
+    def __init__(self, modelView: type["IdModelView"]):
+        self.modelView = modelView
+
+    def get(self):
+        return self.modelView.events()
+
+
+class ChangesApi(MethodView):
+    init_every_request = False
+
+    def __init__(self, modelView: type["IdModelView"]):
+        self.modelView = modelView
+
+    def get(self):
+        return self.modelView.changes()
+
+
 class GroupApi(MethodView):
     init_every_request = False
 
@@ -66,13 +223,43 @@ class IdModelView:
 
     item_key: ClassVar[str] = "<int:key>"
 
+    # Whether `list` accepts `q=`, the model must implement `search`
+    searchable: ClassVar[bool] = False
+
+    # Query parameters `list` filters on, each must be served by an index
+    filters: ClassVar[dict[str, Filter]] = {}
+    # Columns `list` can order by with `sort=<name>` or `sort=-<name>`
+    sortable: ClassVar[list[str]] = ["id"]
+
+    # Whether `/<name>/export` is registered
+    exportable: ClassVar[bool] = False
+
+    # Whether `/<name>/batch` is registered. Batches write rows directly,
+    # skipping the model constructor and the create/update hooks
+    batchable: ClassVar[bool] = False
+
+    # Whether `/<name>/events` is registered, the table needs change
+    # triggers, see the change log migration
+    change_feed: ClassVar[bool] = False
+
+    # Whether `/<name>/changes` is registered, the model needs a
+    # `change_seq` column, see `IdModel.changes_since`
+    delta_sync: ClassVar[bool] = False
+
+    # Whether the ASGI app serves list, read, create, update and delete with
+    # the `_async` methods on an `AsyncSession`, see `backend.asgi`. Each of
+    # `ASYNC_VARIANTS` the view overrides needs its `_async` override too
+    async_crud: ClassVar[bool] = False
+
     @classmethod
     def filtered_params(
         cls,
         allowed_params: list[str],
         required: bool = False,
+        data: Any = None,
     ) -> tuple[dict | None, set[str]]:
-        data = request.json
+        if data is None:
+            data = request.json
 
         if not isinstance(data, dict):
             return None, {
@@ -83,36 +270,508 @@ class IdModelView:
         filtered = {}
 
         for key in allowed_params:
-            if key in data:
+            if key not in data:
+                if required:
+                    errors.add(f"`{key}` is required")
+            elif error := cls.invalid_param(key, data[key]):
+                errors.add(error)
+            else:
                 filtered[key] = data[key]
-            elif required:
-                errors.add(f"`{key}` is required")
 
         return filtered, errors
 
+    @classmethod
+    def invalid_param(cls, key: str, value: Any) -> str | None:
+        """Why `value` cannot be stored in the model column `key`, if so.
+
+        Parameters that are not columns, like a password, are left to
+        `validate_creation_params`.
+        """
+        if (column := inspect(cls.model).columns.get(key)) is None:
+            return None
+
+        if value is None:
+            return None if column.nullable else f"`{key}` cannot be null"
+
+        expected = column.type.python_type
+        # JSON booleans are Python ints too
+        valid = isinstance(value, expected) and (
+            expected is bool or not isinstance(value, bool)
+        )
+
+        if not valid:
+            return (
+                f"`{key}` must be {PARAM_TYPE_NAMES.get(expected, expected.__name__)}"
+            )
+
+        return None
+
+    @classmethod
+    def requested_fields(cls) -> tuple[list[str] | None, list[str]]:
+        """Parses the optional comma separated `fields` query parameter.
+
+        Fields come back once each in `serializable` order, so any spelling
+        of the same set shares one compiled serializer, cache key and ETag.
+        """
+        if not (raw := request.args.get("fields")):
+            return None, []
+
+        requested = {field.strip() for field in raw.split(",") if field.strip()}
+
+        errors = [
+            f"`{field}` is not a valid field"
+            for field in sorted(requested)
+            if field not in cls.model.serializable
+        ]
+        fields = [field for field in cls.model.serializable if field in requested]
+
+        return fields, errors
+
+    @classmethod
+    def requested_filters(cls) -> tuple[dict[str, Any], list[str]]:
+        values = {}
+        errors = []
+
+        for name, spec in cls.filters.items():
+            if (raw := request.args.get(name)) is None:
+                continue
+
+            try:
+                values[name] = spec.parse(raw)
+            except ValueError:
+                errors.append(f"Invalid value for `{name}`")
+
+        return values, errors
+
+    @classmethod
+    def filter_clauses(cls, values: dict[str, Any]) -> list:
+        clauses = []
+
+        for name, value in values.items():
+            column = getattr(cls.model, cls.filters[name].column)
+
+            clauses.append(column.is_(None) if value is None else column == value)
+
+        return clauses
+
+    @classmethod
+    def requested_sort(cls) -> tuple[str | None, bool, list[str]]:
+        raw = request.args.get("sort", "id")
+        name = raw.removeprefix("-")
+
+        if name not in cls.sortable:
+            return None, False, [f"Cannot sort by `{name}`"]
+
+        return name, raw.startswith("-"), []
+
+    @classmethod
+    def requested_page(cls) -> tuple[int, int, list[str]]:
+        """Parses the `p` page number and `per_page` size, clamped."""
+        errors = []
+
+        try:
+            page = max(1, int(request.args.get("p", 1)))
+        except ValueError:
+            page = 1
+            errors.append("`p` must be an integer")
+
+        try:
+            per_page = int(request.args.get("per_page", DEFAULT_PER_PAGE))
+        except ValueError:
+            per_page = DEFAULT_PER_PAGE
+            errors.append("`per_page` must be an integer")
+
+        return page, min(MAX_PER_PAGE, max(1, per_page)), errors
+
+    @classmethod
+    def effective_sort(cls, sort: str, filters: dict[str, Any]) -> str:
+        """`sort`, or id when an equality filter pins the sort column, so
+        the cursor seeks on id alone and the filter's index keeps the order."""
+        column = cls.model.keyset_columns(sort)[0].key
+        filtered = {cls.filters[name].column for name in filters}
+
+        return "id" if column in filtered else sort
+
+    @classmethod
+    def example_cursors(cls, sort: str) -> "list[list]":
+        """Cursor values seeking past a row, and past a NULL one when the
+        sort column is nullable."""
+        columns = cls.model.keyset_columns(sort)
+
+        if len(columns) == 1:
+            return [[1]]
+
+        if columns[0].expression.nullable:
+            return [[1, 1], [None, 1]]
+
+        return [[1, 1]]
+
+    @classmethod
+    def query_shapes(cls) -> Iterator[tuple[str, Any]]:
+        """Every page query `list` and `changes` can run, as
+        ``(description, statement)``, for checking their plans."""
+        for size in range(len(cls.filters) + 1):
+            for names in combinations(cls.filters, size):
+                values = {
+                    name: cls.filters[name].parse(cls.filters[name].example)
+                    for name in names
+                }
+                clauses = cls.filter_clauses(values)
+
+                for sort in cls.sortable:
+                    # Served by the id shapes
+                    if cls.effective_sort(sort, values) != sort:
+                        continue
+
+                    for descending in (False, True):
+                        shape = f"{cls.name}: filters={list(names)} sort={'-' if descending else ''}{sort}"
+
+                        yield f"{shape} offset", cls.model.page_statement(
+                            2, 20, None, clauses, sort, descending
+                        )
+
+                        for cursor in [None, *cls.example_cursors(sort)]:
+                            statements = cls.model.keyset_statements(
+                                20,
+                                cursor and encode_cursor(cursor),
+                                descending,
+                                None,
+                                clauses,
+                                sort,
+                            )
+
+                            for i, stmt in enumerate(statements):
+                                after = f" after={cursor}" if cursor else ""
+                                run = f" run={i}" if len(statements) > 1 else ""
+
+                                yield f"{shape} keyset{after}{run}", stmt
+
+        if cls.delta_sync:
+            yield f"{cls.name}: changes", cls.model.changes_statement(0, 100)
+            yield f"{cls.name}: tombstones", cls.model.tombstones_statement(0, 100)
+
+    @classmethod
+    def query_plans(cls) -> Iterator[tuple[str, list[str], list[str]]]:
+        """`query_shapes` with their plans, as ``(description, plan, bad)``.
+
+        Bad steps sort in memory, or scan the whole table when filtered.
+        """
+        for shape, stmt in cls.query_shapes():
+            sql = stmt.compile(db.engine, compile_kwargs={"literal_binds": True})
+            plan = [
+                row.detail
+                for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))
+            ]
+
+            filtered = "filters=[]" not in shape
+            bad = [
+                detail
+                for detail in plan
+                if "TEMP B-TREE" in detail
+                or (filtered and detail.startswith("SCAN") and "INDEX" not in detail)
+            ]
+
+            yield shape, plan, bad
+
+    @classmethod
+    def table_versions(cls) -> str | None:
+        """Change counters of every table the listing reads.
+
+        They are read before the page itself, so a concurrent write can only
+        make tags and cache keys older than the body, never newer.
+        """
+        tables = cls.model.dependent_tables()
+
+        return cls.format_versions(tables, TableCounter.get_versions(tables))
+
+    @classmethod
+    async def table_versions_async(cls, session: "AsyncSession") -> str | None:
+        tables = cls.model.dependent_tables()
+        versions = await TableCounter.get_versions_async(session, tables)
+
+        return cls.format_versions(tables, versions)
+
+    @staticmethod
+    def format_versions(tables: list[str], versions: dict[str, int]) -> str | None:
+        if len(versions) != len(set(tables)):
+            return None
+
+        return ",".join(
+            f"{table}:{version}" for table, version in sorted(versions.items())
+        )
+
+    @classmethod
+    def list_etag(cls, versions: str, filters: dict[str, Any]) -> str:
+        """Strong ETag for the current query string at `versions`.
+
+        Parsed filter values are part of it since some, like `assignee=me`,
+        depend on the session.
+        """
+        state = [
+            cls.name,
+            versions,
+            sorted(request.args.items(multi=True)),
+            sorted(filters.items()),
+        ]
+
+        return sha1(repr(state).encode("utf-8")).hexdigest()
+
     @classmethod
     def list(cls):
-        page = max(1, int(request.args.get("p", 1)))
-        per_page = min(
-            MAX_PER_PAGE, max(1, int(request.args.get("per_page", DEFAULT_PER_PAGE)))
+        fields, field_errors = cls.requested_fields()
+        filters, filter_errors = cls.requested_filters()
+        sort, descending, sort_errors = cls.requested_sort()
+        page, per_page, page_errors = cls.requested_page()
+
+        if errors := field_errors + filter_errors + sort_errors + page_errors:
+            return api_response(errors=errors), 400
+
+        clauses = cls.filter_clauses(filters)
+        sort = cls.effective_sort(sort, filters)
+
+        etag = None
+
+        if (versions := cls.table_versions()) is not None:
+            etag = cls.list_etag(versions, filters)
+
+            if request.if_none_match.contains(etag):
+                return not_modified(etag)
+
+            if response_cache.enabled and (body := response_cache.get(etag)):
+                response = current_app.response_class(
+                    body, mimetype=current_app.json.mimetype
+                )
+                response.headers["X-Cache"] = "HIT"
+
+                return with_validators(response, etag)
+
+        if cls.searchable and (query := request.args.get("q")):
+            page = cls.model.search(query, page, per_page, fields, clauses)
+
+        # Passing `after` or `before` (even empty) switches to cursor pagination
+        elif "after" in request.args or "before" in request.args:
+            try:
+                page = cls.model.paginate_keyset(
+                    per_page,
+                    after=request.args.get("after"),
+                    before=request.args.get("before") or None,
+                    sort=sort,
+                    descending=descending,
+                    with_count=request.args.get("count") in ("1", "true"),
+                    fields=fields,
+                    filters=clauses,
+                )
+            except InvalidCursor as e:
+                return api_response(errors=[str(e)]), 400
+        else:
+            page = cls.model.paginate(page, per_page, fields, clauses, sort, descending)
+
+        response = api_response(page=page)
+
+        if etag is not None and response_cache.enabled:
+            response_cache.put(etag, cls.name, versions, response.get_data())
+            response.headers["X-Cache"] = "MISS"
+
+        return with_validators(response, etag)
+
+    @classmethod
+    async def list_async(cls, session: "AsyncSession"):
+        """`list` for numbered pages, without the response cache. Searches
+        and cursor pages return None, which leaves them to the WSGI app."""
+        if (cls.searchable and request.args.get("q")) or (
+            "after" in request.args or "before" in request.args
+        ):
+            return None
+
+        fields, field_errors = cls.requested_fields()
+        filters, filter_errors = cls.requested_filters()
+        sort, descending, sort_errors = cls.requested_sort()
+        page, per_page, page_errors = cls.requested_page()
+
+        if errors := field_errors + filter_errors + sort_errors + page_errors:
+            return api_response(errors=errors), 400
+
+        clauses = cls.filter_clauses(filters)
+        sort = cls.effective_sort(sort, filters)
+
+        etag = None
+
+        if (versions := await cls.table_versions_async(session)) is not None:
+            etag = cls.list_etag(versions, filters)
+
+            if request.if_none_match.contains(etag):
+                return not_modified(etag)
+
+        page = await cls.model.paginate_async(
+            session, page, per_page, fields, clauses, sort, descending
         )
 
-        page = cls.model.paginate(page, per_page)
+        return with_validators(api_response(page=page), etag)
+
+    @classmethod
+    def csv_columns(cls, fields: "list[str] | None") -> "list[str]":
+        """Header for `fields`, related models take one column per field."""
+        relationships = inspect(cls.model).relationships
+        columns = []
 
-        return api_response(page=page)
+        for name in fields or cls.model.serializable:
+            if name in relationships:
+                related = relationships[name].mapper.class_
+                columns.extend(f"{name}.{field}" for field in related.serializable)
+            else:
+                columns.append(name)
+
+        return columns
+
+    @classmethod
+    def changes(cls):
+        """Items written and ids deleted after change `since`, oldest first.
+
+        Clients keeping a local copy start from 0 and pass `next_since`
+        back until `has_more` is false.
+        """
+        fields, errors = cls.requested_fields()
+
+        try:
+            since = int(request.args.get("since", 0))
+            limit = int(request.args.get("limit", DEFAULT_CHANGES_LIMIT))
+        except ValueError:
+            errors.append("`since` and `limit` must be integers")
+        else:
+            if since < 0:
+                errors.append("`since` must not be negative")
+
+        if errors:
+            return api_response(errors=errors), 400
+
+        limit = min(MAX_CHANGES_LIMIT, max(1, limit))
+
+        return api_response(changes=cls.model.changes_since(since, limit, fields))
+
+    @classmethod
+    def events(cls):
+        """Server-Sent Events for every create, update and delete.
+
+        Resumes after `Last-Event-ID`, or the `last_event_id` parameter
+        since EventSource can't set headers on its first request. A `busy`
+        event means the stream closes and the browser retries later, the
+        client can poll `/<name>/changes` meanwhile.
+        """
+        last_id = request.headers.get("Last-Event-ID") or request.args.get(
+            "last_event_id"
+        )
+
+        try:
+            last_id = int(last_id) if last_id else None
+        except ValueError:
+            return api_response(errors=["Invalid `Last-Event-ID`"]), 400
+
+        return change_feed.stream(cls.model, last_id)
+
+    @classmethod
+    def export(cls):
+        """Streams every item matching the list filters as NDJSON or CSV."""
+        fields, field_errors = cls.requested_fields()
+        filters, filter_errors = cls.requested_filters()
+        sort, descending, sort_errors = cls.requested_sort()
+
+        format_errors = []
+
+        if (export_format := request.args.get("format", "ndjson")) not in (
+            EXPORT_FORMATS
+        ):
+            format_errors.append(f"Unknown format `{export_format}`")
+
+        if errors := field_errors + filter_errors + sort_errors + format_errors:
+            return api_response(errors=errors), 400
+
+        clauses = cls.filter_clauses(filters)
+        sort = cls.effective_sort(sort, filters)
+
+        def chunks(items: Iterator[dict]) -> Iterator[list[dict]]:
+            while chunk := list(islice(items, EXPORT_BATCH_SIZE)):
+                yield chunk
+
+        def ndjson_lines():
+            dumps = current_app.json.dumps
+            items = cls.model.stream(
+                fields, clauses, sort, descending, EXPORT_BATCH_SIZE
+            )
+
+            for chunk in chunks(items):
+                yield "".join(f"{dumps(item)}\n" for item in chunk)
+
+        def csv_lines():
+            buffer = StringIO()
+            writer = DictWriter(buffer, cls.csv_columns(fields), extrasaction="ignore")
+            writer.writeheader()
+
+            items = cls.model.stream(
+                fields, clauses, sort, descending, EXPORT_BATCH_SIZE
+            )
+
+            for chunk in chunks(items):
+                writer.writerows(map(flatten, chunk))
+                yield buffer.getvalue()
+
+                buffer.seek(0)
+                buffer.truncate()
+
+            yield buffer.getvalue()
+
+        # The query runs inside the generator, after the view has returned
+        generate = ndjson_lines if export_format == "ndjson" else csv_lines
+        response = current_app.response_class(
+            stream_with_context(generate()), mimetype=EXPORT_FORMATS[export_format]
+        )
+        response.headers["Content-Disposition"] = (
+            f"attachment; filename={cls.name}.{export_format}"
+        )
+        # Let nginx pass chunks through instead of spooling the whole export
+        response.headers["X-Accel-Buffering"] = "no"
+
+        return response
 
     @classmethod
     def validate_creation_params(cls, **kwargs) -> "list[str]":
         return []
 
     @classmethod
-    def _post_create_hook(cls, new_instance: IdModel):
-        pass
+    def _post_create_hook(cls, new_instance: IdModel) -> "list[str]":
+        """Runs once the new instance is built and added to the session,
+        before it is saved, errors roll both back. Building it may be costly,
+        a User hashes its password, so checks that need no instance belong
+        in `_pre_create_hook`."""
+        return []
 
     @classmethod
     def _pre_create_hook(cls) -> "list[str]":
         return []
 
+    @classmethod
+    def _post_update_hook(cls, item: IdModel):
+        pass
+
+    @classmethod
+    async def validate_creation_params_async(
+        cls, session: "AsyncSession", **kwargs
+    ) -> "list[str]":
+        return []
+
+    @classmethod
+    async def _pre_create_hook_async(cls, session: "AsyncSession") -> "list[str]":
+        return []
+
+    @classmethod
+    async def _post_create_hook_async(
+        cls, session: "AsyncSession", new_instance: IdModel
+    ) -> "list[str]":
+        return []
+
+    @classmethod
+    async def _post_update_hook_async(cls, session: "AsyncSession", item: IdModel):
+        pass
+
     @classmethod
     def create(cls):
         pre_create_errors = cls._pre_create_hook()
@@ -135,22 +794,126 @@ class IdModelView:
         if errors := cls.validate_creation_params(**params):
             return api_response(errors=list(errors))
 
-        new_instance = cls.model(**params).save()
+        new_instance = cls.model(**params)
+        db.session.add(new_instance)
 
-        cls._post_create_hook(new_instance)
+        if errors := cls._post_create_hook(new_instance):
+            db.session.rollback()
+            return api_response(errors=errors)
+
+        new_instance.save()
 
         return api_response(item=new_instance), 201
 
     @classmethod
-    def get_by_key(cls, key):
-        return cls.model.get_by_id(key)
+    async def create_async(cls, session: "AsyncSession"):
+        if errors := await cls._pre_create_hook_async(session):
+            return api_response(errors=errors)
+
+        required_params, rerrors = cls.filtered_params(cls.required_create_params, True)
+        optional_params, oerrors = cls.filtered_params(
+            cls.optional_create_params, False
+        )
+
+        if errors := list(rerrors | oerrors):
+            return api_response(errors=errors)
+
+        params = {**required_params, **optional_params}
+
+        if errors := await cls.validate_creation_params_async(session, **params):
+            return api_response(errors=list(errors))
+
+        new_instance = cls.model(**params)
+        session.add(new_instance)
+
+        if errors := await cls._post_create_hook_async(session, new_instance):
+            await session.rollback()
+            return api_response(errors=errors)
+
+        await session.flush()
+
+        return api_response(item=await cls.reload_async(session, new_instance)), 201
+
+    @staticmethod
+    async def reload_async(session: "AsyncSession", item: IdModel) -> IdModel:
+        """`item` with the columns the database set and the relationships
+        `serialize` needs loaded, which an `AsyncSession` can't lazy load."""
+        model = type(item)
+        stmt = (
+            model.select()
+            .where(model.id == item.id)
+            .execution_options(populate_existing=True)
+        )
+
+        return await session.scalar(stmt)
+
+    @classmethod
+    def get_by_key(cls, key, fields: "list[str] | None" = None):
+        return cls.model.get_by_id(key, fields)
+
+    @classmethod
+    def get_version_by_key(cls, key):
+        return cls.model.get_version(key)
+
+    @classmethod
+    async def get_by_key_async(
+        cls, session: "AsyncSession", key, fields: "list[str] | None" = None
+    ):
+        return await cls.model.get_by_id_async(session, key, fields)
+
+    @classmethod
+    async def get_version_by_key_async(cls, session: "AsyncSession", key):
+        return await cls.model.get_version_async(session, key)
+
+    @classmethod
+    def item_etag(cls, key, row_version: int, fields: "list[str] | None") -> str:
+        return f"{cls.name}-{key}-{row_version}-{','.join(fields or [])}"
 
     @classmethod
     def read(cls, key):
-        if (item := cls.get_by_key(key)) is None:
+        fields, errors = cls.requested_fields()
+
+        if errors:
+            return api_response(errors=errors), 400
+
+        if (version := cls.get_version_by_key(key)) is None:
             return api_response(errors=["Not found"]), 404
 
-        return api_response(item=item)
+        row_version, updated_at = version
+        etag = cls.item_etag(key, row_version, fields)
+
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
+
+        if (item := cls.get_by_key(key, fields)) is None:
+            return api_response(errors=["Not found"]), 404
+
+        return with_validators(
+            api_response(item=item.serialize(fields)), etag, updated_at
+        )
+
+    @classmethod
+    async def read_async(cls, session: "AsyncSession", key):
+        fields, errors = cls.requested_fields()
+
+        if errors:
+            return api_response(errors=errors), 400
+
+        if (version := await cls.get_version_by_key_async(session, key)) is None:
+            return api_response(errors=["Not found"]), 404
+
+        row_version, updated_at = version
+        etag = cls.item_etag(key, row_version, fields)
+
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
+
+        if (item := await cls.get_by_key_async(session, key, fields)) is None:
+            return api_response(errors=["Not found"]), 404
+
+        return with_validators(
+            api_response(item=item.serialize(fields)), etag, updated_at
+        )
 
     @classmethod
     def update(cls, key):
@@ -170,8 +933,32 @@ class IdModelView:
 
         item.save()
 
+        cls._post_update_hook(item)
+
         return api_response(item=item)
 
+    @classmethod
+    async def update_async(cls, session: "AsyncSession", key):
+        if len(cls.updatable_params) == 0:
+            return api_response(errors=["Not updatable"]), 405
+
+        if (item := await cls.get_by_key_async(session, key)) is None:
+            return api_response(errors=["Not found"]), 404
+
+        params, errors = cls.filtered_params(cls.updatable_params)
+
+        if len(errors):
+            return api_response(errors=list(errors))
+
+        for key, value in params.items():
+            setattr(item, key, value)
+
+        await session.flush()
+
+        await cls._post_update_hook_async(session, item)
+
+        return api_response(item=await cls.reload_async(session, item))
+
     @classmethod
     def delete(cls, key):
         if (item := cls.get_by_key(key)) is None:
@@ -181,6 +968,132 @@ class IdModelView:
 
         return api_response()
 
+    @classmethod
+    async def delete_async(cls, session: "AsyncSession", key):
+        if (item := await cls.get_by_key_async(session, key)) is None:
+            return api_response(errors=["Not found"]), 404
+
+        await session.delete(item)
+        await session.flush()
+
+        return api_response()
+
+    @classmethod
+    def batch_items(cls) -> "tuple[list[Any], list[str], int]":
+        """The request's `items`, or errors and a status when they are unusable."""
+        data = request.json
+
+        if not isinstance(data, dict) or not isinstance(data.get("items"), list):
+            return [], ["`items` must be a list"], 400
+
+        if not (items := data["items"]):
+            return [], ["`items` is empty"], 400
+
+        if len(items) > (max_size := current_app.config.get(BATCH_MAX_SIZE_KEY)):
+            return [], [f"At most {max_size} items per batch"], 413
+
+        return items, [], 200
+
+    @classmethod
+    def create_batch(cls):
+        items, errors, status = cls.batch_items()
+
+        if errors:
+            return api_response(errors=errors), status
+
+        rows = []
+        item_errors = []
+
+        for item in items:
+            required_params, rerrors = cls.filtered_params(
+                cls.required_create_params, True, item
+            )
+            optional_params, oerrors = cls.filtered_params(
+                cls.optional_create_params, False, item
+            )
+
+            errors = list(rerrors | oerrors)
+
+            if not errors:
+                params = {**required_params, **optional_params}
+                errors = list(cls.validate_creation_params(**params))
+                rows.append(params)
+
+            item_errors.append(errors)
+
+        # All or nothing, `item_errors` lines up with `items`
+        if any(item_errors):
+            return api_response(errors=["Invalid items"], item_errors=item_errors), 400
+
+        # sort_by_parameter_order would make SQLite insert row by row. Ids
+        # within one multi-row insert ascend in parameter order instead
+        stmt = insert(cls.model).returning(cls.model)
+        created = [None] * len(rows)
+
+        for indexes in rows_by_columns(rows):
+            instances = db.session.scalars(stmt, [rows[i] for i in indexes])
+
+            for i, instance in zip(indexes, sorted(instances, key=attrgetter("id"))):
+                created[i] = instance
+
+        db.commit()
+
+        return api_response(items=created), 201
+
+    @classmethod
+    def update_batch(cls):
+        if len(cls.updatable_params) == 0:
+            return api_response(errors=["Not updatable"]), 405
+
+        items, errors, status = cls.batch_items()
+
+        if errors:
+            return api_response(errors=errors), status
+
+        rows = []
+        item_errors = []
+
+        for item in items:
+            params, errors = cls.filtered_params(cls.updatable_params, False, item)
+            errors = list(errors)
+
+            if params is not None:
+                if type(key := item.get("id")) is not int:
+                    errors.append("`id` must be an integer")
+                elif errors:
+                    pass
+                elif not params:
+                    errors.append("Nothing to update")
+                else:
+                    rows.append({"id": key, **params})
+
+            item_errors.append(errors)
+
+        ids = {row["id"] for row in rows}
+        found = set(
+            db.session.scalars(select(cls.model.id).where(cls.model.id.in_(ids)))
+        )
+
+        for item, errors in zip(items, item_errors):
+            if not errors and item["id"] not in found:
+                errors.append("Not found")
+
+        if any(item_errors):
+            return api_response(errors=["Invalid items"], item_errors=item_errors), 400
+
+        for indexes in rows_by_columns(rows):
+            db.session.execute(update(cls.model), [rows[i] for i in indexes])
+
+        db.commit()
+
+        updated = cls.model.fetch_all(
+            cls.model.select()
+            .where(cls.model.id.in_(ids))
+            .execution_options(populate_existing=True)
+        )
+
+        return api_response(items=updated)
+
     @classmethod
     def register_view(cls, app: Scaffold):
         if cls.model is None:
@@ -192,5 +1105,43 @@ class IdModelView:
         items = ItemApi.as_view(f"{cls.name}-items", cls)
         group = GroupApi.as_view(f"{cls.name}-group", cls)
 
+        if cls.async_crud:
+            for name in ASYNC_VARIANTS:
+                overridden = (
+                    getattr(cls, name).__func__
+                    is not getattr(IdModelView, name).__func__
+                )
+                async_overridden = getattr(cls, f"{name}_async").__func__ is not (
+                    getattr(IdModelView, f"{name}_async").__func__
+                )
+
+                # The async path would skip whatever the override adds
+                if overridden and not async_overridden:
+                    raise Exception(f"{cls.__name__}.{name}_async must be defined")
+
+            # Served by `backend.asgi`, called with the session and URL values
+            items.async_methods = {
+                "GET": cls.read_async,
+                "PATCH": cls.update_async,
+                "DELETE": cls.delete_async,
+            }
+            group.async_methods = {"GET": cls.list_async, "POST": cls.create_async}
+
         app.add_url_rule(f"/{cls.name}/{cls.item_key}", view_func=items)
         app.add_url_rule(f"/{cls.name}", view_func=group)
+
+        if cls.exportable:
+            export = ExportApi.as_view(f"{cls.name}-export", cls)
+            app.add_url_rule(f"/{cls.name}/export", view_func=export)
+
+        if cls.batchable:
+            batch = BatchApi.as_view(f"{cls.name}-batch", cls)
+            app.add_url_rule(f"/{cls.name}/batch", view_func=batch)
+
+        if cls.change_feed:
+            events = EventsApi.as_view(f"{cls.name}-events", cls)
+            app.add_url_rule(f"/{cls.name}/events", view_func=events)
+
+        if cls.delta_sync:
+            changes = ChangesApi.as_view(f"{cls.name}-changes", cls)
+            app.add_url_rule(f"/{cls.name}/changes", view_func=changes)
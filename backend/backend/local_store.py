@@ -0,0 +1,54 @@
+import sqlite3
+from contextlib import contextmanager
+from os import getpid
+from threading import local
+
+
+class LocalStore:
+    """SQLite file shared by every worker process on the host.
+
+    Connections are opened per thread and reopened after a fork. Subclasses
+    describe their tables in `schema`.
+    """
+
+    schema: list[str] = []
+
+    def __init__(self) -> None:
+        self.path = None
+        self._local = local()
+
+    def open(self, path: str):
+        self.path = path
+        self._local = local()
+
+    def connection(self) -> sqlite3.Connection:
+        local = self._local
+
+        if getattr(local, "pid", None) != getpid():
+            local.connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            local.connection.execute("PRAGMA journal_mode=WAL")
+            local.connection.execute("PRAGMA synchronous=NORMAL")
+
+            for statement in self.schema:
+                local.connection.execute(statement)
+
+            local.pid = getpid()
+
+        return local.connection
+
+    @contextmanager
+    def transaction(self):
+        """Write transaction holding the file lock from the start, so
+        read-modify-write sequences cannot interleave across workers."""
+        connection = self.connection()
+        connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        connection.execute("COMMIT")
@@ -0,0 +1,247 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from threading import Lock
+from time import monotonic, perf_counter
+
+from flask import Flask, Response, g, has_request_context, request
+from sqlalchemy import Engine, event
+
+from .database import count_queries
+from .local_store import LocalStore
+
+METRICS_ENABLED_KEY = "METRICS_ENABLED"
+METRICS_DATABASE_KEY = "METRICS_DATABASE"
+SERVER_TIMING_KEY = "SERVER_TIMING_ENABLED"
+
+# Seconds between flushes of this worker's samples to the shared file
+FLUSH_INTERVAL = 2
+
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+FAMILIES = {
+    "http_requests_total": ("counter", "Responses by endpoint, method and status"),
+    "http_request_duration_seconds": ("histogram", "Time to build a response"),
+    "http_request_sql_queries_total": ("counter", "SQL statements run by requests"),
+    "http_request_phase_seconds_total": (
+        "counter",
+        "Time requests spent in sql, serialize and hash",
+    ),
+}
+
+
+class Metrics(LocalStore):
+    """Per endpoint request metrics, aggregated across workers.
+
+    Each worker adds its samples up in memory and flushes them into the
+    shared SQLite file every `FLUSH_INTERVAL` seconds. `/metrics` renders
+    the file, plus this worker's unflushed samples, in the Prometheus text
+    format.
+
+    Phases are timed with `timed`, SQL statements through engine events.
+    """
+
+    schema = [
+        """
+        CREATE TABLE IF NOT EXISTS samples (
+            family TEXT NOT NULL,
+            series TEXT NOT NULL,
+            labels TEXT NOT NULL,
+            value REAL NOT NULL,
+            PRIMARY KEY (series, labels)
+        )
+        """,
+    ]
+
+    def __init__(self, app: Flask | None = None) -> None:
+        super().__init__()
+        self.enabled = False
+        self.server_timing = False
+
+        self._pending: dict[tuple[str, str, str], float] = defaultdict(float)
+        self._pending_lock = Lock()
+        self._flushed = monotonic()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        self.enabled = app.config.get(METRICS_ENABLED_KEY, False)
+        self.server_timing = app.config.get(SERVER_TIMING_KEY, False)
+
+        if not (self.enabled or self.server_timing):
+            return
+
+        if self.enabled:
+            self.open(app.config.get(METRICS_DATABASE_KEY))
+            app.add_url_rule("/metrics", "metrics", self.render_response)
+
+        # Every engine, including ones created after this
+        if not event.contains(Engine, "before_cursor_execute", _before_query):
+            event.listen(Engine, "before_cursor_execute", _before_query)
+            event.listen(Engine, "after_cursor_execute", _after_query)
+
+        count_queries()
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    @contextmanager
+    def timed(self, phase: str):
+        """Adds the time spent in the block to the current request's `phase`."""
+        start = perf_counter()
+
+        try:
+            yield
+        finally:
+            add_phase_time(phase, perf_counter() - start)
+
+    def _start(self):
+        g.metrics_start = perf_counter()
+
+    def _finish(self, response: Response) -> Response:
+        if "metrics_start" not in g:
+            return response
+
+        duration = perf_counter() - g.metrics_start
+        phases = g.get("phase_times", {})
+
+        if self.server_timing:
+            response.headers["Server-Timing"] = ", ".join(
+                [
+                    f"{phase};dur={seconds * 1000:.2f}"
+                    for phase, seconds in phases.items()
+                ]
+                + [f"total;dur={duration * 1000:.2f}"]
+            )
+
+        if self.enabled:
+            self.observe(
+                request.endpoint or "none",
+                request.method,
+                response.status_code,
+                duration,
+                phases,
+                g.get("sql_queries", 0),
+            )
+
+        return response
+
+    def observe(
+        self,
+        endpoint: str,
+        method: str,
+        status: int,
+        duration: float,
+        phases: dict[str, float],
+        sql_queries: int,
+    ):
+        labels = f'endpoint="{endpoint}",method="{method}"'
+        latency = "http_request_duration_seconds"
+
+        samples = [
+            ("http_requests_total", "", f'{labels},status="{status}"', 1),
+            (latency, "_sum", labels, duration),
+            (latency, "_count", labels, 1),
+            (latency, "_bucket", f'{labels},le="+Inf"', 1),
+            ("http_request_sql_queries_total", "", labels, sql_queries),
+        ]
+        samples += [
+            (latency, "_bucket", f'{labels},le="{bound}"', 1)
+            for bound in BUCKETS
+            if duration <= bound
+        ]
+        samples += [
+            ("http_request_phase_seconds_total", "", f'{labels},phase="{phase}"', s)
+            for phase, s in phases.items()
+        ]
+
+        with self._pending_lock:
+            for family, suffix, sample_labels, value in samples:
+                self._pending[(family, family + suffix, sample_labels)] += value
+
+            if monotonic() - self._flushed < FLUSH_INTERVAL:
+                return
+
+            pending = self._pending
+            self._pending = defaultdict(float)
+            self._flushed = monotonic()
+
+        self._flush(pending)
+
+    def _flush(self, pending: dict[tuple[str, str, str], float]):
+        with self.transaction() as connection:
+            connection.executemany(
+                "INSERT INTO samples (family, series, labels, value) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT (series, labels) "
+                "DO UPDATE SET value = value + excluded.value",
+                [(*key, value) for key, value in pending.items()],
+            )
+
+    def samples(self) -> dict[tuple[str, str, str], float]:
+        """Every worker's flushed samples plus this worker's pending ones."""
+        with self._pending_lock:
+            pending = dict(self._pending)
+
+        rows = self.connection().execute(
+            "SELECT family, series, labels, value FROM samples"
+        )
+        samples = defaultdict(float, {(f, s, l): v for f, s, l, v in rows})
+
+        for key, value in pending.items():
+            samples[key] += value
+
+        return samples
+
+    def render(self) -> str:
+        by_family = defaultdict(list)
+
+        for (family, series, labels), value in self.samples().items():
+            by_family[family].append((series, labels, value))
+
+        lines = []
+
+        for family, samples in sorted(by_family.items()):
+            kind, description = FAMILIES[family]
+            lines.append(f"# HELP {family} {description}")
+            lines.append(f"# TYPE {family} {kind}")
+
+            for series, labels, value in sorted(samples, key=sample_order):
+                lines.append(f"{series}{{{labels}}} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+    def render_response(self) -> Response:
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+
+def sample_order(sample: tuple[str, str, float]):
+    """Groups a histogram's series by labels, with buckets in ascending order."""
+    series, labels, _ = sample
+    labels, _, bound = labels.partition(',le="')
+    bound = bound.rstrip('"')
+
+    return labels, series, float(bound) if bound else 0.0
+
+
+def add_phase_time(phase: str, seconds: float):
+    if not has_request_context():
+        return
+
+    if "phase_times" not in g:
+        g.phase_times = {}
+
+    g.phase_times[phase] = g.phase_times.get(phase, 0.0) + seconds
+
+
+def _before_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault("query_start", []).append(perf_counter())
+
+
+def _after_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and (starts := conn.info.get("query_start")):
+        add_phase_time("sql", perf_counter() - starts.pop())
+
+
+metrics = Metrics()
@@ -1,9 +1,32 @@
 from flask.json.provider import DefaultJSONProvider
 
-from .models import IdModel, Page
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .metrics import metrics
+from .models import Delta, IdModel, Page
+from .user_cache import UserSnapshot
 
 
 class ModelJsonProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        with metrics.timed("serialize"):
+            return self._dumps(obj, **kwargs)
+
+    def _dumps(self, obj, **kwargs):
+        # orjson has no indentation control, keep the stdlib for debug output
+        if orjson is None or "indent" in kwargs:
+            return super().dumps(obj, **kwargs)
+
+        option = orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME
+
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+
+        return orjson.dumps(obj, default=self.default, option=option).decode("utf-8")
+
     def default(self, o: object):
         if isinstance(o, IdModel):
             return o.serialize()
@@ -11,4 +34,10 @@ class ModelJsonProvider(DefaultJSONProvider):
         if isinstance(o, Page):
             return o.serialize()
 
+        if isinstance(o, Delta):
+            return o.serialize()
+
+        if isinstance(o, UserSnapshot):
+            return o.serialize()
+
         return super().default(o)
@@ -1,44 +1,453 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
 from dataclasses import dataclass
-from datetime import date
-from hashlib import pbkdf2_hmac
+from datetime import date, datetime
+from json import JSONDecodeError, dumps, loads
 from math import ceil
-from os import urandom
-from random import choice
+from operator import attrgetter, itemgetter
+from re import findall
+from secrets import choice
 from string import ascii_letters
-from typing import Optional, Self
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ClassVar,
+    Iterator,
+    Literal,
+    Optional,
+    Self,
+)
 
-from sqlalchemy import ForeignKey, func, select
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import (
+    ForeignKey,
+    Index,
+    and_,
+    column,
+    delete,
+    event,
+    func,
+    inspect,
+    literal_column,
+    or_,
+    select,
+    table,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import (
+    Mapped,
+    joinedload,
+    load_only,
+    mapped_column,
+    relationship,
+    selectinload,
+)
 
 from .database import db
+from .hashing import hasher
+
+if TYPE_CHECKING:
+    # Needs greenlet, only the ASGI app runs the `_async` methods
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values: list) -> str:
+    return urlsafe_b64encode(dumps(values).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, length: int) -> list:
+    try:
+        values = loads(urlsafe_b64decode(cursor.encode("ascii")))
+    except (BinasciiError, JSONDecodeError, UnicodeError, ValueError):
+        raise InvalidCursor("Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor("Invalid cursor")
+
+    # Sort column values, anything else would only reach the driver
+    if not all(value is None or isinstance(value, (int, str)) for value in values):
+        raise InvalidCursor("Invalid cursor")
+
+    return values
 
 
 @dataclass
 class Page[T]:
     items: list[T]
-    page_count: int
+    page_count: Optional[int]
     previous_page: Optional[int]
     next_page: Optional[int]
+    previous_cursor: Optional[str] = None
+    next_cursor: Optional[str] = None
+    count_exact: Optional[bool] = None
+    serializer: Optional[Callable[[T], dict]] = None
 
     def serialize(self):
+        items = self.items
+
+        if self.serializer is not None:
+            items = list(map(self.serializer, items))
+
         return {
-            "items": self.items,
+            "items": items,
             "page_count": self.page_count,
+            "count_exact": self.count_exact,
             "next_page": self.next_page,
             "previous_page": self.previous_page,
+            "next_cursor": self.next_cursor,
+            "previous_cursor": self.previous_cursor,
         }
 
 
+class TableCounter(db.Base):
+    """Row count and change counter of a table, kept current by triggers.
+
+    The triggers live in the migrations, so the counters are updated in the
+    same transaction as the write that changed the table.
+    """
+
+    __tablename__ = "table_counters"
+
+    table_name: Mapped[str] = mapped_column(primary_key=True)
+    row_count: Mapped[int] = mapped_column(nullable=False, default=0)
+    version: Mapped[int] = mapped_column(nullable=False, default=0)
+
+    @classmethod
+    def get_row_count(cls, table_name: str) -> int | None:
+        stmt = select(cls.row_count).where(cls.table_name == table_name)
+
+        return db.session.scalar(stmt)
+
+    @classmethod
+    def versions_statement(cls, table_names: list[str]):
+        return select(cls.table_name, cls.version).where(
+            cls.table_name.in_(table_names)
+        )
+
+    @classmethod
+    def get_versions(cls, table_names: list[str]) -> dict[str, int]:
+        return dict(db.session.execute(cls.versions_statement(table_names)).all())
+
+    @classmethod
+    async def get_versions_async(
+        cls, session: "AsyncSession", table_names: list[str]
+    ) -> dict[str, int]:
+        result = await session.execute(cls.versions_statement(table_names))
+
+        return dict(result.all())
+
+
+class Change(db.Base):
+    """Insert, update or delete of a row in a table with a change feed.
+
+    Written by triggers in the migrations, in the same transaction as the
+    write. Ids are never reused, so they order changes across tables and
+    serve as event ids. A `reset` has no row, it follows writes that went
+    around the triggers, like a bulk import.
+    """
+
+    __tablename__ = "changes"
+    __table_args__ = (
+        Index("ix_changes_table_name_id", "table_name", "id"),
+        {"sqlite_autoincrement": True},
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    table_name: Mapped[str] = mapped_column(nullable=False)
+    row_id: Mapped[Optional[int]] = mapped_column(nullable=True)
+    action: Mapped[str] = mapped_column(nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
+
+    @classmethod
+    def since(cls, table_name: str, after: int, limit: int) -> list[Self]:
+        stmt = (
+            select(cls)
+            .where(cls.table_name == table_name, cls.id > after)
+            .order_by(cls.id)
+            .limit(limit)
+        )
+
+        return list(db.session.scalars(stmt))
+
+    @classmethod
+    def first_id(cls) -> int | None:
+        """Oldest change still kept, of any table."""
+        return db.session.scalar(select(func.min(cls.id)))
+
+    @classmethod
+    def last_id(cls) -> int:
+        """Latest id handed out, even if that change was purged since."""
+        stmt = (
+            select(column("seq"))
+            .select_from(table("sqlite_sequence"))
+            .where(column("name") == cls.__tablename__)
+        )
+
+        return db.session.scalar(stmt) or 0
+
+    @classmethod
+    def purge(cls, before: datetime) -> int:
+        result = db.session.execute(delete(cls).where(cls.created_at < before))
+        db.commit()
+
+        return result.rowcount
+
+
+class Tombstone(db.Base):
+    """Id of a row deleted from a table with delta sync, at the change that
+    deleted it. Written by the delete triggers and removed if the id is
+    reused, so clients catching up from any point learn about deletes.
+    """
+
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        Index("ix_tombstones_table_name_change_seq", "table_name", "change_seq"),
+    )
+
+    table_name: Mapped[str] = mapped_column(primary_key=True)
+    row_id: Mapped[int] = mapped_column(primary_key=True)
+    change_seq: Mapped[int] = mapped_column(nullable=False)
+
+
+@dataclass
+class Delta[T]:
+    """Items changed and ids deleted after a change sequence number."""
+
+    items: list[T]
+    deleted: list[int]
+    next_since: int
+    has_more: bool
+    serializer: Optional[Callable[[T], dict]] = None
+
+    def serialize(self):
+        items = self.items
+
+        if self.serializer is not None:
+            items = list(map(self.serializer, items))
+
+        return {
+            "items": items,
+            "deleted": self.deleted,
+            "next_since": self.next_since,
+            "has_more": self.has_more,
+        }
+
+
+CountMode = Literal["exact", "counter", "estimated"]
+
+Serializer = Callable[[Any], dict]
+
+
+def compile_serializer(model: type["IdModel"], fields: tuple[str, ...]) -> Serializer:
+    """Builds a function turning an instance, or a result row with the same
+    attribute names, into a dict of `fields`.
+
+    Values come from a single `attrgetter` call and relationships to other
+    models are serialized inline with their own compiled serializer.
+    """
+    relationships = inspect(model).relationships
+    nested = {}
+
+    for index, name in enumerate(fields):
+        if name not in relationships:
+            continue
+
+        relationship = relationships[name]
+        related = relationship.mapper.class_
+
+        if not issubclass(related, IdModel):
+            continue
+
+        serializer = related.serializer()
+
+        if relationship.uselist:
+            nested[index] = lambda values, s=serializer: list(map(s, values))
+        else:
+            nested[index] = lambda value, s=serializer: (
+                None if value is None else s(value)
+            )
+
+    if len(fields) == 1 and not nested:
+        key = fields[0]
+        get = attrgetter(key)
+
+        return lambda o: {key: get(o)}
+
+    get = attrgetter(*fields)
+
+    if not nested:
+        return lambda o: dict(zip(fields, get(o)))
+
+    def serialize(o):
+        values = list(get(o)) if len(fields) > 1 else [get(o)]
+
+        for index, convert in nested.items():
+            values[index] = convert(values[index])
+
+        return dict(zip(fields, values))
+
+    return serialize
+
+
+def compile_row_serializer(fields: tuple[str, ...], positions: list[int]) -> Serializer:
+    """Like `compile_serializer` for result rows, reading values by position,
+    which is much cheaper than attribute access on a `Row`."""
+    if len(fields) == 1:
+        key = fields[0]
+        position = positions[0]
+
+        return lambda row: {key: row[position]}
+
+    get = itemgetter(*positions)
+
+    return lambda row: dict(zip(fields, get(row)))
+
+
 class IdModel(db.Base):
     __abstract__ = True
 
     serializable: list[str] = ["id"]
 
+    # How list endpoints size their pages, see `fast_count`
+    count_mode: ClassVar[CountMode] = "counter"
+
+    # Relationships that `serialize` touches, loaded up front to avoid N+1s
+    eager_load: ClassVar[list[str]] = []
+
     id: Mapped[int] = mapped_column(primary_key=True)
 
+    # Both are bumped by an update trigger, see the migrations
+    version: Mapped[int] = mapped_column(default=1, server_default="1")
+    updated_at: Mapped[Optional[datetime]] = mapped_column(default=func.now())
+
+    @classmethod
+    def dependent_tables(cls) -> list[str]:
+        """Tables whose changes can change this model's serialization."""
+        tables = [cls.__tablename__]
+
+        for name in cls.eager_load:
+            tables.append(getattr(cls, name).property.mapper.local_table.name)
+
+        return tables
+
+    @classmethod
+    def version_statement(cls, oid: int):
+        return select(cls.version, cls.updated_at).where(cls.id == oid)
+
+    @classmethod
+    def get_version(cls, oid: int) -> tuple[int, datetime | None] | None:
+        return db.session.execute(cls.version_statement(oid)).one_or_none()
+
+    @classmethod
+    async def get_version_async(
+        cls, session: "AsyncSession", oid: int
+    ) -> tuple[int, datetime | None] | None:
+        return (await session.execute(cls.version_statement(oid))).one_or_none()
+
+    @classmethod
+    def load_options(cls, fields: list[str] | None = None, extra_columns=()) -> list:
+        """Loader options for serializing `fields` (all of `serializable`
+        when None).
+
+        With a field subset only those columns are selected, plus any
+        `extra_columns` the caller needs, and only the relationships among
+        the fields are eager loaded.
+        """
+        options = []
+
+        if fields is not None:
+            column_names = inspect(cls).column_attrs.keys()
+            columns = [getattr(cls, name) for name in fields if name in column_names]
+
+            options.append(load_only(cls.id, *columns, *extra_columns))
+
+        for name in cls.eager_load:
+            if fields is not None and name not in fields:
+                continue
+
+            attribute = getattr(cls, name)
+
+            if attribute.property.uselist:
+                options.append(selectinload(attribute))
+            else:
+                options.append(joinedload(attribute))
+
+        return options
+
+    @classmethod
+    def projects_rows(cls, fields: list[str] | None) -> bool:
+        """Whether `fields` are plain columns, which can be served from
+        result rows without building ORM instances."""
+        if fields is None:
+            return False
+
+        column_names = inspect(cls).column_attrs.keys()
+
+        return all(name in column_names for name in fields)
+
+    @classmethod
+    def row_columns(cls, fields: list[str], extra_columns=()) -> list:
+        columns = [cls.id, *(getattr(cls, name) for name in fields), *extra_columns]
+
+        return list(dict.fromkeys(columns))
+
     @classmethod
-    def select(cls):
-        return select(cls)
+    def select(cls, fields: list[str] | None = None, extra_columns=()):
+        if cls.projects_rows(fields):
+            return select(*cls.row_columns(fields, extra_columns))
+
+        return select(cls).options(*cls.load_options(fields, extra_columns))
+
+    @classmethod
+    def fetch_all(cls, stmt, fields: list[str] | None = None) -> list:
+        if cls.projects_rows(fields):
+            return list(db.session.execute(stmt).all())
+
+        return list(db.session.scalars(stmt).all())
+
+    @classmethod
+    async def fetch_all_async(
+        cls, session: "AsyncSession", stmt, fields: list[str] | None = None
+    ) -> list:
+        if cls.projects_rows(fields):
+            return list((await session.execute(stmt)).all())
+
+        return list((await session.scalars(stmt)).all())
+
+    @classmethod
+    def serializer(cls, fields: list[str] | None = None) -> Serializer:
+        """Compiled serializer for `fields`, built once per field set."""
+        key = tuple(fields or cls.serializable)
+
+        if (serializer := cls.__dict__.get("_serializers", {}).get(key)) is None:
+            serializer = compile_serializer(cls, key)
+
+            if "_serializers" not in cls.__dict__:
+                cls._serializers = {}
+
+            cls._serializers[key] = serializer
+
+        return serializer
+
+    @classmethod
+    def page_serializer(cls, fields: list[str] | None, extra_columns=()) -> Serializer:
+        """Serializer for the items `fetch_all` returns for `select(fields,
+        extra_columns)`."""
+        if not cls.projects_rows(fields):
+            return cls.serializer(fields)
+
+        columns = cls.row_columns(fields, extra_columns)
+        positions = [columns.index(getattr(cls, name)) for name in fields]
+
+        return compile_row_serializer(tuple(fields), positions)
 
     @classmethod
     def count(cls) -> int:
@@ -48,14 +457,122 @@ class IdModel(db.Base):
         return res[0]
 
     @classmethod
-    def paginate(cls, page: int, per_page: int) -> Page[Self]:
-        stmt = (
-            cls.select().order_by(cls.id).offset((page - 1) * per_page).limit(per_page)
+    def estimated_count(cls) -> int:
+        # The largest id is a single index lookup and only overestimates
+        # by the number of deleted rows
+        stmt = select(func.max(cls.id))
+
+        return db.session.scalar(stmt) or 0
+
+    @classmethod
+    def fast_count(cls) -> tuple[int, bool]:
+        """Returns ``(count, exact)`` according to ``count_mode``.
+
+        Falls back to a full count when the table has no counter row.
+        """
+        if cls.count_mode == "estimated":
+            return cls.estimated_count(), False
+
+        if cls.count_mode == "counter":
+            if (count := TableCounter.get_row_count(cls.__tablename__)) is not None:
+                return count, True
+
+        return cls.count(), True
+
+    @classmethod
+    def count_where(cls, filters: list | None = None) -> tuple[int, bool]:
+        """Like `fast_count`, restricted to rows matching `filters`."""
+        if not filters:
+            return cls.fast_count()
+
+        stmt = select(func.count(cls.id)).where(*filters)
+
+        return db.session.scalar(stmt), True
+
+    @classmethod
+    async def count_where_async(
+        cls, session: "AsyncSession", filters: list | None = None
+    ) -> tuple[int, bool]:
+        """`count_where` on an `AsyncSession`."""
+        if not filters and cls.count_mode == "estimated":
+            return await session.scalar(select(func.max(cls.id))) or 0, False
+
+        if not filters and cls.count_mode == "counter":
+            stmt = select(TableCounter.row_count).where(
+                TableCounter.table_name == cls.__tablename__
+            )
+
+            if (count := await session.scalar(stmt)) is not None:
+                return count, True
+
+        stmt = select(func.count(cls.id)).where(*filters or [])
+
+        return await session.scalar(stmt), True
+
+    @classmethod
+    def page_statement(
+        cls,
+        page: int,
+        per_page: int,
+        fields: list[str] | None = None,
+        filters: list | None = None,
+        sort: str | None = None,
+        descending: bool = False,
+    ):
+        columns = cls.keyset_columns(sort)
+
+        return (
+            cls.select(fields)
+            .where(*filters or [])
+            .order_by(*(column.desc() if descending else column for column in columns))
+            .offset((page - 1) * per_page)
+            .limit(per_page)
         )
 
-        items = db.session.scalars(stmt).all()
+    @classmethod
+    def paginate(
+        cls,
+        page: int,
+        per_page: int,
+        fields: list[str] | None = None,
+        filters: list | None = None,
+        sort: str | None = None,
+        descending: bool = False,
+    ) -> Page[Self]:
+        stmt = cls.page_statement(page, per_page, fields, filters, sort, descending)
+
+        items = cls.fetch_all(stmt, fields)
 
-        item_count = cls.count()
+        return cls.offset_page(items, *cls.count_where(filters), page, per_page, fields)
+
+    @classmethod
+    async def paginate_async(
+        cls,
+        session: "AsyncSession",
+        page: int,
+        per_page: int,
+        fields: list[str] | None = None,
+        filters: list | None = None,
+        sort: str | None = None,
+        descending: bool = False,
+    ) -> Page[Self]:
+        stmt = cls.page_statement(page, per_page, fields, filters, sort, descending)
+
+        items = await cls.fetch_all_async(session, stmt, fields)
+        item_count, exact = await cls.count_where_async(session, filters)
+
+        return cls.offset_page(items, item_count, exact, page, per_page, fields)
+
+    @classmethod
+    def offset_page(
+        cls,
+        items: list,
+        item_count: int,
+        exact: bool,
+        page: int,
+        per_page: int,
+        fields: list[str] | None = None,
+    ) -> Page[Self]:
         page_count = ceil(item_count / per_page)
 
         return Page(
@@ -63,24 +580,270 @@ class IdModel(db.Base):
             page_count,
             page - 1 if page > 1 else None,
             page + 1 if page < page_count else None,
+            count_exact=exact,
+            serializer=cls.page_serializer(fields),
         )
 
-    def serialize(self):
-        return {key: getattr(self, key) for key in self.serializable}
+    @classmethod
+    def stream(
+        cls,
+        fields: list[str] | None = None,
+        filters: list | None = None,
+        sort: str | None = None,
+        descending: bool = False,
+        batch_size: int = 1000,
+    ) -> Iterator[dict]:
+        """Every matching item serialized, in ``(sort, id)`` order.
+
+        Rows are fetched `batch_size` at a time from one cursor, so memory
+        doesn't grow with the table. Instances nothing else references drop
+        out of the session's identity map as they are consumed.
+        """
+        columns = cls.keyset_columns(sort)
+        stmt = (
+            cls.select(fields)
+            .where(*filters or [])
+            .order_by(*(column.desc() if descending else column for column in columns))
+            .execution_options(yield_per=batch_size)
+        )
+
+        if cls.projects_rows(fields):
+            result = db.session.execute(stmt)
+        else:
+            result = db.session.scalars(stmt)
+
+        return map(cls.page_serializer(fields), result)
+
+    @classmethod
+    def keyset_columns(cls, sort: str | None = None) -> list:
+        """Order of a `sort` name, a column or a many-to-one relationship,
+        which sorts by its foreign key."""
+        if sort is None or sort == "id":
+            return [cls.id]
+
+        if (relationship := inspect(cls).relationships.get(sort)) is not None:
+            (column,) = relationship.local_columns
+            sort = column.key
+
+        return [getattr(cls, sort), cls.id]
+
+    @classmethod
+    def keyset_seek(cls, columns: list, values: list, reverse: bool = False) -> list:
+        """Conditions for the rows after `values` in `columns` order, or
+        before them when `reverse`, as consecutive runs of that order.
+
+        A row value comparison against NULL is never true and SQLite sorts
+        NULLs first, so a nullable sort column's NULL rows are their own
+        run. Each run is a range of the index, one OR would scan it instead.
+        """
+        if len(columns) == 1:
+            return [columns[0] < values[0] if reverse else columns[0] > values[0]]
+
+        column, oid = columns
+        value, last_id = values
+        key = tuple_(column, oid)
+
+        if value is None:
+            if reverse:
+                return [and_(column.is_(None), oid < last_id)]
+
+            return [and_(column.is_(None), oid > last_id), column.is_not(None)]
+
+        if reverse:
+            runs = [key < tuple_(value, last_id)]
+
+            return runs + [column.is_(None)] if column.expression.nullable else runs
+
+        return [key > tuple_(value, last_id)]
+
+    @classmethod
+    def keyset_statements(
+        cls,
+        per_page: int,
+        cursor: str | None = None,
+        reverse: bool = False,
+        fields: list[str] | None = None,
+        filters: list | None = None,
+        sort: str | None = None,
+    ) -> list:
+        """Queries for up to `per_page + 1` rows each after `cursor` in
+        ``(sort, id)`` order, or before it when `reverse` is set. Their
+        results follow on from one another."""
+        columns = cls.keyset_columns(sort)
+
+        stmt = cls.select(fields, columns).where(*filters or [])
+        stmt = stmt.order_by(
+            *(column.desc() if reverse else column.asc() for column in columns)
+        ).limit(per_page + 1)
+
+        if not cursor:
+            return [stmt]
+
+        values = decode_cursor(cursor, len(columns))
+
+        return [
+            stmt.where(condition)
+            for condition in cls.keyset_seek(columns, values, reverse)
+        ]
+
+    @classmethod
+    def paginate_keyset(
+        cls,
+        per_page: int,
+        after: str | None = None,
+        before: str | None = None,
+        sort: str | None = None,
+        descending: bool = False,
+        with_count: bool = False,
+        fields: list[str] | None = None,
+        filters: list | None = None,
+    ) -> Page[Self]:
+        """Seek pagination over ``(sort, id)``.
+
+        Each page is a range scan starting from the cursor instead of an
+        OFFSET, so deep pages cost the same as the first one. The total
+        count is only computed when ``with_count`` is set.
+        """
+        columns = cls.keyset_columns(sort)
+
+        backwards = before is not None
+        cursor = before if backwards else after
+
+        # Walking backwards is a forward seek over the reversed order
+        reverse = descending != backwards
+
+        items = []
+
+        for stmt in cls.keyset_statements(
+            per_page, cursor, reverse, fields, filters, sort
+        ):
+            items += cls.fetch_all(stmt, fields)
+
+            if len(items) > per_page:
+                break
+
+        has_more = len(items) > per_page
+        items = items[:per_page]
+
+        if backwards:
+            items.reverse()
+
+        def cursor_for(item):
+            return encode_cursor([getattr(item, column.key) for column in columns])
+
+        next_cursor = None
+        previous_cursor = None
+
+        if items:
+            if has_more or backwards:
+                next_cursor = cursor_for(items[-1])
+
+            if (has_more and backwards) or (not backwards and cursor):
+                previous_cursor = cursor_for(items[0])
+
+        page_count = None
+        exact = None
+
+        if with_count:
+            item_count, exact = cls.count_where(filters)
+            page_count = ceil(item_count / per_page)
+
+        return Page(
+            items,
+            page_count,
+            None,
+            None,
+            previous_cursor,
+            next_cursor,
+            exact,
+            cls.page_serializer(fields, columns),
+        )
+
+    @classmethod
+    def changes_statement(cls, since: int, limit: int, fields: list[str] | None = None):
+        return (
+            cls.select(fields, [cls.change_seq])
+            .where(cls.change_seq > since)
+            .order_by(cls.change_seq)
+            .limit(limit)
+        )
+
+    @classmethod
+    def tombstones_statement(cls, since: int, limit: int):
+        return (
+            select(Tombstone.row_id, Tombstone.change_seq)
+            .where(
+                Tombstone.table_name == cls.__tablename__,
+                Tombstone.change_seq > since,
+            )
+            .order_by(Tombstone.change_seq)
+            .limit(limit)
+        )
+
+    @classmethod
+    def changes_since(
+        cls, since: int, limit: int, fields: list[str] | None = None
+    ) -> Delta:
+        """The first `limit` writes and deletes after change `since`.
+
+        Only for models with a `change_seq` column kept by triggers, see the
+        migrations. Items carry their `id` and `change_seq`.
+        """
+        # One past `limit` from each, whether more follow can only be told
+        # from the merged list
+        items = cls.fetch_all(cls.changes_statement(since, limit + 1, fields), fields)
+        deleted = db.session.execute(cls.tombstones_statement(since, limit + 1)).all()
+
+        # Each list holds its own first `limit + 1`, so the merged first
+        # `limit + 1` are the first of both
+        changes = sorted(
+            [(item.change_seq, item, False) for item in items]
+            + [(change_seq, row_id, True) for row_id, change_seq in deleted],
+            key=itemgetter(0),
+        )
+        taken = changes[:limit]
+
+        serialize = cls.page_serializer(fields, [cls.change_seq])
+
+        return Delta(
+            [change for _, change, tombstone in taken if not tombstone],
+            [change for _, change, tombstone in taken if tombstone],
+            taken[-1][0] if taken else since,
+            len(changes) > limit,
+            lambda item: {
+                "id": item.id,
+                "change_seq": item.change_seq,
+                **serialize(item),
+            },
+        )
+
+    def serialize(self, fields: list[str] | None = None):
+        return self.serializer(fields)(self)
 
     def save(self):
         db.session.add(self)
-        db.session.commit()
+        db.commit()
 
         return self
 
     def delete(self):
         db.session.delete(self)
-        db.session.commit()
+        db.commit()
 
     @classmethod
-    def get_by_id(cls, oid: int):
-        return db.session.get(cls, oid)
+    def get_by_id(cls, oid: int, fields: list[str] | None = None):
+        return db.session.get(cls, oid, options=cls.load_options(fields))
+
+    @classmethod
+    async def get_by_id_async(
+        cls, session: "AsyncSession", oid: int, fields: list[str] | None = None
+    ):
+        return await session.get(cls, oid, options=cls.load_options(fields))
+
+
+@event.listens_for(IdModel, "mapper_configured", propagate=True)
+def _compile_default_serializer(mapper, cls):
+    cls.serializer()
 
 
 class User(IdModel):
@@ -88,6 +851,7 @@ class User(IdModel):
 
     def _set_password(self, password: str):
         self.password_hash = self.hash_password(password)
+        self.session_version = (self.session_version or 0) + 1
 
     serializable = ["username"]
 
@@ -98,6 +862,9 @@ class User(IdModel):
 
     admin: Mapped[bool] = mapped_column(default=False)
 
+    # Bumped whenever existing sessions for this user must stop working
+    session_version: Mapped[int] = mapped_column(default=0, server_default="0")
+
     assignments: Mapped[list["Submission"]] = relationship(back_populates="assignee")
 
     def __init__(self, username: str, password: str):
@@ -108,17 +875,20 @@ class User(IdModel):
     def validate_password(cls, password: str):
         return len(password) >= 8
 
-    def hash_password(self, password: str, salt: str | bytes | None = None):
-        if salt is None:
-            salt = urandom(32)
-
-        key = pbkdf2_hmac("sha256", password.encode("utf-8"), salt, 100000)
-        return salt + key
+    def hash_password(self, password: str):
+        return hasher.hash(password)
 
     def check_password(self, password: str):
-        salt = self.password_hash[:32]
+        return hasher.verify(password, self.password_hash)
 
-        return self.hash_password(password, salt) == self.password_hash
+    def upgrade_password_hash(self, password: str):
+        """Rehashes with the current parameters after a successful login.
+
+        Unlike setting `password` this keeps existing sessions valid.
+        """
+        if hasher.needs_rehash(self.password_hash):
+            self.password_hash = self.hash_password(password)
+            self.save()
 
     @classmethod
     def get_by_username(cls, username: str):
@@ -126,14 +896,87 @@ class User(IdModel):
 
         return db.session.scalar(stmt)
 
+    @classmethod
+    async def get_by_username_async(cls, session: "AsyncSession", username: str):
+        stmt = cls.select().where(cls.username == username)
+
+        return await session.scalar(stmt)
+
+    @classmethod
+    def get_version_by_username(cls, username: str):
+        stmt = select(cls.version, cls.updated_at).where(cls.username == username)
+
+        return db.session.execute(stmt).one_or_none()
+
     def __repr__(self):
         return f"<User: {self.username}>"
 
 
+# FTS5 index over submissions, created and kept in sync by the migrations
+submissions_fts = table("submissions_fts", column("rowid"), column("rank"))
+
+
+def fts_query(query: str) -> str | None:
+    """Turns free text into an FTS5 query matching every word as a prefix.
+
+    Quoting each word keeps FTS5 operators and syntax errors out of user
+    input.
+    """
+    words = findall(r"\w+", query)
+
+    if not words:
+        return None
+
+    return " ".join(f'"{word}"*' for word in words)
+
+
 class Submission(IdModel):
     __tablename__ = "submissions"
+    __table_args__ = (
+        Index("ix_submissions_reviewed_resolved_id", "reviewed", "resolved", "id"),
+        Index("ix_submissions_reviewed_id", "reviewed", "id"),
+        Index("ix_submissions_resolved_id", "resolved", "id"),
+        Index("ix_submissions_assignee_id_id", "assignee_id", "id"),
+        # An assignee's submissions sorted by the other filter columns
+        Index(
+            "ix_submissions_assignee_id_reviewed_id", "assignee_id", "reviewed", "id"
+        ),
+        Index(
+            "ix_submissions_assignee_id_resolved_id", "assignee_id", "resolved", "id"
+        ),
+        Index(
+            "ix_submissions_assignee_id_reviewed_resolved_id",
+            "assignee_id",
+            "reviewed",
+            "resolved",
+            "id",
+        ),
+        Index(
+            "ix_submissions_assignee_id_resolved_reviewed_id",
+            "assignee_id",
+            "resolved",
+            "reviewed",
+            "id",
+        ),
+        # Submissions filtered by status sorted by the other filter columns
+        Index(
+            "ix_submissions_reviewed_assignee_id_id", "reviewed", "assignee_id", "id"
+        ),
+        Index(
+            "ix_submissions_resolved_assignee_id_id", "resolved", "assignee_id", "id"
+        ),
+        Index("ix_submissions_resolved_reviewed_id", "resolved", "reviewed", "id"),
+        Index(
+            "ix_submissions_reviewed_resolved_assignee_id_id",
+            "reviewed",
+            "resolved",
+            "assignee_id",
+            "id",
+        ),
+    )
 
     serializable = ["title", "description", "reviewed", "assignee", "resolved"]
+    eager_load = ["assignee"]
 
     title: Mapped[str] = mapped_column(nullable=False)
     description: Mapped[Optional[str]] = mapped_column(nullable=True)
@@ -144,29 +987,234 @@ class Submission(IdModel):
     assignee: Mapped[Optional["User"]] = relationship(back_populates="assignments")
     resolved: Mapped[bool] = mapped_column(nullable=False, default=False)
 
+    # Id of the row's latest change, set by triggers, see `changes_since`
+    change_seq: Mapped[Optional[int]] = mapped_column(nullable=True, index=True)
+
     def __init__(self, title: str, description: Optional[str]):
         self.title = title
         self.description = description
 
+    @classmethod
+    def search(
+        cls,
+        query: str,
+        page: int,
+        per_page: int,
+        fields: list[str] | None = None,
+        filters: list | None = None,
+    ) -> Page[Self]:
+        """Best matches first, each item with a `snippet` of matching text
+        where hits are wrapped in square brackets."""
+        if (match := fts_query(query)) is None:
+            return Page([], 0, None, None, count_exact=True)
+
+        matches = literal_column("submissions_fts").match(match)
+        snippet = func.snippet(
+            literal_column("submissions_fts"), -1, "[", "]", "…", 16
+        ).label("snippet")
+
+        stmt = (
+            cls.select(fields)
+            .add_columns(snippet)
+            .join(submissions_fts, submissions_fts.c.rowid == cls.id)
+            .where(matches, *filters or [])
+            .order_by(submissions_fts.c.rank)
+            .offset((page - 1) * per_page)
+            .limit(per_page)
+        )
+
+        items = list(db.session.execute(stmt).all())
+
+        count_stmt = (
+            select(func.count())
+            .select_from(submissions_fts)
+            .join(cls, submissions_fts.c.rowid == cls.id)
+            .where(matches, *filters or [])
+        )
+        page_count = ceil(db.session.scalar(count_stmt) / per_page)
+
+        serialize = cls.page_serializer(fields)
+
+        if cls.projects_rows(fields):
+            serializer = lambda row: {**serialize(row), "snippet": row[-1]}
+        else:
+            serializer = lambda row: {**serialize(row[0]), "snippet": row[1]}
+
+        return Page(
+            items,
+            page_count,
+            page - 1 if page > 1 else None,
+            page + 1 if page < page_count else None,
+            count_exact=True,
+            serializer=serializer,
+        )
+
+
+class ReviewerLoad(db.Base):
+    """Unresolved submissions assigned to a user, and their share of new ones.
+
+    Kept current by triggers in the migrations, like `TableCounter`, so the
+    assigner never has to count `User.assignments`. Rows are created on a
+    user's first assignment or weight, a missing row is no open work at
+    weight 1.
+    """
+
+    __tablename__ = "reviewer_loads"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    open_assignments: Mapped[int] = mapped_column(
+        nullable=False, default=0, server_default="0"
+    )
+    # Relative share of new assignments, 0 stops them
+    weight: Mapped[int] = mapped_column(nullable=False, default=1, server_default="1")
+
+    @classmethod
+    def reviewers_statement(cls):
+        weight = func.coalesce(cls.weight, 1)
+
+        return (
+            select(User.id, func.coalesce(cls.open_assignments, 0), weight)
+            .outerjoin(cls, cls.user_id == User.id)
+            .where(User.admin == True, weight > 0)
+            .order_by(User.id)
+        )
+
+    @classmethod
+    def reviewers(cls) -> list[tuple[int, int, int]]:
+        """User id, open assignments and weight of admins taking new work."""
+        return [tuple(row) for row in db.session.execute(cls.reviewers_statement())]
+
+    @classmethod
+    async def reviewers_async(
+        cls, session: "AsyncSession"
+    ) -> list[tuple[int, int, int]]:
+        result = await session.execute(cls.reviewers_statement())
+
+        return [tuple(row) for row in result]
+
+    @classmethod
+    def set_weight(cls, user_id: int, weight: int):
+        stmt = (
+            sqlite_insert(cls)
+            .values(user_id=user_id, weight=weight)
+            .on_conflict_do_update(
+                index_elements=[cls.user_id], set_={"weight": weight}
+            )
+        )
+        db.session.execute(stmt)
+        db.commit()
+
+    @classmethod
+    def recount(cls) -> dict[int, int]:
+        """Resets the counters from the submissions, after writes that went
+        around the triggers. Returns the open assignments per user."""
+        counts = dict(
+            db.session.execute(
+                select(Submission.assignee_id, func.count())
+                .where(Submission.assignee_id.is_not(None))
+                .where(Submission.resolved == False)
+                .group_by(Submission.assignee_id)
+            ).all()
+        )
+
+        db.session.execute(update(cls).values(open_assignments=0))
+
+        if counts:
+            stmt = sqlite_insert(cls)
+            db.session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[cls.user_id],
+                    set_={"open_assignments": stmt.excluded.open_assignments},
+                ),
+                [
+                    {"user_id": user_id, "open_assignments": count}
+                    for user_id, count in counts.items()
+                ],
+            )
+
+        return counts
+
+
+INVITE_CODE_LENGTH = 12
+
+
+def invite_code() -> str:
+    return "".join(choice(ascii_letters) for _ in range(INVITE_CODE_LENGTH))
+
 
 class Invite(IdModel):
     __tablename__ = "invites"
 
-    code: Mapped[str] = mapped_column(nullable=False)
+    code: Mapped[str] = mapped_column(nullable=False, unique=True, index=True)
     expiration: Mapped[date] = mapped_column(nullable=False)
     used: Mapped[bool] = mapped_column(default=False)
 
     def __init__(self, expiration: date):
-        self.code = "".join(choice(ascii_letters) for _ in range(8))
+        self.code = invite_code()
         self.expiration = expiration
 
     @classmethod
-    def get_active_invite(cls, code: str):
+    def create_many(cls, count: int, expiration: date) -> list[str]:
+        """Inserts `count` new invites and returns their codes.
+
+        Each round is one multi-row INSERT. Codes that collide with existing
+        ones are skipped by the unique index and drawn again.
+        """
+        codes = []
+
+        while len(codes) < count:
+            stmt = (
+                sqlite_insert(cls.__table__)
+                .on_conflict_do_nothing(index_elements=[cls.code])
+                .returning(cls.code)
+            )
+            rows = [
+                {"code": invite_code(), "expiration": expiration, "used": False}
+                for _ in range(count - len(codes))
+            ]
+
+            codes.extend(db.session.scalars(stmt, rows))
+
+        db.commit()
+
+        return codes
+
+    @classmethod
+    def purge(cls) -> int:
+        """Deletes used and expired invites, returning how many."""
+        stmt = delete(cls).where(or_(cls.used == True, cls.expiration < func.now()))
+        deleted = db.session.execute(stmt).rowcount
+        db.commit()
+
+        return deleted
+
+    @classmethod
+    def is_active(cls, code: str) -> bool:
+        """Whether an unused, unexpired invite has `code`. Only a cheap early
+        check, `claim` decides."""
         stmt = (
-            cls.select()
+            select(cls.id)
             .where(cls.expiration >= func.now())
             .where(cls.used == False)
             .where(cls.code == code)
         )
 
-        return db.session.scalar(stmt)
+        return db.session.scalar(stmt) is not None
+
+    @classmethod
+    def claim(cls, code: str) -> bool:
+        """Marks an active invite used, if it still is.
+
+        One guarded UPDATE rather than a lookup then a save, so of two
+        registrations racing for the same code only one matches the row.
+        """
+        stmt = (
+            update(cls)
+            .where(cls.expiration >= func.now())
+            .where(cls.used == False)
+            .where(cls.code == code)
+            .values(used=True)
+            .execution_options(synchronize_session=False)
+        )
+
+        return db.session.execute(stmt).rowcount == 1
@@ -0,0 +1,163 @@
+from asyncio import to_thread
+from functools import wraps
+from inspect import iscoroutinefunction
+from time import monotonic, time
+
+from flask import Flask, current_app, request
+
+from .local_store import LocalStore
+
+RATE_LIMIT_ENABLED_KEY = "RATE_LIMIT_ENABLED"
+RATE_LIMIT_DATABASE_KEY = "RATE_LIMIT_DATABASE"
+
+# Seconds between purges of a scope's idle buckets, per worker
+PURGE_INTERVAL = 60
+
+
+class RateLimiter(LocalStore):
+    """Token buckets stored in a local SQLite file.
+
+    Every gunicorn worker opens the same file, so limits hold across
+    workers without an external service. Buckets are read and refilled
+    inside one write transaction, which serialises concurrent hits on the
+    file lock.
+
+    Keys come from request bodies, so buckets that have refilled are
+    purged every `PURGE_INTERVAL` seconds to keep the file from growing
+    with each username tried.
+    """
+
+    schema = [
+        """
+        CREATE TABLE IF NOT EXISTS buckets (
+            key TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_buckets_updated ON buckets (updated)",
+    ]
+
+    def __init__(self, app: Flask | None = None) -> None:
+        super().__init__()
+        self.enabled = False
+        self._purged: dict[str, float] = {}
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        self.enabled = app.config.get(RATE_LIMIT_ENABLED_KEY, True)
+        self.open(app.config.get(RATE_LIMIT_DATABASE_KEY))
+
+    def hit(self, key: str, per_minute: float, burst: int) -> float | None:
+        """Takes a token from `key`'s bucket.
+
+        Returns None when allowed, otherwise the seconds until a token is
+        available again.
+        """
+        rate = per_minute / 60
+        now = time()
+
+        with self.transaction() as connection:
+            row = connection.execute(
+                "SELECT tokens, updated FROM buckets WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                tokens = burst
+            else:
+                tokens = min(burst, row[0] + (now - row[1]) * rate)
+
+            allowed = tokens >= 1
+
+            if allowed:
+                tokens -= 1
+
+            connection.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+
+        if allowed:
+            return None
+
+        return (1 - tokens) / rate
+
+    def purge(self, scope: str, per_minute: float, burst: int) -> int:
+        """Deletes `scope`'s buckets idle long enough to be full again, which
+        behave like missing ones. Returns how many."""
+        refilled = time() - burst / (per_minute / 60)
+
+        with self.transaction() as connection:
+            return connection.execute(
+                "DELETE FROM buckets WHERE updated < ? AND key LIKE ?",
+                (refilled, f"{scope}:%"),
+            ).rowcount
+
+    def check(self, scope: str, key_params: list[str] | None = None):
+        """Takes a token from each of the request's buckets in `scope`.
+
+        Raises `RateLimited` when one is empty.
+        """
+        config = current_app.config
+        per_minute = config[f"{scope.upper()}_RATE_LIMIT_PER_MINUTE"]
+        burst = config[f"{scope.upper()}_RATE_LIMIT_BURST"]
+
+        if monotonic() - self._purged.get(scope, 0) >= PURGE_INTERVAL:
+            self._purged[scope] = monotonic()
+            self.purge(scope, per_minute, burst)
+
+        keys = [f"{scope}:ip:{request.remote_addr}"]
+
+        data = request.get_json(silent=True)
+
+        for param in key_params or []:
+            if isinstance(data, dict) and isinstance(data.get(param), str):
+                keys.append(f"{scope}:{param}:{data[param].lower()}")
+
+        for key in keys:
+            if (retry_after := self.hit(key, per_minute, burst)) is not None:
+                raise RateLimited(retry_after)
+
+    def limit(self, scope: str, key_params: list[str] | None = None):
+        """Limits a view per client address and per value of each of the
+        `key_params` in the JSON body.
+
+        Limits come from `<SCOPE>_RATE_LIMIT_PER_MINUTE` and
+        `<SCOPE>_RATE_LIMIT_BURST` in the config. Coroutine views check
+        them in a thread, since the buckets live in a blocking SQLite file.
+        """
+
+        def decorator(func):
+            if iscoroutinefunction(func):
+
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    if self.enabled:
+                        # Copies the context, the request included
+                        await to_thread(self.check, scope, key_params)
+
+                    return await func(*args, **kwargs)
+
+                return async_wrapper
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if self.enabled:
+                    self.check(scope, key_params)
+
+                return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: float) -> None:
+        super().__init__("Rate limit exceeded")
+        self.retry_after = retry_after
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,144 @@
+from threading import Lock
+from time import monotonic, time
+
+from flask import Flask
+
+from .local_store import LocalStore
+
+RESPONSE_CACHE_ENABLED_KEY = "RESPONSE_CACHE_ENABLED"
+RESPONSE_CACHE_DATABASE_KEY = "RESPONSE_CACHE_DATABASE"
+RESPONSE_CACHE_MAX_ENTRIES_KEY = "RESPONSE_CACHE_MAX_ENTRIES"
+
+# Seconds between refreshes of an entry's LRU timestamp and between flushes
+# of this worker's hit/miss counts, to keep hits mostly read-only
+TOUCH_INTERVAL = 5
+
+
+class ResponseCache(LocalStore):
+    """Rendered list responses shared by every worker through a SQLite file.
+
+    Keys embed the change counters of the tables a response was built from
+    (see `IdModelView.list_etag`), so any committed write makes the old
+    entries unreachable. Entries of a view built from older counters are
+    removed when a newer one is stored, and the least recently used are
+    evicted past `max_entries`.
+    """
+
+    schema = [
+        """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            view TEXT NOT NULL,
+            versions TEXT NOT NULL,
+            body BLOB NOT NULL,
+            used REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS responses_used ON responses (used)",
+        "CREATE INDEX IF NOT EXISTS responses_view ON responses (view, versions)",
+        """
+        CREATE TABLE IF NOT EXISTS stats (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+        """,
+    ]
+
+    def __init__(self, app: Flask | None = None) -> None:
+        super().__init__()
+        self.enabled = False
+        self.max_entries = 0
+
+        self._pending = {"hits": 0, "misses": 0}
+        self._pending_lock = Lock()
+        self._flushed = monotonic()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        self.enabled = app.config.get(RESPONSE_CACHE_ENABLED_KEY, False)
+        self.max_entries = app.config.get(RESPONSE_CACHE_MAX_ENTRIES_KEY, 1000)
+        self.open(app.config.get(RESPONSE_CACHE_DATABASE_KEY))
+
+    def get(self, key: str) -> bytes | None:
+        row = (
+            self.connection()
+            .execute("SELECT body, used FROM responses WHERE key = ?", (key,))
+            .fetchone()
+        )
+
+        self._count("hits" if row is not None else "misses")
+
+        if row is None:
+            return None
+
+        body, used = row
+
+        if time() - used > TOUCH_INTERVAL:
+            with self.transaction() as connection:
+                connection.execute(
+                    "UPDATE responses SET used = ? WHERE key = ?", (time(), key)
+                )
+
+        return body
+
+    def put(self, key: str, view: str, versions: str, body: bytes):
+        with self.transaction() as connection:
+            connection.execute(
+                "DELETE FROM responses WHERE view = ? AND versions != ?",
+                (view, versions),
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, view, versions, body, used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, view, versions, body, time()),
+            )
+            connection.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def _count(self, name: str):
+        with self._pending_lock:
+            self._pending[name] += 1
+
+            if monotonic() - self._flushed < TOUCH_INTERVAL:
+                return
+
+            pending = self._pending
+            self._pending = {"hits": 0, "misses": 0}
+            self._flushed = monotonic()
+
+        self._flush(pending)
+
+    def _flush(self, pending: dict[str, int]):
+        with self.transaction() as connection:
+            for name, value in pending.items():
+                connection.execute(
+                    "INSERT INTO stats (name, value) VALUES (?, ?) "
+                    "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+                    (name, value),
+                )
+
+    def stats(self) -> dict[str, int]:
+        """Hit and miss counts of every worker, plus this worker's unflushed
+        ones, and the current number of entries."""
+        with self._pending_lock:
+            pending = dict(self._pending)
+
+        connection = self.connection()
+        stats = dict(connection.execute("SELECT name, value FROM stats").fetchall())
+
+        for name, value in pending.items():
+            stats[name] = stats.get(name, 0) + value
+
+        stats["entries"] = connection.execute(
+            "SELECT count(*) FROM responses"
+        ).fetchone()[0]
+
+        return stats
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,101 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from time import monotonic
+from typing import ClassVar
+
+from flask import Flask
+
+USER_CACHE_SIZE_KEY = "USER_CACHE_SIZE"
+USER_CACHE_TTL_KEY = "USER_CACHE_TTL"
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Detached copy of the fields authentication needs from a `User`."""
+
+    serializable: ClassVar[list[str]] = ["username"]
+
+    id: int
+    username: str
+    admin: bool
+    session_version: int
+
+    @classmethod
+    def of(cls, user) -> "UserSnapshot":
+        return cls(user.id, user.username, user.admin, user.session_version)
+
+    def serialize(self):
+        return {key: getattr(self, key) for key in self.serializable}
+
+
+class UserCache:
+    """Per worker LRU of user snapshots with a TTL.
+
+    Entries are only valid for the version of the users table they were
+    read at. Triggers bump it on every write, by any worker, so a password
+    change or delete anywhere empties every worker's cache on its next
+    lookup.
+    """
+
+    def __init__(self, app: Flask | None = None) -> None:
+        self.max_size = 0
+        self.ttl = 0.0
+        self._entries: OrderedDict[int, tuple[float, UserSnapshot]] = OrderedDict()
+        self._version: int | None = None
+        self._lock = Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        self.max_size = app.config.get(USER_CACHE_SIZE_KEY, 1024)
+        self.ttl = app.config.get(USER_CACHE_TTL_KEY, 30)
+        self.clear()
+
+    def get(self, user_id: int, version: int | None) -> UserSnapshot | None:
+        """The cached snapshot, if the users table is still at `version`."""
+        with self._lock:
+            if version is None or version != self._version:
+                self._entries.clear()
+                self._version = version
+                return None
+
+            if (entry := self._entries.get(user_id)) is None:
+                return None
+
+            expires, snapshot = entry
+
+            if expires < monotonic():
+                del self._entries[user_id]
+                return None
+
+            self._entries.move_to_end(user_id)
+
+            return snapshot
+
+    def put(self, snapshot: UserSnapshot, version: int | None) -> UserSnapshot:
+        """Caches `snapshot`, read at users table `version`, unless the table
+        has changed again since the last `get`."""
+        if self.max_size <= 0:
+            return snapshot
+
+        with self._lock:
+            if version is None or version != self._version:
+                return snapshot
+
+            self._entries[snapshot.id] = (monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end(snapshot.id)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        return snapshot
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+
+user_cache = UserCache()
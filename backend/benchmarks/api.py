@@ -0,0 +1,373 @@
+"""End to end API benchmark.
+
+    python -m benchmarks.api [--users 100] [--submissions 100000]
+        [--mode inprocess|gunicorn|both] [--concurrency 8] [--requests 400]
+        [--gunicorn-workers 4] [--scenario NAME ...] [--output results.json]
+
+Builds a fresh migrated database seeded with `flask seed`, then drives the
+real endpoints, in process through the test client and/or over HTTP against
+gunicorn. Each scenario sends `--requests` requests from `--concurrency`
+logged in clients and reports latency percentiles, throughput, queries per
+request (from X-Query-Count) and response statuses.
+
+The output is JSON with the current commit, meant to be kept and compared
+between commits. Environment variables still configure the app, e.g.
+PASSWORD_HASH_ITERATIONS or RESPONSE_CACHE_ENABLED=0.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from itertools import count
+from random import Random
+from statistics import fmean, quantiles
+from threading import Lock
+from time import perf_counter, sleep
+
+PASSWORD = "benchmark"
+
+SCENARIOS = [
+    "session_login",
+    "session_read",
+    "submissions_list",
+    "submissions_list_filtered",
+    "submissions_list_keyset",
+    "submissions_read",
+    "submissions_create",
+    "submissions_patch",
+    "users_read",
+    "users_register",
+]
+
+
+def failed(body: bytes) -> bool:
+    """Whether an API response reports `success: false`, even with a 200."""
+    try:
+        return json.loads(body).get("success") is False
+    except (ValueError, AttributeError):
+        return False
+
+
+class InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method: str, path: str, body=None) -> tuple[int, str | None]:
+        response = self.client.open(path, method=method, json=body)
+        self.body = response.get_data()
+
+        return response.status_code, response.headers.get("X-Query-Count")
+
+
+class HttpClient:
+    def __init__(self, port: int):
+        self.port = port
+        self.cookie = None
+
+    def request(self, method: str, path: str, body=None) -> tuple[int, str | None]:
+        headers = {}
+
+        if body is not None:
+            body = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+
+        if self.cookie is not None:
+            headers["Cookie"] = self.cookie
+
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+
+        try:
+            connection.request(method, path, body, headers)
+            response = connection.getresponse()
+            self.body = response.read()
+        finally:
+            connection.close()
+
+        if cookie := response.getheader("Set-Cookie"):
+            self.cookie = cookie.split(";", 1)[0]
+
+        return response.status, response.getheader("X-Query-Count")
+
+
+class Scenarios:
+    """Requests for each scenario, as ``(method, path, body)``.
+
+    Called from many client threads at once, so shared state is guarded.
+    """
+
+    def __init__(self, name: str, users: int, submissions: int, invites: list[str]):
+        self.name = name
+        self.users = users
+        self.submissions = submissions
+        self.invites = invites
+        self.registrations = count()
+        self.lock = Lock()
+
+    def session_login(self, rng: Random):
+        body = {"username": f"user{rng.randrange(self.users)}", "password": PASSWORD}
+
+        return "POST", "/api/session", body
+
+    def session_read(self, rng: Random):
+        return "GET", "/api/session", None
+
+    def submissions_list(self, rng: Random):
+        return "GET", f"/api/submissions?p={rng.randint(1, 50)}", None
+
+    def submissions_list_filtered(self, rng: Random):
+        page = rng.randint(1, 50)
+
+        return "GET", f"/api/submissions?reviewed=true&resolved=false&p={page}", None
+
+    def submissions_list_keyset(self, rng: Random):
+        return "GET", "/api/submissions?after=&sort=-id&fields=title,reviewed", None
+
+    def submissions_read(self, rng: Random):
+        return "GET", f"/api/submissions/{rng.randint(1, self.submissions)}", None
+
+    def submissions_create(self, rng: Random):
+        body = {"title": f"Benchmark {rng.random()}", "description": "Lost a die"}
+
+        return "POST", "/api/submissions", body
+
+    def submissions_patch(self, rng: Random):
+        body = {"reviewed": rng.random() < 0.5}
+
+        return "PATCH", f"/api/submissions/{rng.randint(1, self.submissions)}", body
+
+    def users_read(self, rng: Random):
+        return "GET", f"/api/users/user{rng.randrange(self.users)}", None
+
+    def users_register(self, rng: Random):
+        with self.lock:
+            n = next(self.registrations)
+
+        body = {
+            "username": f"{self.name}{n}",
+            "password": PASSWORD,
+            "invite": self.invites[n % len(self.invites)],
+        }
+
+        return "POST", "/api/users", body
+
+
+def summarize(latencies: list[float], queries: list[int], statuses: Counter, seconds):
+    p = quantiles(latencies, n=100, method="inclusive")
+
+    return {
+        "requests": len(latencies),
+        "errors": statuses.pop("failed", 0)
+        + sum(n for status, n in statuses.items() if status >= 400),
+        "throughput_rps": round(len(latencies) / seconds, 1),
+        "p50_ms": round(p[49] * 1000, 2),
+        "p95_ms": round(p[94] * 1000, 2),
+        "p99_ms": round(p[98] * 1000, 2),
+        "queries_per_request": round(fmean(queries), 2) if queries else None,
+        "statuses": {str(status): n for status, n in sorted(statuses.items())},
+    }
+
+
+def run_scenario(make_client, scenario, users: int, args) -> dict:
+    remaining = count()
+    lock = Lock()
+    latencies, queries, statuses = [], [], Counter()
+
+    def client(index: int):
+        rng = Random(index)
+        client = make_client()
+        client.request(
+            "POST",
+            "/api/session",
+            {"username": f"user{index % users}", "password": PASSWORD},
+        )
+
+        results = []
+
+        while next(remaining) < args.requests:
+            method, path, body = scenario(rng)
+
+            start = perf_counter()
+            status, query_count = client.request(method, path, body)
+            latency = perf_counter() - start
+
+            results.append((latency, status, query_count, failed(client.body)))
+
+        with lock:
+            for latency, status, query_count, unsuccessful in results:
+                latencies.append(latency)
+                statuses[status] += 1
+
+                if unsuccessful and status < 400:
+                    statuses["failed"] += 1
+
+                if query_count is not None:
+                    queries.append(int(query_count))
+
+    start = perf_counter()
+
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        list(pool.map(client, range(args.concurrency)))
+
+    return summarize(latencies, queries, statuses, perf_counter() - start)
+
+
+def run_all(make_client, scenarios: Scenarios, args) -> dict:
+    results = {}
+
+    for name in args.scenario or SCENARIOS:
+        results[name] = run_scenario(
+            make_client, getattr(scenarios, name), scenarios.users, args
+        )
+        print(f"{name}: {json.dumps(results[name])}", file=sys.stderr)
+
+    return results
+
+
+def start_gunicorn(args, env: dict) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "backend:create_app()",
+            "--bind",
+            f"127.0.0.1:{args.port}",
+            "--workers",
+            str(args.gunicorn_workers),
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = perf_counter() + 30
+
+    while perf_counter() < deadline:
+        try:
+            HttpClient(args.port).request("GET", "/api/session")
+            return server
+        except OSError:
+            sleep(0.2)
+
+    server.terminate()
+    raise RuntimeError("gunicorn did not start")
+
+
+def commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--submissions", type=int, default=100000)
+    parser.add_argument(
+        "--mode", choices=["inprocess", "gunicorn", "both"], default="inprocess"
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--gunicorn-workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS)
+    parser.add_argument("--database", default="/tmp/cardboardbound-benchmark.db")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    for suffix in ("", "-wal", "-shm", ".responses", ".rate-limits", ".metrics"):
+        if os.path.exists(args.database + suffix):
+            os.remove(args.database + suffix)
+
+    # Read by Config, in this process and in gunicorn's
+    env = {
+        **os.environ,
+        "DATABASE_URI": f"sqlite:///{args.database}",
+        "RESPONSE_CACHE_DATABASE": f"{args.database}.responses",
+        "RATE_LIMIT_DATABASE": f"{args.database}.rate-limits",
+        "METRICS_DATABASE": f"{args.database}.metrics",
+        "RATE_LIMIT_ENABLED": "0",
+        "QUERY_COUNT_HEADER": "1",
+        "SECRET_KEY": "benchmark",
+    }
+    os.environ.update(env)
+
+    from alembic import command
+    from alembic.config import Config as AlembicConfig
+
+    from backend import create_app
+    from backend.models import Invite
+
+    command.upgrade(AlembicConfig("alembic.ini"), "head")
+
+    app = create_app()
+    seeded = app.test_cli_runner().invoke(
+        args=[
+            "seed",
+            "--users",
+            str(args.users),
+            "--submissions",
+            str(args.submissions),
+            "--password",
+            PASSWORD,
+        ]
+    )
+    print(seeded.output.strip(), file=sys.stderr)
+
+    with app.app_context():
+        invites = Invite.create_many(args.requests * 2, date(3006, 1, 1))
+
+    results = {}
+
+    if args.mode in ("inprocess", "both"):
+        scenarios = Scenarios(
+            "inprocess", args.users, args.submissions, invites[: args.requests]
+        )
+        results["inprocess"] = run_all(lambda: InProcessClient(app), scenarios, args)
+
+    if args.mode in ("gunicorn", "both"):
+        scenarios = Scenarios(
+            "gunicorn", args.users, args.submissions, invites[args.requests :]
+        )
+        server = start_gunicorn(args, env)
+
+        try:
+            results["gunicorn"] = run_all(
+                lambda: HttpClient(args.port), scenarios, args
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+    output = json.dumps(
+        {
+            "commit": commit(),
+            "users": args.users,
+            "submissions": args.submissions,
+            "concurrency": args.concurrency,
+            "gunicorn_workers": args.gunicorn_workers,
+            "results": results,
+        },
+        indent=2,
+    )
+
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Assigning a submission backlog to admins.
+
+    python -m benchmarks.assignment [--backlog 100000] [--reviewers 20]
+        [--batch-size 1000]
+
+Builds a fresh migrated database with `--reviewers` admins of weight 1 to 3
+who already have an uneven share of open work, and a backlog of unassigned
+submissions. Each strategy assigns the whole backlog with `assign_backlog`,
+then it is unassigned again for the next. Reported are the time, the spread
+of open work per unit of weight afterwards, and what the same assignments
+cost picking each reviewer with a count of `User.assignments`, timed on
+`--aggregate-items` submissions.
+"""
+
+import argparse
+import json
+import os
+import random
+from time import perf_counter
+
+
+def seed(reviewers: int, assigned: int, backlog: int):
+    from sqlalchemy import insert
+
+    from backend.database import db
+    from backend.models import ReviewerLoad, Submission, User
+
+    rng = random.Random(0)
+
+    db.session.execute(
+        insert(User),
+        [
+            {"username": f"reviewer{i}", "password_hash": "", "admin": True}
+            for i in range(reviewers)
+        ],
+    )
+    db.session.commit()
+
+    for user_id in range(1, reviewers + 1):
+        ReviewerLoad.set_weight(user_id, rng.randint(1, 3))
+
+    chunk = 10000
+
+    for start in range(0, assigned + backlog, chunk):
+        db.session.execute(
+            insert(Submission),
+            [
+                {
+                    "title": f"Submission {i}",
+                    "description": "description " * 10,
+                    "reviewed": False,
+                    "resolved": False,
+                    # Early reviewers have most of the existing work
+                    "assignee_id": (
+                        min(int(rng.paretovariate(1)), reviewers)
+                        if i < assigned
+                        else None
+                    ),
+                }
+                for i in range(start, min(assigned + backlog, start + chunk))
+            ],
+        )
+        db.session.commit()
+
+
+def spread() -> dict:
+    from backend.models import ReviewerLoad
+
+    loads = [open_ / weight for _, open_, weight in ReviewerLoad.reviewers()]
+
+    return {
+        "min_open_per_weight": round(min(loads), 1),
+        "max_open_per_weight": round(max(loads), 1),
+    }
+
+
+def aggregate_pick() -> int:
+    """The reviewer with the least open work per weight, counted."""
+    from sqlalchemy import func, select
+
+    from backend.database import db
+    from backend.models import ReviewerLoad, Submission, User
+
+    open_ = (
+        select(func.count(Submission.id))
+        .where(Submission.assignee_id == User.id, Submission.resolved == False)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(User.id)
+        .join(ReviewerLoad, ReviewerLoad.user_id == User.id)
+        .where(User.admin == True, ReviewerLoad.weight > 0)
+        .order_by((open_ + 1) * 1.0 / ReviewerLoad.weight, User.id)
+        .limit(1)
+    )
+
+    return db.session.scalar(stmt)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backlog", type=int, default=100000)
+    parser.add_argument("--assigned", type=int, default=20000)
+    parser.add_argument("--reviewers", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--aggregate-items", type=int, default=200)
+    parser.add_argument("--database", default="/tmp/cardboardbound-assignment.db")
+    args = parser.parse_args()
+
+    for suffix in ["", "-wal", "-shm"]:
+        if os.path.exists(args.database + suffix):
+            os.remove(args.database + suffix)
+
+    os.environ["DATABASE_URI"] = f"sqlite:///{args.database}"
+
+    from alembic import command
+    from alembic.config import Config as AlembicConfig
+    from sqlalchemy import select, text, update
+
+    from backend import create_app
+    from backend.assignment import ASSIGN, STRATEGIES, assign_backlog
+    from backend.config import Config
+    from backend.database import db
+    from backend.models import Submission
+
+    command.upgrade(AlembicConfig("alembic.ini"), "head")
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = os.environ["DATABASE_URI"]
+
+    app = create_app(BenchmarkConfig)
+
+    with app.app_context():
+        seed(args.reviewers, args.assigned, args.backlog)
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+
+        backlog = (
+            select(Submission.id)
+            .where(Submission.assignee_id.is_(None))
+            .where(Submission.resolved == False)
+            .where(Submission.id > 0)
+            .order_by(Submission.id)
+            .limit(args.batch_size)
+        )
+        sql = backlog.compile(db.engine, compile_kwargs={"literal_binds": True})
+        results = {
+            "backlog": args.backlog,
+            "reviewers": args.reviewers,
+            "query_plan": [
+                row.detail
+                for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))
+            ],
+            "before": spread(),
+        }
+
+        for strategy in STRATEGIES:
+            start = perf_counter()
+            assigned = sum(assign_backlog(strategy, args.batch_size))
+            seconds = perf_counter() - start
+
+            results[strategy] = {
+                "assigned": assigned,
+                "seconds": round(seconds, 2),
+                "per_second": round(assigned / seconds),
+                **spread(),
+            }
+
+            db.session.execute(
+                update(Submission)
+                .where(Submission.id > args.assigned)
+                .values(assignee_id=None)
+            )
+            db.session.commit()
+
+        # One reviewer count and one UPDATE per submission, like a loop over
+        # the backlog without the counters would
+        ids = db.session.scalars(backlog.limit(args.aggregate_items)).all()
+        start = perf_counter()
+
+        for oid in ids:
+            db.session.execute(ASSIGN, {"b_id": oid, "b_assignee_id": aggregate_pick()})
+
+        db.session.commit()
+        seconds = perf_counter() - start
+
+        results["aggregate"] = {
+            "assigned": len(ids),
+            "seconds": round(seconds, 2),
+            "per_second": round(len(ids) / seconds),
+            "estimated_backlog_seconds": round(seconds / len(ids) * args.backlog),
+        }
+
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""Concurrency per worker class at equal memory.
+
+    python -m benchmarks.concurrency [--memory-mib 256] [--clients 32]
+        [--seconds 10] [--login-ratio 0.2] [--threads 8]
+
+For each gunicorn worker class (sync, gthread, gevent when installed, and
+asgi, which serves `backend.asgi`, when its dependencies are) the number of workers is fitted to `--memory-mib` of total PSS, then
+`--clients` concurrent clients mix logins, which spend their time in
+PBKDF2, with submission reads. Reads and logins are reported separately so
+reads stuck behind hashing show up in their latency. Linux only.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+from random import Random
+from statistics import quantiles
+from time import perf_counter, sleep
+
+from .api import PASSWORD, HttpClient
+from .serving import children, memory
+
+PORT = 8768
+
+
+def start(worker_class: str, threads: int, workers: int, env: dict):
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--config",
+            "gunicorn.conf.py",
+            "--bind",
+            f"127.0.0.1:{PORT}",
+        ],
+        env={
+            **env,
+            "GUNICORN_WORKERS": str(workers),
+            "GUNICORN_WORKER_CLASS": worker_class,
+            "GUNICORN_THREADS": str(threads),
+        },
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = perf_counter() + 60
+
+    while perf_counter() < deadline:
+        try:
+            HttpClient(PORT).request("GET", "/api/session")
+
+            if len(children(server.pid)) >= workers:
+                return server
+        except OSError:
+            pass
+
+        sleep(0.1)
+
+    server.terminate()
+    raise RuntimeError("gunicorn did not start")
+
+
+def warm_up(requests: int):
+    for i in range(requests):
+        HttpClient(PORT).request("GET", f"/api/submissions/{i % 100 + 1}")
+
+
+def total_pss(server) -> int:
+    pids = [server.pid] + children(server.pid)
+
+    return sum(memory(pid)["pss_kib"] for pid in pids)
+
+
+def fit_workers(worker_class: str, threads: int, env: dict, budget_kib: int) -> int:
+    """Workers whose total PSS, master included, fits in `budget_kib`."""
+    server = start(worker_class, threads, 2, env)
+
+    try:
+        warm_up(200)
+        master = memory(server.pid)["pss_kib"]
+        worker = (total_pss(server) - master) / 2
+    finally:
+        server.terminate()
+        server.wait()
+
+    return max(1, int((budget_kib - master) // worker))
+
+
+def load(args, users: int, submissions: int) -> dict:
+    def client(index: int):
+        rng = Random(index)
+        client = HttpClient(PORT)
+        credentials = {"username": f"user{index % users}", "password": PASSWORD}
+
+        # Retried, a saturated hashing queue answers 429
+        while client.request("POST", "/api/session", credentials)[0] != 200:
+            sleep(0.1)
+
+        results = []
+        deadline = perf_counter() + args.seconds
+
+        while perf_counter() < deadline:
+            if rng.random() < args.login_ratio:
+                kind, method, path = "login", "POST", "/api/session"
+                body = {"username": f"user{rng.randrange(users)}", "password": PASSWORD}
+            else:
+                kind, method = "read", "GET"
+                path = f"/api/submissions/{rng.randint(1, submissions)}"
+                body = None
+
+            start = perf_counter()
+            status, _ = client.request(method, path, body)
+            results.append((kind, perf_counter() - start, status))
+
+        return results
+
+    start = perf_counter()
+
+    with ThreadPoolExecutor(args.clients) as pool:
+        results = [r for rs in pool.map(client, range(args.clients)) for r in rs]
+
+    seconds = perf_counter() - start
+    summary = {}
+
+    for kind in ("read", "login"):
+        latencies = [latency for k, latency, _ in results if k == kind]
+        statuses = Counter(status for k, _, status in results if k == kind)
+
+        if len(latencies) < 2:
+            continue
+
+        p = quantiles(latencies, n=100, method="inclusive")
+        summary[kind] = {
+            "requests": len(latencies),
+            "throughput_rps": round(len(latencies) / seconds, 1),
+            "p50_ms": round(p[49] * 1000, 2),
+            "p99_ms": round(p[98] * 1000, 2),
+            "statuses": {str(status): n for status, n in sorted(statuses.items())},
+        }
+
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--memory-mib", type=int, default=256)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--login-ratio", type=float, default=0.2)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--submissions", type=int, default=10000)
+    parser.add_argument("--database", default="/tmp/cardboardbound-concurrency.db")
+    args = parser.parse_args()
+
+    for suffix in ("", "-wal", "-shm", ".responses", ".rate-limits", ".metrics"):
+        if os.path.exists(args.database + suffix):
+            os.remove(args.database + suffix)
+
+    env = {
+        **os.environ,
+        "DATABASE_URI": f"sqlite:///{args.database}",
+        "RESPONSE_CACHE_DATABASE": f"{args.database}.responses",
+        "RATE_LIMIT_DATABASE": f"{args.database}.rate-limits",
+        "METRICS_DATABASE": f"{args.database}.metrics",
+        "RATE_LIMIT_ENABLED": "0",
+        "SECRET_KEY": "benchmark",
+    }
+    os.environ.update(env)
+
+    from alembic import command
+    from alembic.config import Config as AlembicConfig
+
+    from backend import create_app
+
+    command.upgrade(AlembicConfig("alembic.ini"), "head")
+    seeded = (
+        create_app()
+        .test_cli_runner()
+        .invoke(
+            args=[
+                "seed",
+                "--users",
+                str(args.users),
+                "--submissions",
+                str(args.submissions),
+                "--password",
+                PASSWORD,
+            ]
+        )
+    )
+    print(seeded.output.strip(), file=sys.stderr)
+
+    worker_classes = [("sync", 1), ("gthread", args.threads)]
+
+    if find_spec("gevent") is not None:
+        # Greenlets come from GUNICORN_WORKER_CONNECTIONS, not threads
+        worker_classes.append(("gevent", 1))
+
+    if all(find_spec(name) for name in ("a2wsgi", "aiosqlite", "greenlet")):
+        # Reads and logins run as tasks, GUNICORN_WORKER_CONNECTIONS of them
+        worker_classes.append(("asgi", 1))
+
+    results = {}
+
+    for worker_class, threads in worker_classes:
+        workers = fit_workers(worker_class, threads, env, args.memory_mib * 1024)
+        server = start(worker_class, threads, workers, env)
+
+        try:
+            warm_up(200)
+            results[worker_class] = {
+                "workers": workers,
+                "threads": threads,
+                **load(args, args.users, args.submissions),
+                "total_pss_kib": total_pss(server),
+            }
+        finally:
+            server.terminate()
+            server.wait()
+
+        print(f"{worker_class}: {json.dumps(results[worker_class])}", file=sys.stderr)
+
+    print(
+        json.dumps(
+            {
+                "memory_mib": args.memory_mib,
+                "clients": args.clients,
+                "login_ratio": args.login_ratio,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""SQLite read/write throughput with concurrent worker processes.
+
+    python -m benchmarks.database [--workers 4] [--seconds 10] [--write-ratio 0.2]
+
+Runs each engine profile against a fresh migrated database. Every worker
+process builds its own app, like a gunicorn worker, and loops for
+`--seconds` doing a GET-context page read or a POST-context insert, then
+reports operations per second and how many ended in `database is locked`.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+from time import perf_counter
+
+PROFILES = ["default", "sqlite-wal"]
+
+
+def worker(profile: str, database: str, seconds: float, write_ratio: float, queue):
+    from sqlalchemy.exc import OperationalError
+
+    from backend import create_app
+    from backend.config import Config
+    from backend.database import db
+    from backend.models import Submission
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{database}"
+        DATABASE_ENGINE_PROFILE = profile
+        PASSWORD_HASH_WORKERS = 0
+
+    app = create_app(BenchmarkConfig)
+    rng = random.Random(os.getpid())
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    deadline = perf_counter() + seconds
+
+    while perf_counter() < deadline:
+        write = rng.random() < write_ratio
+
+        with app.test_request_context(method="POST" if write else "GET"):
+            try:
+                if write:
+                    Submission("Benchmark", "description " * 10).save()
+                    db.session.commit()
+                else:
+                    Submission.paginate(rng.randint(1, 20), 12)
+            except OperationalError:
+                db.session.rollback()
+                counts["locked"] += 1
+                continue
+
+        counts["writes" if write else "reads"] += 1
+
+    queue.put(counts)
+
+
+def run(profile: str, args) -> dict:
+    from alembic import command
+    from alembic.config import Config as AlembicConfig
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.database + suffix):
+            os.remove(args.database + suffix)
+
+    os.environ["DATABASE_URI"] = f"sqlite:///{args.database}"
+    command.upgrade(AlembicConfig("alembic.ini"), "head")
+
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    processes = [
+        context.Process(
+            target=worker,
+            args=(profile, args.database, args.seconds, args.write_ratio, queue),
+        )
+        for _ in range(args.workers)
+    ]
+
+    for process in processes:
+        process.start()
+
+    results = [queue.get() for _ in processes]
+
+    for process in processes:
+        process.join()
+
+    totals = {key: sum(result[key] for result in results) for key in results[0]}
+
+    return {
+        "reads_per_second": round(totals["reads"] / args.seconds, 1),
+        "writes_per_second": round(totals["writes"] / args.seconds, 1),
+        "locked_errors": totals["locked"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--database", default="/tmp/cardboardbound-throughput.db")
+    args = parser.parse_args()
+
+    print(
+        json.dumps(
+            {
+                "workers": args.workers,
+                "write_ratio": args.write_ratio,
+                "profiles": {profile: run(profile, args) for profile in PROFILES},
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Password hashing throughput.
+
+    python -m benchmarks.hashing [--iterations 100000] [--workers 2] [--seconds 5]
+
+Reports logins per second inline and through the hashing pool, and the
+pool's rate divided by its worker count (logins/sec per core).
+"""
+
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from flask import Flask
+
+from backend.hashing import PasswordHasher
+
+
+def measure(hasher: PasswordHasher, stored: str, seconds: float, clients: int) -> float:
+    def client():
+        done = 0
+        end = perf_counter() + seconds
+
+        while perf_counter() < end:
+            hasher.verify("correct horse", stored)
+            done += 1
+
+        return done
+
+    start = perf_counter()
+
+    with ThreadPoolExecutor(clients) as pool:
+        total = sum(pool.map(lambda _: client(), range(clients)))
+
+    return total / (perf_counter() - start)
+
+
+def make_hasher(iterations: int, workers: int) -> PasswordHasher:
+    app = Flask(__name__)
+    app.config.update(
+        PASSWORD_HASH_ITERATIONS=iterations,
+        PASSWORD_HASH_WORKERS=workers,
+        PASSWORD_HASH_QUEUE_DEPTH=max(1, workers),
+    )
+
+    return PasswordHasher(app)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    inline = make_hasher(args.iterations, 0)
+    stored = inline.hash("correct horse")
+    inline_rate = measure(inline, stored, args.seconds, 1)
+
+    pooled = make_hasher(args.iterations, args.workers)
+    # Start the pool outside of the measured window
+    pooled.verify("correct horse", stored)
+    pooled_rate = measure(pooled, stored, args.seconds, args.workers)
+
+    print(
+        json.dumps(
+            {
+                "iterations": args.iterations,
+                "workers": args.workers,
+                "inline_logins_per_sec": round(inline_rate, 2),
+                "pool_logins_per_sec": round(pooled_rate, 2),
+                "pool_logins_per_sec_per_core": round(pooled_rate / args.workers, 2),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
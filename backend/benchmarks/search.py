@@ -0,0 +1,148 @@
+"""Submission search against a LIKE scan.
+
+    python -m benchmarks.search [--rows 1000000] [--database /tmp/search.db]
+
+Builds a migrated database with `--rows` generated submissions (reused on
+later runs if it already has them) and times the first and a deep page of
+full text queries, for common and rare words, against counting and paging
+the equivalent `LIKE '%word%'` filter.
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+from time import perf_counter
+
+VOCABULARY_SIZE = 20000
+
+
+def vocabulary(rng: random.Random) -> list[str]:
+    return [
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+        for _ in range(VOCABULARY_SIZE)
+    ]
+
+
+def sentence(rng: random.Random, words: list[str], length: int) -> str:
+    # Zipf-like, a few words are common and most are rare
+    return " ".join(
+        words[min(int(rng.paretovariate(1.1)) - 1, len(words) - 1)]
+        for _ in range(length)
+    )
+
+
+def seed(rows: int):
+    from sqlalchemy import insert
+
+    from backend.database import db
+    from backend.models import Submission
+
+    rng = random.Random(0)
+    words = vocabulary(rng)
+    existing = Submission.count()
+    chunk = 10000
+
+    for start in range(existing, rows, chunk):
+        db.session.execute(
+            insert(Submission),
+            [
+                {
+                    "title": sentence(rng, words, 4),
+                    "description": sentence(rng, words, 30),
+                    "reviewed": False,
+                    "resolved": False,
+                }
+                for _ in range(start, min(rows, start + chunk))
+            ],
+        )
+        db.session.commit()
+
+
+def timed(func, repeat: int) -> float:
+    start = perf_counter()
+
+    for _ in range(repeat):
+        func()
+
+    return (perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--database", default="/tmp/cardboardbound-search.db")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URI"] = f"sqlite:///{args.database}"
+
+    from alembic import command
+    from alembic.config import Config as AlembicConfig
+    from sqlalchemy import func, select, true
+
+    from backend import create_app
+    from backend.config import Config
+    from backend.database import db
+    from backend.models import Submission
+
+    command.upgrade(AlembicConfig("alembic.ini"), "head")
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = os.environ["DATABASE_URI"]
+
+    app = create_app(BenchmarkConfig)
+
+    with app.app_context():
+        start = perf_counter()
+        seed(args.rows)
+        seconds = perf_counter() - start
+
+        words = vocabulary(random.Random(0))
+        queries = {
+            "common": words[0],
+            "uncommon": words[50],
+            "rare": words[5000],
+            "two_words": f"{words[1]} {words[20]}",
+        }
+
+        results = {}
+
+        for name, query in queries.items():
+            matches = true()
+
+            for word in query.split():
+                matches &= Submission.title.contains(
+                    word
+                ) | Submission.description.contains(word)
+
+            def like():
+                db.session.scalar(select(func.count(Submission.id)).where(matches))
+                db.session.execute(select(Submission).where(matches).limit(20)).all()
+
+            results[name] = {
+                "query": query,
+                "fts_ms": round(
+                    timed(lambda: Submission.search(query, 1, 20), args.repeat), 3
+                ),
+                "fts_deep_page_ms": round(
+                    timed(lambda: Submission.search(query, 50, 20), args.repeat), 3
+                ),
+                "like_ms": round(timed(like, args.repeat), 3),
+            }
+
+        print(
+            json.dumps(
+                {
+                    "rows": Submission.count(),
+                    "seed_seconds": round(seconds, 2),
+                    "queries": results,
+                },
+                indent=2,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Page serialization microbenchmark.
+
+    python -m benchmarks.serialization [--rows 100] [--repeat 2000]
+
+Compares the original getattr loop with stdlib json against the compiled
+serializers, with and without ORM hydration, through ModelJsonProvider
+(which uses orjson when it is installed).
+"""
+
+import argparse
+import json
+from timeit import timeit
+
+from backend import create_app
+from backend.config import Config
+from backend.database import db
+from backend.model_json_provider import orjson
+from backend.models import IdModel, Submission, User
+
+
+class BenchmarkConfig(Config):
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    PASSWORD_HASH_ITERATIONS = 1
+    PASSWORD_HASH_WORKERS = 0
+
+
+def getattr_serialize(o):
+    return {key: getattr(o, key) for key in o.serializable}
+
+
+def stdlib_default(o):
+    if isinstance(o, IdModel):
+        return getattr_serialize(o)
+
+    raise TypeError()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    app = create_app(BenchmarkConfig)
+
+    with app.app_context():
+        db.Base.metadata.create_all(db.engine)
+
+        users = [User(f"user{i}", "password") for i in range(10)]
+
+        for i in range(args.rows):
+            submission = Submission(f"Submission {i}", "description " * 20)
+            submission.assignee = users[i % len(users)]
+            db.session.add(submission)
+
+        db.session.commit()
+
+        fields = ["title", "reviewed", "resolved"]
+        items = Submission.fetch_all(Submission.select())
+        rows = Submission.fetch_all(Submission.select(fields), fields)
+
+        serializer = Submission.serializer()
+        subset_serializer = Submission.serializer(fields)
+        row_serializer = Submission.page_serializer(fields)
+
+        cases = {
+            "getattr_loop_stdlib_json": lambda: json.dumps(
+                [getattr_serialize(o) for o in items], default=stdlib_default
+            ),
+            "compiled_serializer_provider": lambda: app.json.dumps(
+                list(map(serializer, items))
+            ),
+            "compiled_subset_serializer_provider": lambda: app.json.dumps(
+                list(map(subset_serializer, items))
+            ),
+            "compiled_row_serializer_provider": lambda: app.json.dumps(
+                list(map(row_serializer, rows))
+            ),
+        }
+
+        results = {
+            name: round(timeit(case, number=args.repeat) / args.repeat * 1e6, 2)
+            for name, case in cases.items()
+        }
+
+    print(
+        json.dumps(
+            {
+                "rows": args.rows,
+                "encoder": "orjson" if orjson is not None else "json",
+                "microseconds_per_page": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
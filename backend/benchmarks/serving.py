@@ -0,0 +1,144 @@
+"""gunicorn startup time and memory per worker.
+
+    python -m benchmarks.serving [--workers 4] [--worker-class gthread]
+        [--threads 4] [--requests 200]
+
+Starts gunicorn from gunicorn.conf.py with and without `preload_app` and
+reports how long it takes until every worker has answered a request, then
+each worker's memory after `--requests` requests. PSS splits pages shared
+with the master and the other workers between them, so it is the number to
+divide a container's memory by. Linux only, it reads /proc.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from http.client import HTTPConnection
+from time import perf_counter, sleep
+
+PORT = 8767
+
+
+def children(pid: int) -> list[int]:
+    with open(f"/proc/{pid}/task/{pid}/children") as file:
+        return [int(child) for child in file.read().split()]
+
+
+def memory(pid: int) -> dict[str, int]:
+    """Resident, proportional and private (unique) set sizes in KiB."""
+    fields = {}
+
+    with open(f"/proc/{pid}/smaps_rollup") as file:
+        for line in file:
+            name, _, value = line.partition(":")
+
+            if value.strip().endswith("kB"):
+                fields[name] = int(value.split()[0])
+
+    return {
+        "rss_kib": fields["Rss"],
+        "pss_kib": fields["Pss"],
+        "uss_kib": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def get(path: str) -> int:
+    connection = HTTPConnection("127.0.0.1", PORT, timeout=10)
+
+    try:
+        connection.request("GET", path)
+        return connection.getresponse().status
+    finally:
+        connection.close()
+
+
+def run(preload: bool, args) -> dict:
+    env = {
+        **os.environ,
+        "GUNICORN_PRELOAD": "1" if preload else "0",
+        "GUNICORN_WORKERS": str(args.workers),
+        "GUNICORN_WORKER_CLASS": args.worker_class,
+        "GUNICORN_THREADS": str(args.threads),
+    }
+    start = perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "backend:create_app()",
+            "--config",
+            "gunicorn.conf.py",
+            "--bind",
+            f"127.0.0.1:{PORT}",
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    try:
+        first_response = None
+
+        while first_response is None:
+            if perf_counter() - start > 60:
+                raise RuntimeError("gunicorn did not start")
+
+            try:
+                get("/api/session")
+                first_response = perf_counter() - start
+            except OSError:
+                sleep(0.05)
+
+        # Workers answer in turn, wait until every one of them is up
+        while len(children(server.pid)) < args.workers:
+            sleep(0.05)
+
+        for _ in range(args.requests):
+            get("/api/session")
+
+        all_ready = perf_counter() - start
+        workers = [memory(pid) for pid in children(server.pid)]
+
+        return {
+            "first_response_s": round(first_response, 3),
+            "all_workers_s": round(all_ready, 3),
+            "master": memory(server.pid),
+            "worker_mean": {
+                key: round(sum(worker[key] for worker in workers) / len(workers))
+                for key in workers[0]
+            },
+            "total_pss_kib": memory(server.pid)["pss_kib"]
+            + sum(worker["pss_kib"] for worker in workers),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--worker-class", default="gthread")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        json.dumps(
+            {
+                "workers": args.workers,
+                "worker_class": args.worker_class,
+                "threads": args.threads,
+                "preload": run(True, args),
+                "no_preload": run(False, args),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
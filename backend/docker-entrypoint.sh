@@ -4,6 +4,5 @@ echo "Running Migrations"
 alembic upgrade head
 
 echo "Starting Backend"
-exec gunicorn 'backend:create_app()' \
-    --bind '0.0.0.0:80'
-    --workers 4
+# The app comes from gunicorn.conf.py, by worker class
+exec gunicorn --config gunicorn.conf.py
@@ -0,0 +1,28 @@
+from pathlib import Path
+from runpy import run_path
+
+# By path, importing the `backend` package would load the whole app into the
+# master even without preload_app
+Config = run_path(str(Path(__file__).parent / "backend" / "config.py"))["Config"]
+
+bind = "0.0.0.0:80"
+
+# The async views and a WSGI fallback on an event loop, or only WSGI
+if Config.GUNICORN_WORKER_CLASS == "asgi":
+    wsgi_app = "backend.asgi:create_app()"
+else:
+    wsgi_app = "backend:create_app()"
+
+workers = Config.GUNICORN_WORKERS
+worker_class = Config.GUNICORN_WORKER_CLASS
+threads = Config.GUNICORN_THREADS
+worker_connections = Config.GUNICORN_WORKER_CONNECTIONS
+
+# Workers share the master's imported modules copy-on-write and start
+# without importing anything. `Database` drops the inherited connection
+# pools after the fork.
+preload_app = Config.GUNICORN_PRELOAD
+
+max_requests = Config.GUNICORN_MAX_REQUESTS
+max_requests_jitter = Config.GUNICORN_MAX_REQUESTS_JITTER
+graceful_timeout = Config.GUNICORN_GRACEFUL_TIMEOUT
@@ -0,0 +1,72 @@
+"""Run from backend/ with
+
+    python -m unittest
+
+Every test case gets its own copy of one migrated database.
+"""
+
+import os
+import unittest
+from pathlib import Path
+from shutil import copyfile
+from tempfile import TemporaryDirectory
+
+ROOT = Path(__file__).parent.parent
+
+directory = TemporaryDirectory()
+template = Path(directory.name) / "template.db"
+
+# Read by backend.config, and through it alembic/env.py, on first import
+os.environ["DATABASE_URI"] = f"sqlite:///{template}"
+
+
+def migrate():
+    from alembic import command
+    from alembic.config import Config as AlembicConfig
+
+    if template.exists():
+        return
+
+    alembic = AlembicConfig(str(ROOT / "alembic.ini"))
+    alembic.set_main_option("script_location", str(ROOT / "alembic"))
+    command.upgrade(alembic, "head")
+
+
+class AppTestCase(unittest.TestCase):
+    # Config overrides for the test case's app
+    config: dict = {}
+
+    @classmethod
+    def setUpClass(cls):
+        from backend import create_app
+        from backend.config import Config
+
+        migrate()
+
+        cls.database = Path(directory.name) / f"{cls.__module__}.{cls.__name__}.db"
+        copyfile(template, cls.database)
+
+        config = {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{cls.database}",
+            "PASSWORD_HASH_WORKERS": 0,
+            "PASSWORD_HASH_ITERATIONS": 1000,
+            "RATE_LIMIT_ENABLED": False,
+            "RESPONSE_CACHE_ENABLED": False,
+            "METRICS_ENABLED": False,
+            **cls.config,
+        }
+        cls.app = create_app(type("TestConfig", (Config,), config))
+
+    def login(self, username: str, password: str = "password123"):
+        """A test client with a session for a new user."""
+        from backend.database import db
+        from backend.models import User
+
+        with self.app.app_context():
+            db.session.add(User(username, password))
+            db.session.commit()
+
+        client = self.app.test_client()
+        client.post("/api/session", json={"username": username, "password": password})
+
+        return client
@@ -0,0 +1,204 @@
+"""The async CRUD views and login behave like their sync versions."""
+
+import asyncio
+import unittest
+from importlib.util import find_spec
+from json import dumps, loads
+
+from tests import AppTestCase
+
+ASYNC_DEPENDENCIES = ("a2wsgi", "aiosqlite", "greenlet")
+
+
+class AsyncHashingTest(AppTestCase):
+    def test_async_hashes_verify_both_ways(self):
+        from backend.hashing import hasher
+
+        hashed = asyncio.run(hasher.hash_async("password123"))
+
+        self.assertTrue(hasher.verify("password123", hashed))
+        self.assertFalse(hasher.verify("wrong", hashed))
+        self.assertTrue(asyncio.run(hasher.verify_async("password123", hashed)))
+        self.assertFalse(asyncio.run(hasher.verify_async("wrong", hashed)))
+
+
+class AsyncOverridesTest(unittest.TestCase):
+    def test_sync_override_without_async_variant_is_rejected(self):
+        from flask import Blueprint
+
+        from backend.id_model_view import IdModelView
+        from backend.models import Submission
+
+        class PartlyAsyncView(IdModelView):
+            model = Submission
+            name = "partly-async"
+            async_crud = True
+
+            @classmethod
+            def read(cls, key):
+                return super().read(key)
+
+        with self.assertRaisesRegex(Exception, "read_async must be defined"):
+            PartlyAsyncView.register_view(Blueprint("partly", __name__))
+
+
+@unittest.skipUnless(
+    all(find_spec(name) for name in ASYNC_DEPENDENCIES),
+    f"needs {', '.join(ASYNC_DEPENDENCIES)}",
+)
+class AsgiTest(AppTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        from backend.asgi import AsgiApp
+        from backend.database import db
+        from backend.models import User
+
+        db.init_async(cls.app)
+        cls.asgi = AsgiApp(cls.app)
+        # aiosqlite connections belong to the loop that opened them
+        cls.loop = asyncio.new_event_loop()
+
+        with cls.app.app_context():
+            db.session.add(User("async", "password123"))
+            db.session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        from backend.database import db
+
+        cls.loop.run_until_complete(db.async_engine.dispose())
+        cls.loop.close()
+
+    def setUp(self):
+        self.cookie = None
+
+    def request(self, method: str, path: str, json=None, headers=()):
+        path, _, query = path.partition("?")
+        body = b"" if json is None else dumps(json).encode()
+        headers = [(b"host", b"localhost"), *headers]
+
+        if json is not None:
+            headers.append((b"content-type", b"application/json"))
+
+        if self.cookie is not None:
+            headers.append((b"cookie", self.cookie))
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": headers,
+            "server": ("localhost", 80),
+            "client": ("127.0.0.1", 50000),
+        }
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        self.loop.run_until_complete(self.asgi(scope, receive, send))
+
+        start = messages[0]
+        content = b"".join(message.get("body", b"") for message in messages[1:])
+
+        for name, value in start["headers"]:
+            if name == b"set-cookie":
+                self.cookie = value.split(b";")[0]
+
+        return start["status"], dict(start["headers"]), loads(content or "null")
+
+    def log_in(self):
+        status, _, body = self.request(
+            "POST", "/api/session", {"username": "async", "password": "password123"}
+        )
+        self.assertEqual((status, body["success"]), (200, True))
+
+    def test_reads_need_a_session(self):
+        status, _, _ = self.request(
+            "POST", "/api/submissions", {"title": "t", "description": "d"}
+        )
+        self.assertEqual(status, 201)
+
+        self.assertEqual(self.request("GET", "/api/submissions/1")[0], 401)
+        self.assertEqual(self.request("GET", "/api/submissions")[0], 401)
+
+    def test_crud(self):
+        self.log_in()
+
+        status, _, body = self.request(
+            "POST", "/api/submissions", {"title": "Async", "description": "d"}
+        )
+        self.assertEqual(status, 201)
+        key = body["item"]["id"]
+
+        status, headers, body = self.request("GET", f"/api/submissions/{key}")
+        self.assertEqual((status, body["item"]["title"]), (200, "Async"))
+
+        status, _, _ = self.request(
+            "GET",
+            f"/api/submissions/{key}",
+            headers=[(b"if-none-match", headers[b"etag"])],
+        )
+        self.assertEqual(status, 304)
+
+        status, _, body = self.request(
+            "PATCH", f"/api/submissions/{key}", {"reviewed": True}
+        )
+        self.assertEqual((status, body["item"]["reviewed"]), (200, True))
+
+        # Committed, the sync app sees it
+        client = self.app.test_client()
+        client.post(
+            "/api/session", json={"username": "async", "password": "password123"}
+        )
+        self.assertTrue(client.get(f"/api/submissions/{key}").json["item"]["reviewed"])
+
+        status, _, body = self.request("GET", "/api/submissions?reviewed=true")
+        self.assertEqual(status, 200)
+        self.assertIn(key, [item["id"] for item in body["page"]["items"]])
+
+        self.assertEqual(self.request("DELETE", f"/api/submissions/{key}")[0], 200)
+        self.assertEqual(self.request("GET", f"/api/submissions/{key}")[0], 404)
+
+    def test_invalid_create_is_rejected(self):
+        status, _, body = self.request("POST", "/api/submissions", {"nope": 1})
+
+        self.assertEqual((status, body["success"]), (200, False))
+
+    def test_searches_and_other_routes_fall_back_to_wsgi(self):
+        self.log_in()
+        self.request(
+            "POST", "/api/submissions", {"title": "Findable", "description": "d"}
+        )
+
+        status, _, body = self.request("GET", "/api/submissions?q=findable")
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            [item["title"] for item in body["page"]["items"]], ["Findable"]
+        )
+
+        status, _, body = self.request("GET", "/api/session")
+        self.assertEqual((status, body["item"]["username"]), (200, "async"))
+
+    def test_wrong_password(self):
+        status, _, body = self.request(
+            "POST", "/api/session", {"username": "async", "password": "wrong"}
+        )
+
+        self.assertEqual((status, body["success"]), (200, False))
+        self.assertIsNone(self.cookie)
+
+
+if __name__ == "__main__":
+    unittest.main()
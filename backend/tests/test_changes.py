@@ -0,0 +1,70 @@
+"""Delta sync over `/api/submissions/changes`."""
+
+import unittest
+
+from tests import AppTestCase
+
+
+class ChangesTest(AppTestCase):
+    def setUp(self):
+        from backend.database import db
+        from backend.models import Submission
+
+        with self.app.app_context():
+            db.session.add_all(
+                Submission(f"Submission {i}", "description") for i in range(12)
+            )
+            db.session.commit()
+
+            for oid in (3, 10, 11):
+                db.session.delete(db.session.get(Submission, oid))
+
+            db.session.commit()
+
+            # Pages past the tombstones only find changes, more than one
+            # page of them
+            db.session.add_all(
+                Submission(f"Submission {i}", "description") for i in range(12, 32)
+            )
+            db.session.get(Submission, 1).reviewed = True
+            db.session.commit()
+
+        self.client = self.login("reviewer")
+
+    def test_pages_until_has_more_is_false_cover_every_change(self):
+        since, pages = 0, []
+
+        while True:
+            response = self.client.get(
+                f"/api/submissions/changes?since={since}&limit=5"
+            )
+            self.assertEqual(response.status_code, 200)
+
+            changes = response.json["changes"]
+            pages.append(changes)
+            since = changes["next_since"]
+
+            if not changes["has_more"]:
+                break
+
+        items = [item for page in pages for item in page["items"]]
+        deleted = [oid for page in pages for oid in page["deleted"]]
+
+        self.assertTrue(pages[0]["has_more"])
+        self.assertTrue(all(len(p["items"]) + len(p["deleted"]) <= 5 for p in pages))
+        self.assertEqual(
+            sorted(item["id"] for item in items),
+            [oid for oid in range(1, 33) if oid not in (3, 10, 11)],
+        )
+        self.assertEqual(sorted(deleted), [3, 10, 11])
+
+        seqs = [item["change_seq"] for item in items]
+        self.assertEqual(seqs, sorted(seqs))
+
+        response = self.client.get(f"/api/submissions/changes?since={since}")
+        self.assertEqual(response.json["changes"]["items"], [])
+        self.assertFalse(response.json["changes"]["has_more"])
+
+
+if __name__ == "__main__":
+    unittest.main()
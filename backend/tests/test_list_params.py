@@ -0,0 +1,45 @@
+"""Malformed list parameters are a 400, not a 500."""
+
+import unittest
+
+from tests import AppTestCase
+
+
+class ListParamsTest(AppTestCase):
+    def setUp(self):
+        self.client = self.login(self._testMethodName)
+
+    def assertBadRequest(self, query: str):
+        response = self.client.get(f"/api/submissions?{query}")
+
+        self.assertEqual(response.status_code, 400, response.get_data(as_text=True))
+        self.assertTrue(response.json["errors"])
+
+    def test_cursor_values_must_be_scalars(self):
+        from backend.models import encode_cursor
+
+        for values in ([[1]], [{"id": 1}], [1.5]):
+            with self.subTest(values):
+                self.assertBadRequest(f"after={encode_cursor(values)}")
+
+        self.assertBadRequest(f"sort=assignee&after={encode_cursor([[1], 1])}")
+
+        for values in ([1], [None]):
+            with self.subTest(values):
+                cursor = encode_cursor([values[0], 1])
+                response = self.client.get(
+                    f"/api/submissions?sort=assignee&after={cursor}"
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_page_and_per_page_must_be_integers(self):
+        for query in ("per_page=abc", "p=abc", "p=1.5", "q=word&p=x"):
+            with self.subTest(query):
+                self.assertBadRequest(query)
+
+        response = self.client.get("/api/submissions?p=0&per_page=1000")
+        self.assertEqual(response.status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
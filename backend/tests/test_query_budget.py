@@ -0,0 +1,74 @@
+"""Requests stay within QUERY_BUDGET, and one over it commits nothing."""
+
+import sqlite3
+import unittest
+
+from tests import AppTestCase
+
+
+class QueryBudgetTest(AppTestCase):
+    # Session user, table versions, page and count
+    config = {"QUERY_BUDGET": 4, "QUERY_COUNT_HEADER": True}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        from backend.database import db
+        from backend.models import Submission, User
+
+        with cls.app.app_context():
+            assignees = [User(f"assignee{i}", "password123") for i in range(20)]
+            db.session.add_all(assignees)
+            db.session.flush()
+
+            for i, assignee in enumerate(assignees):
+                submission = Submission(f"Submission {i}", "description")
+                submission.assignee_id = assignee.id
+                db.session.add(submission)
+
+            db.session.commit()
+
+    def setUp(self):
+        self.client = self.login(self._testMethodName)
+        # Caches the session's user
+        self.client.get("/api/session")
+
+    def query_count(self, path: str) -> int:
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, path)
+
+        return int(response.headers["X-Query-Count"])
+
+    def test_list_loads_assignees_with_the_page(self):
+        one = self.query_count("/api/submissions?per_page=1")
+
+        self.assertEqual(one, 4)
+        self.assertEqual(self.query_count("/api/submissions?per_page=20"), one)
+        self.assertEqual(self.query_count("/api/submissions?per_page=20&after="), 3)
+
+    def test_read_loads_the_assignee_with_the_item(self):
+        self.assertEqual(self.query_count("/api/submissions/1"), 3)
+
+
+class ExceededQueryBudgetTest(AppTestCase):
+    # Enough to log in, a batch also reads the session user and table counters
+    config = {"QUERY_BUDGET": 2}
+
+    def test_request_over_budget_fails_without_committing(self):
+        client = self.login("writer")
+        items = [{"title": f"Over {i}", "description": ""} for i in range(3)]
+
+        with self.assertLogs(self.app.logger, "ERROR"):
+            response = client.post("/api/submissions/batch", json={"items": items})
+
+        self.assertEqual(response.status_code, 500)
+
+        with sqlite3.connect(self.database) as connection:
+            count = connection.execute("SELECT count(*) FROM submissions").fetchone()
+
+        self.assertEqual(count, (0,))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+"""Every list and delta sync query must filter and sort through an index."""
+
+import unittest
+
+from tests import AppTestCase
+
+
+class QueryPlansTest(AppTestCase):
+    def test_no_shape_sorts_in_memory_or_scans_when_filtered(self):
+        from backend.id_model_view import IdModelView
+
+        with self.app.app_context():
+            for view in IdModelView.__subclasses__():
+                for shape, plan, bad in view.query_plans():
+                    with self.subTest(shape):
+                        self.assertEqual(bad, [], "; ".join(plan))
+
+
+class SeededQueryPlansTest(QueryPlansTest):
+    """The same with statistics, which can change the planner's choices."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        from sqlalchemy import text
+
+        from backend.database import db
+
+        runner = cls.app.test_cli_runner()
+        result = runner.invoke(args=["seed", "--users", "20", "--submissions", "20000"])
+        assert result.exit_code == 0, result.output
+
+        with cls.app.app_context():
+            db.session.execute(text("ANALYZE"))
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+"""Login buckets keyed on sprayed usernames don't pile up."""
+
+import sqlite3
+import unittest
+
+from tests import AppTestCase, directory
+
+
+class RateLimitPurgeTest(AppTestCase):
+    config = {
+        "RATE_LIMIT_ENABLED": True,
+        "RATE_LIMIT_DATABASE": f"{directory.name}/rate-limits.db",
+        "LOGIN_RATE_LIMIT_PER_MINUTE": 10,
+        "LOGIN_RATE_LIMIT_BURST": 5,
+    }
+
+    def login_as(self, username: str, address: str):
+        return self.app.test_client().post(
+            "/api/session",
+            json={"username": username, "password": "password123"},
+            environ_base={"REMOTE_ADDR": address},
+        )
+
+    def buckets(self) -> list[str]:
+        with sqlite3.connect(self.config["RATE_LIMIT_DATABASE"]) as connection:
+            return sorted(key for key, in connection.execute("SELECT key FROM buckets"))
+
+    def test_only_refilled_buckets_are_purged(self):
+        from backend.rate_limit import rate_limiter
+
+        for i in range(20):
+            self.login_as(f"sprayed{i}", f"10.0.0.{i}")
+
+        self.assertEqual(len(self.buckets()), 40)
+
+        # At 10 a minute any bucket is full again after 30 seconds
+        with sqlite3.connect(self.config["RATE_LIMIT_DATABASE"]) as connection:
+            connection.execute("UPDATE buckets SET updated = updated - 31")
+
+        for _ in range(5):
+            self.assertNotEqual(self.login_as("drained", "10.0.1.1").status_code, 429)
+
+        self.assertEqual(rate_limiter.purge("login", 10, 5), 40)
+        self.assertEqual(
+            self.buckets(), ["login:ip:10.0.1.1", "login:username:drained"]
+        )
+        self.assertEqual(self.login_as("drained", "10.0.1.1").status_code, 429)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""Sessions end everywhere once their user changes password or is deleted."""
+
+import sqlite3
+import unittest
+
+from tests import AppTestCase
+
+
+class SessionsTest(AppTestCase):
+    def elsewhere(self, sql: str, *params):
+        """Writes like another worker would, unseen by this one's cache."""
+        with sqlite3.connect(self.database) as connection:
+            connection.execute(sql, params)
+
+    def username(self, client) -> str | None:
+        return (client.get("/api/session").json.get("item") or {}).get("username")
+
+    def test_password_change_in_another_worker_ends_the_session(self):
+        client = self.login("changed")
+        self.assertEqual(self.username(client), "changed")
+
+        self.elsewhere(
+            "UPDATE users SET session_version = session_version + 1"
+            " WHERE username = ?",
+            "changed",
+        )
+
+        self.assertIsNone(self.username(client))
+        self.assertEqual(client.get("/api/submissions").status_code, 401)
+
+    def test_delete_in_another_worker_ends_the_session(self):
+        client = self.login("deleted")
+        self.assertEqual(self.username(client), "deleted")
+
+        self.elsewhere("DELETE FROM users WHERE username = ?", "deleted")
+
+        self.assertIsNone(self.username(client))
+
+    def test_other_users_sessions_survive(self):
+        client = self.login("bystander")
+        self.login("other")
+
+        self.elsewhere(
+            "UPDATE users SET session_version = session_version + 1"
+            " WHERE username = ?",
+            "other",
+        )
+
+        self.assertEqual(self.username(client), "bystander")
+
+
+class SnapshotSessionsTest(SessionsTest):
+    config = {"SESSION_USER_SNAPSHOT_MAX_AGE": 300}
+
+    def test_revoked_admin_is_not_trusted_from_the_snapshot(self):
+        client = self.login("admin")
+        self.elsewhere("UPDATE users SET admin = 1 WHERE username = ?", "admin")
+
+        # Logging in again signs a snapshot with the admin flag
+        client.post(
+            "/api/session", json={"username": "admin", "password": "password123"}
+        )
+        self.assertEqual(client.post("/api/invites", json={}).status_code, 201)
+
+        self.elsewhere("UPDATE users SET admin = 0 WHERE username = ?", "admin")
+
+        self.assertEqual(client.post("/api/invites", json={}).status_code, 403)
+
+
+if __name__ == "__main__":
+    unittest.main()
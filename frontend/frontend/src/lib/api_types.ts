@@ -12,7 +12,10 @@ export type SubmissionResponse = {
 	page: {
 		items: Array<Submission>;
 		next_page: number | null;
-		page_count: number;
+		page_count: number | null;
+		count_exact: boolean | null;
 		previous_page: number | null;
+		next_cursor: string | null;
+		previous_cursor: string | null;
 	};
 };